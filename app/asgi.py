@@ -3,6 +3,11 @@ ASGI config for app project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The OCR progress stream (books.views.ocr_progress_stream) is an async
+Server-Sent Events view and should be served through this application
+(e.g. ``uvicorn app.asgi:application``) so that open streams do not tie
+up synchronous worker threads.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -17,7 +17,12 @@ app.autodiscover_tasks()
 # 配置任务路由
 app.conf.task_routes = {
     'books.tasks.process_ocr_task': {'queue': 'ocr'},
+    'books.tasks.process_ocr_batch': {'queue': 'ocr'},
+    # 校对时的区域重新识别需要交互延迟，使用单独的队列，不排在整本书的识别任务之后
+    'books.tasks.reocr_regions': {'queue': 'ocr_interactive'},
     'books.tasks.batch_translate_book': {'queue': 'translation'},
+    'books.tasks.generate_page_tiles': {'queue': 'images'},
+    'books.tasks.generate_page_sprite': {'queue': 'images'},
     'books.tasks.cleanup_old_ocr_tasks': {'queue': 'maintenance'},
 }
 
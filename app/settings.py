@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -126,4 +127,71 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Celery Configuration Options
 CELERY_TIMEZONE = "Australia/Tasmania"
 CELERY_TASK_TRACK_STARTED = True
-CELERY_TASK_TIME_LIMIT = 30 * 60
\ No newline at end of file
+CELERY_TASK_TIME_LIMIT = 30 * 60
+
+
+# OCR Configuration
+# 当前worker模型池加载的识别语言，不同队列的worker可通过环境变量分别配置
+OCR_LANGUAGES = os.environ.get('OCR_LANGUAGES', 'ch_sim,en').split(',')
+# worker子进程启动时（worker_process_init）预热模型，只需在消费OCR队列的worker上开启
+OCR_WARMUP_ON_WORKER_INIT = os.environ.get('OCR_WARMUP_ON_WORKER_INIT', '0') == '1'
+# 在prefork父进程中预加载模型，子进程通过写时复制共享权重
+OCR_PRELOAD_IN_PARENT = os.environ.get('OCR_PRELOAD_IN_PARENT', '0') == '1'
+# 上传时每个批量OCR任务包含的页数
+OCR_BATCH_PAGES = int(os.environ.get('OCR_BATCH_PAGES', 8))
+# 识别模型每次前向处理的文本框数量
+OCR_RECOGNIZER_BATCH_SIZE = int(os.environ.get('OCR_RECOGNIZER_BATCH_SIZE', 16))
+# 大幅面扫描件分块识别：分块边长、相邻分块重叠像素、并行识别线程数
+OCR_TILE_SIZE = int(os.environ.get('OCR_TILE_SIZE', 2048))
+OCR_TILE_OVERLAP = int(os.environ.get('OCR_TILE_OVERLAP', 256))
+OCR_TILE_WORKERS = int(os.environ.get('OCR_TILE_WORKERS', 1))
+# 页面像素数超过该值时自动启用分块识别
+OCR_TILED_MIN_PIXELS = int(os.environ.get('OCR_TILED_MIN_PIXELS', 4096 * 4096))
+# OCR预处理流水线：预处理线程数、最多提前准备的页面（分块）数、每次批量识别的最大页数
+OCR_PREFETCH_WORKERS = int(os.environ.get('OCR_PREFETCH_WORKERS', 2))
+OCR_PREFETCH_DEPTH = int(os.environ.get('OCR_PREFETCH_DEPTH', 4))
+OCR_PIPELINE_GROUP_PAGES = int(os.environ.get('OCR_PIPELINE_GROUP_PAGES', 4))
+# 文本区域阅读顺序：auto（按区域形状判断）、horizontal（横排）、vertical_rtl（竖排从右到左）
+OCR_READING_ORDER = os.environ.get('OCR_READING_ORDER', 'auto')
+# OCR工作DPI：元数据DPI高于该值的扫描件缩小解码后再识别，为空时按原始分辨率识别
+OCR_WORKING_DPI = int(os.environ['OCR_WORKING_DPI']) if os.environ.get('OCR_WORKING_DPI') else None
+# 分辨率归一化：按连通域估计字形高度，高于该值（像素）的页面缩小后再识别，为空时按原尺寸识别
+# 可用 manage.py benchmark_resolution 在样本页面上比较不同取值的速度和准确率
+OCR_TARGET_GLYPH_HEIGHT = (
+    int(os.environ['OCR_TARGET_GLYPH_HEIGHT']) if os.environ.get('OCR_TARGET_GLYPH_HEIGHT') else None
+)
+# 页面快照（编辑器接口预先序列化的数据）是否gzip压缩存储
+PAGE_SNAPSHOT_COMPRESS = True
+# 上传页面时生成的预览图最长边（像素）
+PAGE_PREVIEW_SIZE = int(os.environ.get('PAGE_PREVIEW_SIZE', 512))
+# 页面瓦片金字塔（编辑器按缩放级别加载）的瓦片尺寸、重叠像素和JPEG质量
+PAGE_TILE_SIZE = int(os.environ.get('PAGE_TILE_SIZE', 256))
+PAGE_TILE_OVERLAP = int(os.environ.get('PAGE_TILE_OVERLAP', 1))
+PAGE_TILE_QUALITY = int(os.environ.get('PAGE_TILE_QUALITY', 85))
+# 区域雪碧图中单个裁剪图的最长边（像素）和JPEG质量
+PAGE_SPRITE_MAX_SIDE = int(os.environ.get('PAGE_SPRITE_MAX_SIDE', 512))
+PAGE_SPRITE_QUALITY = int(os.environ.get('PAGE_SPRITE_QUALITY', 80))
+# 上传临时目录，与 MEDIA_ROOT 位于同一文件系统时页面图片保存只需移动文件
+FILE_UPLOAD_TEMP_DIR = os.environ.get('FILE_UPLOAD_TEMP_DIR')
+# OCR进度推送使用的Redis发布/订阅地址，未配置时复用Celery的Redis消息代理，
+# 两者都没有时使用进程内代理（仅开发环境有效）
+OCR_PROGRESS_REDIS_URL = os.environ.get('OCR_PROGRESS_REDIS_URL')
+
+
+# Translation Configuration
+# 兼容OpenAI接口的翻译服务，未配置时使用 OPENAI_API_KEY / OPENAI_BASE_URL 环境变量
+TRANSLATION_API_KEY = os.environ.get('TRANSLATION_API_KEY')
+TRANSLATION_API_BASE_URL = os.environ.get('TRANSLATION_API_BASE_URL')
+TRANSLATION_MODEL = os.environ.get('TRANSLATION_MODEL', 'gpt-3.5-turbo')
+# 批量翻译同时进行的请求数上限
+TRANSLATION_MAX_IN_FLIGHT = int(os.environ.get('TRANSLATION_MAX_IN_FLIGHT', 8))
+# 限流/临时错误的最大重试次数（指数退避）
+TRANSLATION_MAX_RETRIES = int(os.environ.get('TRANSLATION_MAX_RETRIES', 3))
+TRANSLATION_TIMEOUT = 60
+# batch_translate_book 每批并发翻译并保存的区域数
+TRANSLATION_CHUNK_SIZE = 200
+# 翻译记忆：数据库持久层 + 进程内LRU层
+TRANSLATION_MEMORY_ENABLED = True
+TRANSLATION_MEMORY_LRU_SIZE = 10000
+# 批量翻译时每个打包请求的token预算，0 表示逐条翻译
+TRANSLATION_PACK_TOKEN_BUDGET = int(os.environ.get('TRANSLATION_PACK_TOKEN_BUDGET', 1500))
@@ -1,11 +1,191 @@
+from collections import Counter, defaultdict
 from django.contrib import admin
+from django.db import transaction
+from django.db.models import Count
 
 # Register your models here.
-from .models import Book, BookPage, OCRTask, TextRegion, TextCorrection, Translation
+from .models import Book, BookPage, OCRTask, TextRegion, TextCorrection, Translation, OCRResultCache, OCRCacheStats, TranslationMemoryEntry, BookOCRStats, PageSnapshot, RegionTombstone, PageTiles, PageSprite
+
+from .services.page_revision import mark_regions_changed, record_region_deletions
+from .tasks import generate_page_sprite
 
 admin.site.register(Book)
-admin.site.register(BookPage)
+
+
+def _apply_stats_deltas(book_deltas):
+    """按书籍累加的增量更新书籍OCR统计"""
+    for book_id, deltas in book_deltas.items():
+        BookOCRStats.apply_delta(book_id, **deltas)
+
+
+def _page_stats_deltas(pages, sign):
+    """
+    一组页面对各自书籍统计的贡献（在删除前调用）
+
+    Returns:
+        Dict: 书籍ID -> 增量
+    """
+    book_deltas = defaultdict(Counter)
+    rows = pages.annotate(regions=Count('text_regions')).values_list('book_id', 'ocr_status', 'ocr_confidence', 'regions')
+    for book_id, status, confidence, region_count in rows:
+        book_deltas[book_id].update(BookOCRStats.page_deltas(status, confidence, region_count, sign))
+    return book_deltas
+
+
+@admin.register(BookPage)
+class BookPageAdmin(admin.ModelAdmin):
+    """在后台增删页面或修改OCR状态时同步更新书籍OCR统计，不必等待 reconcile_ocr_stats"""
+
+    def save_model(self, request, obj, form, change):
+        # 替换图片或帧后清空上传时记录的元数据，OCR时重新计算哈希
+        if change and ('image' in form.changed_data or 'image_frame' in form.changed_data):
+            obj.image_hash = ''
+            obj.image_format = ''
+            obj.image_width = obj.image_height = obj.image_size = None
+            # 现有文本区域不再对应新图片，不能用于预热OCR缓存
+            obj.ocr_version = ''
+        previous = None
+        if change:
+            previous = _page_stats_deltas(BookPage.objects.filter(pk=obj.pk), -1)
+        super().save_model(request, obj, form, change)
+        if previous is None or {'ocr_status', 'ocr_confidence', 'book'} & set(form.changed_data):
+            book_deltas = _page_stats_deltas(BookPage.objects.filter(pk=obj.pk), 1)
+            for book_id, deltas in (previous or {}).items():
+                book_deltas[book_id].update(deltas)
+            _apply_stats_deltas(book_deltas)
+
+    def delete_model(self, request, obj):
+        book_deltas = _page_stats_deltas(BookPage.objects.filter(pk=obj.pk), -1)
+        super().delete_model(request, obj)
+        _apply_stats_deltas(book_deltas)
+
+    def delete_queryset(self, request, queryset):
+        book_deltas = _page_stats_deltas(queryset, -1)
+        super().delete_queryset(request, queryset)
+        _apply_stats_deltas(book_deltas)
+
+
 admin.site.register(OCRTask)
-admin.site.register(TextRegion)
-admin.site.register(TextCorrection)
-admin.site.register(Translation)
\ No newline at end of file
+
+
+class PageRevisionAdmin(admin.ModelAdmin):
+    """在后台修改文本区域、校对或翻译后递增所属页面的版本并刷新快照"""
+    page_id_lookup = 'page_id'
+    region_id_lookup = 'id'
+    # 删除该模型的对象即删除文本区域本身（而不是区域的校对或翻译）
+    deletes_regions = False
+
+    def _page_region_ids(self, queryset):
+        return list(queryset.values_list(self.page_id_lookup, self.region_id_lookup))
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        mark_regions_changed(self._page_region_ids(self.model.objects.filter(pk=obj.pk)))
+
+    def _record_deletion(self, page_region_ids):
+        if self.deletes_regions:
+            record_region_deletions(page_region_ids)
+        else:
+            mark_regions_changed(page_region_ids)
+
+    def delete_model(self, request, obj):
+        page_region_ids = self._page_region_ids(self.model.objects.filter(pk=obj.pk))
+        super().delete_model(request, obj)
+        self._record_deletion(page_region_ids)
+
+    def delete_queryset(self, request, queryset):
+        page_region_ids = self._page_region_ids(queryset)
+        super().delete_queryset(request, queryset)
+        self._record_deletion(page_region_ids)
+
+
+@admin.register(TextRegion)
+class TextRegionAdmin(PageRevisionAdmin):
+    deletes_regions = True
+
+    def _refresh_sprites(self, page_ids):
+        # 区域坐标变化后重新生成雪碧图（版本未变时任务直接跳过）
+        for page_id in set(page_ids):
+            transaction.on_commit(lambda page_id=page_id: generate_page_sprite.delay(page_id))
+
+    def _update_region_counts(self, page_ids, sign):
+        # 同步书籍统计中的文本区域数
+        book_ids = dict(BookPage.objects.filter(id__in=set(page_ids)).values_list('id', 'book_id'))
+        book_deltas = defaultdict(Counter)
+        for page_id in page_ids:
+            book_deltas[book_ids[page_id]]['region_count'] += sign
+        _apply_stats_deltas(book_deltas)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self._refresh_sprites([obj.page_id])
+        if not change:
+            self._update_region_counts([obj.page_id], 1)
+        elif 'page' in form.changed_data:
+            self._update_region_counts([form.initial['page']], -1)
+            self._update_region_counts([obj.page_id], 1)
+
+    def _record_deletion(self, page_region_ids):
+        super()._record_deletion(page_region_ids)
+        self._refresh_sprites(page_id for page_id, _ in page_region_ids)
+        self._update_region_counts([page_id for page_id, _ in page_region_ids], -1)
+
+
+@admin.register(TextCorrection)
+class TextCorrectionAdmin(PageRevisionAdmin):
+    page_id_lookup = 'text_region__page_id'
+    region_id_lookup = 'text_region_id'
+
+
+@admin.register(Translation)
+class TranslationAdmin(PageRevisionAdmin):
+    page_id_lookup = 'text_region__page_id'
+    region_id_lookup = 'text_region_id'
+
+
+@admin.register(OCRResultCache)
+class OCRResultCacheAdmin(admin.ModelAdmin):
+    list_display = ('content_hash', 'version', 'region_count', 'avg_confidence', 'hit_count', 'created_at', 'last_hit_at')
+    search_fields = ('content_hash',)
+    exclude = ('regions',)
+
+
+@admin.register(OCRCacheStats)
+class OCRCacheStatsAdmin(admin.ModelAdmin):
+    list_display = ('version', 'hit_count', 'miss_count', 'updated_at')
+
+
+@admin.register(TranslationMemoryEntry)
+class TranslationMemoryEntryAdmin(admin.ModelAdmin):
+    list_display = ('source_text', 'target_language', 'model', 'prompt_version', 'hit_count', 'created_at', 'last_hit_at')
+    list_filter = ('target_language', 'model', 'prompt_version')
+    search_fields = ('source_text', 'translated_text')
+
+
+@admin.register(BookOCRStats)
+class BookOCRStatsAdmin(admin.ModelAdmin):
+    list_display = ('book', 'pending_count', 'processing_count', 'completed_count', 'failed_count', 'avg_confidence', 'region_count', 'updated_at')
+    list_select_related = ('book',)
+
+
+@admin.register(PageSnapshot)
+class PageSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('page', 'compressed', 'etag', 'updated_at')
+    exclude = ('payload',)
+
+
+@admin.register(RegionTombstone)
+class RegionTombstoneAdmin(admin.ModelAdmin):
+    list_display = ('page', 'region_pk', 'revision')
+
+
+@admin.register(PageTiles)
+class PageTilesAdmin(admin.ModelAdmin):
+    list_display = ('page', 'status', 'version', 'width', 'height', 'max_level', 'tile_count', 'updated_at')
+    list_filter = ('status',)
+
+
+@admin.register(PageSprite)
+class PageSpriteAdmin(admin.ModelAdmin):
+    list_display = ('page', 'version', 'width', 'height', 'updated_at')
+    exclude = ('offsets',)
@@ -0,0 +1,102 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from books.services.layout_service import (
+    READING_ORDER_AUTO, READING_ORDER_HORIZONTAL, READING_ORDER_VERTICAL_RTL, extract_boxes, reading_order
+)
+
+
+def synthetic_page(mode, lines, per_line, rng):
+    """
+    生成合成页面：返回打乱顺序的 EasyOCR 风格边框和正确的阅读顺序
+
+    竖排页面每列 per_line 个字块，列从右到左；横排页面每行 per_line 个字块，行从上到下
+    """
+    glyph, spacing = 40, 24
+    bboxes = []
+    for line in range(lines):
+        offset = 0
+        for _ in range(per_line):
+            length = int(rng.integers(glyph, glyph * 4))
+            jitter = int(rng.normal(0, glyph * 0.08))
+            size = glyph + int(rng.normal(0, 2))
+            if mode == READING_ORDER_VERTICAL_RTL:
+                x0 = (lines - 1 - line) * (glyph + spacing) + jitter
+                y0 = offset
+                x1, y1 = x0 + size, y0 + length
+            else:
+                x0 = offset
+                y0 = line * (glyph + spacing) + jitter
+                x1, y1 = x0 + length, y0 + size
+            bboxes.append([[x0, y0], [x1, y0], [x1, y1], [x0, y1]])
+            offset += length + spacing // 2
+
+    truth = np.arange(len(bboxes))
+    shuffle = rng.permutation(len(bboxes))
+    return [bboxes[i] for i in shuffle], truth[shuffle]
+
+
+def legacy_order(bboxes):
+    """旧实现：逐个边框计算坐标，固定20像素Y容差分行，行内从左到右"""
+    regions = []
+    for i, bbox in enumerate(bboxes):
+        x_coords = [point[0] for point in bbox]
+        y_coords = [point[1] for point in bbox]
+        regions.append({'i': i, 'x': int(min(x_coords)), 'y': int(min(y_coords))})
+
+    lines, current_line, current_y = [], [], None
+    for region in sorted(regions, key=lambda r: r['y']):
+        if current_y is None or abs(region['y'] - current_y) <= 20:
+            current_line.append(region)
+            current_y = region['y'] if current_y is None else current_y
+        else:
+            lines.append(sorted(current_line, key=lambda r: r['x']))
+            current_line, current_y = [region], region['y']
+    if current_line:
+        lines.append(sorted(current_line, key=lambda r: r['x']))
+    return [region['i'] for line in lines for region in line]
+
+
+class Command(BaseCommand):
+    help = "阅读顺序排版引擎的微基准：合成页面上比较耗时和排序正确率"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--regions', type=int, default=10000, help="每页区域数")
+        parser.add_argument('--repeat', type=int, default=5, help="重复次数，取最快一次")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _measure(self, func, repeat):
+        best, result = None, None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        per_line = max(1, int(np.sqrt(options['regions'])))
+        lines = max(1, options['regions'] // per_line)
+
+        for page_mode in (READING_ORDER_VERTICAL_RTL, READING_ORDER_HORIZONTAL):
+            bboxes, truth = synthetic_page(page_mode, lines, per_line, rng)
+            expected = np.argsort(truth).tolist()
+            self.stdout.write(f"{page_mode} 页面: {len(bboxes)} 个区域")
+
+            elapsed, boxes = self._measure(lambda: extract_boxes(bboxes), options['repeat'])
+            self.stdout.write(f"  {'extract_boxes':<14} {elapsed * 1000:8.1f} ms")
+
+            for name, func in (
+                ('legacy', lambda: legacy_order(bboxes)),
+                (READING_ORDER_AUTO, lambda: reading_order(extract_boxes(bboxes), READING_ORDER_AUTO).tolist()),
+                (page_mode, lambda: reading_order(extract_boxes(bboxes), page_mode).tolist()),
+            ):
+                elapsed, order = self._measure(func, options['repeat'])
+                accuracy = float(np.mean(np.asarray(order) == np.asarray(expected)))
+                self.stdout.write(f"  {name:<14} {elapsed * 1000:8.1f} ms  顺序正确率 {accuracy:6.1%}")
+
+            elapsed, _ = self._measure(lambda: reading_order(boxes, page_mode), options['repeat'])
+            self.stdout.write(f"  {'reading_order':<14} {elapsed * 1000:8.1f} ms（不含边框转换）")
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import time
+from difflib import SequenceMatcher
+
+import cv2
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from books.services.layout_service import READING_ORDER_HORIZONTAL
+from books.services.ocr_service import OCRService, estimate_glyph_height, read_grayscale
+
+WORDS = (
+    'ancient', 'book', 'scroll', 'river', 'mountain', 'dynasty', 'emperor', 'poem', 'autumn', 'moon',
+    'temple', 'scholar', 'letter', 'garden', 'spring', 'winter', 'bamboo', 'silk', 'ink', 'brush'
+)
+
+
+def synthetic_page(glyph_height, rng, lines=20, words_per_line=6):
+    """
+    生成合成页面：按指定字形高度（大写字母高度）绘制随机单词，模拟同一页面在不同DPI下的扫描
+
+    Returns:
+        tuple: (灰度图片, 按阅读顺序排列的正确文本)
+    """
+    font, thickness = cv2.FONT_HERSHEY_SIMPLEX, max(1, glyph_height // 12)
+    font_scale = glyph_height / cv2.getTextSize('H', font, 1.0, thickness)[0][1]
+    line_height = int(glyph_height * 2.2)
+    margin = glyph_height * 2
+
+    text_lines = [' '.join(rng.choice(WORDS, words_per_line)) for _ in range(lines)]
+    line_width = max(cv2.getTextSize(line, font, font_scale, thickness)[0][0] for line in text_lines)
+    page = np.full((margin * 2 + line_height * lines, margin * 2 + line_width), 235, np.uint8)
+    for index, line in enumerate(text_lines):
+        baseline = margin + line_height * index + glyph_height
+        cv2.putText(page, line, (margin, baseline), font, font_scale, 30, thickness, cv2.LINE_AA)
+    return page, ' '.join(text_lines)
+
+
+def normalize_text(text):
+    return ''.join(text.lower().split())
+
+
+def text_accuracy(recognized, expected):
+    """字符级相似度（忽略空白和大小写）"""
+    return SequenceMatcher(None, normalize_text(recognized), normalize_text(expected), autojunk=False).ratio()
+
+
+class Command(BaseCommand):
+    help = "分辨率归一化基准：比较不同目标字形高度下的识别耗时和准确率"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--image', action='append', default=[],
+                            help="真实扫描件路径（可重复），准确率以原尺寸识别结果为基准；不指定时使用合成页面")
+        parser.add_argument('--glyph-heights', type=int, nargs='+', default=[24, 48, 96, 160],
+                            help="合成页面的字形高度（像素），模拟不同DPI的扫描")
+        parser.add_argument('--targets', type=int, nargs='+', default=[0, 48, 32, 24],
+                            help="比较的目标字形高度，0 表示按原尺寸识别")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as workdir:
+            pages = self._pages(options, workdir)
+            self.stdout.write(f"{len(pages)} 个页面, 识别语言: {settings.OCR_LANGUAGES}")
+
+            for name, path, expected, true_glyph in pages:
+                gray, _ = read_grayscale(path)
+                estimated = estimate_glyph_height(gray)
+                self.stdout.write(
+                    f"{name}: {gray.shape[1]}x{gray.shape[0]}, 估计字形高度 "
+                    f"{f'{estimated:.1f}' if estimated is not None else '-'}"
+                    + (f"（绘制高度 {true_glyph}）" if true_glyph else '')
+                )
+                del gray
+
+                baseline_text = expected
+                for target in options['targets']:
+                    service = OCRService(
+                        settings.OCR_LANGUAGES,
+                        reading_order_mode=READING_ORDER_HORIZONTAL,
+                        target_glyph_height=target or None
+                    )
+                    stats = {}
+                    started = time.perf_counter()
+                    regions = service.process_image(path, stats=stats)
+                    elapsed = time.perf_counter() - started
+
+                    text = ' '.join(region['text'] for region in regions)
+                    if baseline_text is None:
+                        # 真实扫描件没有标注文本，以原尺寸识别结果为基准
+                        baseline_text = text
+                    width, height = stats['working_size']
+                    self.stdout.write(
+                        f"  目标 {target or '原尺寸':>6}  工作尺寸 {width:>5}x{height:<5}  "
+                        f"耗时 {elapsed:7.2f}s  区域 {len(regions):4d}  准确率 {text_accuracy(text, baseline_text):6.1%}"
+                    )
+
+    def _pages(self, options, workdir):
+        """返回 (名称, 路径, 正确文本, 绘制字形高度) 列表"""
+        if options['image']:
+            for path in options['image']:
+                if not os.path.exists(path):
+                    raise CommandError(f"图片不存在: {path}")
+            return [(os.path.basename(path), path, None, None) for path in options['image']]
+
+        rng = np.random.default_rng(options['seed'])
+        pages = []
+        for glyph_height in options['glyph_heights']:
+            page, expected = synthetic_page(glyph_height, rng)
+            path = os.path.join(workdir, f"synthetic_{glyph_height}.png")
+            cv2.imwrite(path, page)
+            pages.append((f"合成页面 字形高度 {glyph_height}", path, expected, glyph_height))
+        return pages
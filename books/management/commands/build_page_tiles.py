@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from books.models import BookPage
+from books.tasks import generate_page_tiles
+
+
+class Command(BaseCommand):
+    help = "为页面生成瓦片金字塔（默认发送到Celery，--sync 时在当前进程生成）"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--book', type=int, action='append', help="只处理指定书籍，可重复指定")
+        parser.add_argument('--missing', action='store_true', help="只处理尚未成功生成瓦片的页面")
+        parser.add_argument('--force', action='store_true', help="已有相同版本的瓦片时也重新生成")
+        parser.add_argument('--sync', action='store_true', help="在当前进程中同步生成")
+
+    def handle(self, *args, **options):
+        pages = BookPage.objects.order_by('id')
+        if options['book']:
+            pages = pages.filter(book_id__in=options['book'])
+        if options['missing']:
+            pages = pages.exclude(tiles__status='completed')
+
+        count = 0
+        for page_id in pages.values_list('id', flat=True).iterator():
+            if options['sync']:
+                generate_page_tiles(page_id, force=options['force'])
+            else:
+                generate_page_tiles.delay(page_id, force=options['force'])
+            count += 1
+
+        action = "生成" if options['sync'] else "发送"
+        self.stdout.write(self.style.SUCCESS(f"{action}了 {count} 个页面的瓦片任务"))
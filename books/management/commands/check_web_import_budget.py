@@ -0,0 +1,61 @@
+import json
+import os
+import subprocess
+import sys
+from django.core.management.base import BaseCommand, CommandError
+
+# Web进程不应加载的重量级模块（OCR/深度学习依赖只在worker中按需导入）
+FORBIDDEN_MODULES = ('torch', 'easyocr', 'cv2', 'openai')
+
+# 在干净的子进程中测量导入 books.views 的耗时和内存
+MEASURE_SCRIPT = """
+import json, os, resource, sys, time
+started = time.perf_counter()
+import django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+django.setup()
+import books.views, books.urls
+elapsed = time.perf_counter() - started
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({
+    'seconds': elapsed,
+    'peak_rss_mb': peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024,
+    'loaded': [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "检查Web进程导入 books.views 的耗时和内存是否在预算内，且未加载OCR/深度学习依赖"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-seconds', type=float, default=2.0, help="导入耗时上限（秒）")
+        parser.add_argument('--max-rss-mb', type=float, default=150.0, help="峰值常驻内存上限（MB）")
+
+    def handle(self, *args, **options):
+        completed = subprocess.run(
+            [sys.executable, '-c', MEASURE_SCRIPT % (FORBIDDEN_MODULES,)],
+            capture_output=True,
+            text=True,
+            env=os.environ.copy()
+        )
+        if completed.returncode != 0:
+            raise CommandError(f"导入 books.views 失败:\n{completed.stderr}")
+
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        self.stdout.write(
+            f"导入耗时: {result['seconds']:.3f}s, 峰值常驻内存: {result['peak_rss_mb']:.1f}MB, "
+            f"重量级模块: {result['loaded'] or '无'}"
+        )
+
+        errors = []
+        if result['loaded']:
+            errors.append(f"Web进程加载了重量级模块: {', '.join(result['loaded'])}")
+        if result['seconds'] > options['max_seconds']:
+            errors.append(f"导入耗时 {result['seconds']:.3f}s 超过预算 {options['max_seconds']}s")
+        if result['peak_rss_mb'] > options['max_rss_mb']:
+            errors.append(f"峰值常驻内存 {result['peak_rss_mb']:.1f}MB 超过预算 {options['max_rss_mb']}MB")
+        if errors:
+            raise CommandError('; '.join(errors))
+
+        self.stdout.write(self.style.SUCCESS("Web导入预算检查通过"))
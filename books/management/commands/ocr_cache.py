@@ -0,0 +1,94 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from books.models import BookPage, OCRResultCache
+from books.services.ocr_cache import OCRCacheService
+
+
+class Command(BaseCommand):
+    help = (
+        "OCR结果缓存管理：stats 查看命中统计，warm 用已完成页面的识别结果预热缓存，evict 清理缓存。"
+        "warm 只使用以当前识别版本完成识别的页面，写入的是页面现有的文本区域，"
+        "包括识别后对区域边框的调整和对单个区域的重新识别（校对文本不会写入）"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['stats', 'warm', 'evict'])
+        parser.add_argument('--book', type=int, help="warm: 只预热指定书籍的页面")
+        parser.add_argument('--all-versions', action='store_true', help="stats: 统计全部识别版本，默认只统计当前版本")
+        parser.add_argument('--older-than', type=int, metavar='DAYS', help="evict: 只清理超过指定天数未命中的条目")
+        parser.add_argument('--unused', action='store_true', help="evict: 只清理从未命中的条目")
+        parser.add_argument('--stale-version', action='store_true', help="evict: 只清理与当前识别版本不一致的条目")
+
+    def handle(self, *args, **options):
+        ocr_cache = OCRCacheService.from_settings()
+        action = options['action']
+        if action == 'stats':
+            self._stats(None if options['all_versions'] else ocr_cache.version)
+        elif action == 'warm':
+            self._warm(ocr_cache, options['book'])
+        else:
+            self._evict(ocr_cache, options)
+
+    def _stats(self, version):
+        stats = OCRCacheService.stats(version)
+        self.stdout.write(
+            f"条目: {stats['entries']}, 命中: {stats['hits']}, 未命中: {stats['misses']}, "
+            f"命中率: {stats['hit_rate']:.1%}"
+        )
+
+    def _warm(self, ocr_cache, book_id):
+        pages = BookPage.objects.filter(ocr_status='completed')
+        if book_id is not None:
+            pages = pages.filter(book_id=book_id)
+        # 以其他识别配置得到的区域不能写入当前版本的缓存
+        skipped = pages.exclude(ocr_version=ocr_cache.version).count()
+        pages = pages.filter(ocr_version=ocr_cache.version)
+
+        warmed = 0
+        for page in pages.iterator(chunk_size=200):
+            try:
+                content_hash = ocr_cache.hash_page(page)
+            except OSError as e:
+                self.stderr.write(f"跳过页面 {page.id}: {e}")
+                continue
+            if OCRResultCache.objects.filter(fingerprint=ocr_cache.fingerprint(content_hash)).exists():
+                continue
+
+            text_regions = [
+                {
+                    'region_id': region.region_id,
+                    'x': region.x,
+                    'y': region.y,
+                    'width': region.width,
+                    'height': region.height,
+                    'text': region.original_text,
+                    'confidence': region.confidence,
+                    'order_index': region.order_index
+                }
+                for region in page.text_regions.all()
+            ]
+            ocr_cache.put(content_hash, text_regions)
+            if not page.image_hash:
+                page.image_hash = content_hash
+                page.save(update_fields=['image_hash'])
+            warmed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"预热了 {warmed} 个缓存条目，跳过 {skipped} 个非当前识别版本的页面"
+        ))
+
+    def _evict(self, ocr_cache, options):
+        entries = OCRResultCache.objects.all()
+        if options['unused']:
+            entries = entries.filter(hit_count=0)
+        if options['stale_version']:
+            entries = entries.exclude(version=ocr_cache.version)
+        if options['older_than'] is not None:
+            if options['older_than'] < 0:
+                raise CommandError("--older-than 必须为非负数")
+            cutoff = timezone.now() - timedelta(days=options['older_than'])
+            entries = entries.filter(created_at__lt=cutoff).exclude(last_hit_at__gte=cutoff)
+
+        deleted_count = entries.delete()[0]
+        self.stdout.write(self.style.SUCCESS(f"清理了 {deleted_count} 个缓存条目"))
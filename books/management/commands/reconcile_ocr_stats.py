@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from books.models import Book, BookOCRStats
+
+
+class Command(BaseCommand):
+    help = "从页面和文本区域重新计算书籍OCR统计计数"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--book', type=int, action='append', help="只重建指定书籍，可重复指定")
+
+    def handle(self, *args, **options):
+        book_ids = options['book'] or Book.objects.values_list('id', flat=True).iterator()
+
+        rebuilt = 0
+        for book_id in book_ids:
+            with transaction.atomic():
+                BookOCRStats.rebuild(book_id)
+            rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f"重建了 {rebuilt} 本书籍的OCR统计"))
@@ -0,0 +1,34 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+from books.models import OCRTask
+from books.tasks import dispatch_ocr_batches
+
+
+class Command(BaseCommand):
+    help = (
+        "重新发送待处理的OCR任务。默认只发送从未成功发送的任务（如上传后消息队列不可用），"
+        "仍在队列中等待的任务不会重复发送；--older-than 额外重发发送后超过指定分钟数仍未开始的任务"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--book', type=int, action='append', help="只处理指定书籍，可重复指定")
+        parser.add_argument('--older-than', type=int, metavar='MINUTES',
+                            help="同时重发发送后超过指定分钟数仍未开始的任务（消息丢失时使用）")
+
+    def handle(self, *args, **options):
+        unsent = Q(dispatched_at__isnull=True)
+        if options['older_than'] is not None:
+            if options['older_than'] <= 0:
+                raise CommandError("--older-than 必须为正数")
+            unsent |= Q(dispatched_at__lt=timezone.now() - timedelta(minutes=options['older_than']))
+
+        tasks = OCRTask.objects.filter(unsent, status='pending').order_by('id')
+        if options['book']:
+            tasks = tasks.filter(page__book_id__in=options['book'])
+
+        task_ids = list(tasks.values_list('id', flat=True))
+        batch_count = dispatch_ocr_batches(task_ids)
+
+        self.stdout.write(self.style.SUCCESS(f"发送了 {len(task_ids)} 个OCR任务（{batch_count} 批）"))
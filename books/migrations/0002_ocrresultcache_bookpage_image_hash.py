@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OCRResultCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=200, unique=True, verbose_name='指纹')),
+                ('content_hash', models.CharField(db_index=True, max_length=64, verbose_name='图片内容哈希')),
+                ('version', models.CharField(max_length=120, verbose_name='识别版本')),
+                ('regions', models.JSONField(default=list, verbose_name='文本区域')),
+                ('region_count', models.IntegerField(default=0, verbose_name='文本区域数')),
+                ('avg_confidence', models.FloatField(default=0, verbose_name='平均置信度')),
+                ('hit_count', models.IntegerField(default=0, verbose_name='命中次数')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True, verbose_name='最近命中时间')),
+            ],
+            options={
+                'verbose_name': 'OCR结果缓存',
+                'verbose_name_plural': 'OCR结果缓存',
+            },
+        ),
+        migrations.AddField(
+            model_name='bookpage',
+            name='image_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='图片内容哈希'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0002_ocrresultcache_bookpage_image_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranslationMemoryEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True, verbose_name='缓存键')),
+                ('source_text', models.TextField(verbose_name='规范化原文')),
+                ('target_language', models.CharField(max_length=10, verbose_name='目标语言')),
+                ('model', models.CharField(max_length=100, verbose_name='翻译模型')),
+                ('prompt_version', models.IntegerField(verbose_name='提示词版本')),
+                ('translated_text', models.TextField(verbose_name='翻译文本')),
+                ('hit_count', models.IntegerField(default=0, verbose_name='命中次数')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True, verbose_name='最近命中时间')),
+            ],
+            options={
+                'verbose_name': '翻译记忆',
+                'verbose_name_plural': '翻译记忆',
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0003_translationmemoryentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookOCRStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pending_count', models.IntegerField(default=0, verbose_name='待处理页数')),
+                ('processing_count', models.IntegerField(default=0, verbose_name='处理中页数')),
+                ('completed_count', models.IntegerField(default=0, verbose_name='已完成页数')),
+                ('failed_count', models.IntegerField(default=0, verbose_name='失败页数')),
+                ('confidence_sum', models.FloatField(default=0, verbose_name='已完成页面置信度之和')),
+                ('region_count', models.IntegerField(default=0, verbose_name='文本区域数')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('book', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ocr_stats', to='books.book', verbose_name='书籍')),
+            ],
+            options={
+                'verbose_name': '书籍OCR统计',
+                'verbose_name_plural': '书籍OCR统计',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0004_bookocrstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payload', models.BinaryField(verbose_name='序列化数据')),
+                ('compressed', models.BooleanField(default=False, verbose_name='是否gzip压缩')),
+                ('etag', models.CharField(max_length=64, verbose_name='ETag')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot', to='books.bookpage', verbose_name='页面')),
+            ],
+            options={
+                'verbose_name': '页面快照',
+                'verbose_name_plural': '页面快照',
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0005_pagesnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegionTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('region_pk', models.BigIntegerField(verbose_name='文本区域ID')),
+                ('revision', models.PositiveBigIntegerField(verbose_name='删除时版本')),
+            ],
+            options={
+                'verbose_name': '已删除文本区域',
+                'verbose_name_plural': '已删除文本区域',
+            },
+        ),
+        migrations.AddField(
+            model_name='bookpage',
+            name='reset_revision',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='重置版本'),
+        ),
+        migrations.AddField(
+            model_name='bookpage',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='区域版本'),
+        ),
+        migrations.AddField(
+            model_name='textregion',
+            name='revision',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='版本'),
+        ),
+        migrations.AddIndex(
+            model_name='textregion',
+            index=models.Index(fields=['page', 'revision'], name='textregion_page_revision_idx'),
+        ),
+        migrations.AddField(
+            model_name='regiontombstone',
+            name='page',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='region_tombstones', to='books.bookpage', verbose_name='页面'),
+        ),
+        migrations.AddIndex(
+            model_name='regiontombstone',
+            index=models.Index(fields=['page', 'revision'], name='tombstone_page_revision_idx'),
+        ),
+    ]
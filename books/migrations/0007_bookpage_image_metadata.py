@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0006_page_revision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookpage',
+            name='image_format',
+            field=models.CharField(blank=True, max_length=10, verbose_name='图片格式'),
+        ),
+        migrations.AddField(
+            model_name='bookpage',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='图片高度'),
+        ),
+        migrations.AddField(
+            model_name='bookpage',
+            name='image_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True, verbose_name='文件大小'),
+        ),
+        migrations.AddField(
+            model_name='bookpage',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='图片宽度'),
+        ),
+        migrations.AddField(
+            model_name='bookpage',
+            name='preview',
+            field=models.ImageField(blank=True, upload_to='book_pages/previews/', verbose_name='预览图'),
+        ),
+    ]
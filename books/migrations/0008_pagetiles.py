@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0007_bookpage_image_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageTiles',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(blank=True, max_length=32, verbose_name='瓦片版本')),
+                ('status', models.CharField(choices=[('processing', '生成中'), ('completed', '已完成'), ('failed', '生成失败')], default='processing', max_length=20, verbose_name='状态')),
+                ('width', models.PositiveIntegerField(default=0, verbose_name='原图宽度')),
+                ('height', models.PositiveIntegerField(default=0, verbose_name='原图高度')),
+                ('tile_size', models.PositiveIntegerField(default=256, verbose_name='瓦片尺寸')),
+                ('overlap', models.PositiveIntegerField(default=1, verbose_name='瓦片重叠')),
+                ('format', models.CharField(default='jpg', max_length=10, verbose_name='瓦片格式')),
+                ('max_level', models.PositiveIntegerField(default=0, verbose_name='最高层级')),
+                ('tile_count', models.PositiveIntegerField(default=0, verbose_name='瓦片数量')),
+                ('error_message', models.TextField(blank=True, verbose_name='错误信息')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tiles', to='books.bookpage', verbose_name='页面')),
+            ],
+            options={
+                'verbose_name': '页面瓦片',
+                'verbose_name_plural': '页面瓦片',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0008_pagetiles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageSprite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=32, verbose_name='版本')),
+                ('image', models.ImageField(upload_to='book_pages/sprites/', verbose_name='雪碧图')),
+                ('width', models.PositiveIntegerField(verbose_name='宽度')),
+                ('height', models.PositiveIntegerField(verbose_name='高度')),
+                ('offsets', models.JSONField(default=dict, verbose_name='区域偏移')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sprite', to='books.bookpage', verbose_name='页面')),
+            ],
+            options={
+                'verbose_name': '区域雪碧图',
+                'verbose_name_plural': '区域雪碧图',
+            },
+        ),
+    ]
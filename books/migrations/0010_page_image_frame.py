@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0009_pagesprite'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookpage',
+            name='image_frame',
+            field=models.PositiveIntegerField(default=0, verbose_name='图片帧'),
+        ),
+    ]
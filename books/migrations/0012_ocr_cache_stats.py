@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0011_pagesnapshot_stale_since'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OCRCacheStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=120, unique=True, verbose_name='识别版本')),
+                ('hit_count', models.PositiveBigIntegerField(default=0, verbose_name='命中次数')),
+                ('miss_count', models.PositiveBigIntegerField(default=0, verbose_name='未命中次数')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': 'OCR缓存统计',
+                'verbose_name_plural': 'OCR缓存统计',
+            },
+        ),
+        migrations.AddField(
+            model_name='bookpage',
+            name='ocr_version',
+            field=models.CharField(blank=True, max_length=120, verbose_name='识别版本'),
+        ),
+    ]
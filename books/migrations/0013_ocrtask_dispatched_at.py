@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0012_ocr_cache_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ocrtask',
+            name='dispatched_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='发送时间'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 # models.py
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 import json
 
 class Book(models.Model):
@@ -37,6 +38,20 @@ class BookPage(models.Model):
         verbose_name="OCR状态"
     )
     ocr_confidence = models.FloatField(null=True, blank=True, verbose_name="OCR置信度")
+    # 最近一次整页识别使用的识别版本（与OCR结果缓存的版本一致）
+    ocr_version = models.CharField(max_length=120, blank=True, verbose_name="识别版本")
+    image_hash = models.CharField(max_length=64, blank=True, db_index=True, verbose_name="图片内容哈希")
+    image_format = models.CharField(max_length=10, blank=True, verbose_name="图片格式")
+    image_width = models.PositiveIntegerField(null=True, blank=True, verbose_name="图片宽度")
+    image_height = models.PositiveIntegerField(null=True, blank=True, verbose_name="图片高度")
+    image_size = models.PositiveBigIntegerField(null=True, blank=True, verbose_name="文件大小")
+    # 多页TIFF中本页所在的帧，同一文件的各帧作为相邻的书页
+    image_frame = models.PositiveIntegerField(default=0, verbose_name="图片帧")
+    preview = models.ImageField(upload_to='book_pages/previews/', blank=True, verbose_name="预览图")
+    # 文本区域版本号：区域、校对或翻译每次变化都递增，供编辑器增量同步
+    revision = models.PositiveBigIntegerField(default=0, verbose_name="区域版本")
+    # 最近一次整页重新识别时的版本，早于此版本的客户端需要全量同步
+    reset_revision = models.PositiveBigIntegerField(default=0, verbose_name="重置版本")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
     
     class Meta:
@@ -48,6 +63,118 @@ class BookPage(models.Model):
     def __str__(self):
         return f"{self.book.title} - 第{self.page_number}页"
 
+class BookOCRStats(models.Model):
+    """书籍OCR进度统计 - 与页面状态变化在同一事务中更新的冗余计数"""
+    book = models.OneToOneField(Book, on_delete=models.CASCADE, related_name='ocr_stats', verbose_name="书籍")
+    pending_count = models.IntegerField(default=0, verbose_name="待处理页数")
+    processing_count = models.IntegerField(default=0, verbose_name="处理中页数")
+    completed_count = models.IntegerField(default=0, verbose_name="已完成页数")
+    failed_count = models.IntegerField(default=0, verbose_name="失败页数")
+    confidence_sum = models.FloatField(default=0, verbose_name="已完成页面置信度之和")
+    region_count = models.IntegerField(default=0, verbose_name="文本区域数")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+    
+    class Meta:
+        verbose_name = "书籍OCR统计"
+        verbose_name_plural = "书籍OCR统计"
+    
+    def __str__(self):
+        return f"{self.book} - OCR统计"
+    
+    @property
+    def total_pages(self):
+        return self.pending_count + self.processing_count + self.completed_count + self.failed_count
+    
+    @property
+    def avg_confidence(self):
+        return self.confidence_sum / self.completed_count if self.completed_count > 0 else None
+    
+    @classmethod
+    def apply_delta(cls, book_id, **deltas):
+        """
+        以原子的增量更新计数，应在页面状态变化的同一事务中调用
+        
+        Args:
+            book_id: 书籍ID
+            **deltas: 字段名到增量的映射，如 pending_count=-1, completed_count=1
+        """
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        updated = cls.objects.filter(book_id=book_id).update(
+            **{field: models.F(field) + delta for field, delta in deltas.items()},
+            updated_at=timezone.now()
+        )
+        if not updated:
+            # 统计记录尚不存在时从当前数据重建（已包含本次变化）
+            cls.rebuild(book_id)
+    
+    @staticmethod
+    def page_deltas(status, confidence, region_count=0, sign=1):
+        """
+        单个页面对书籍统计的贡献，用于页面增删时更新计数
+        
+        Args:
+            status: 页面OCR状态
+            confidence: 页面OCR置信度
+            region_count: 页面的文本区域数
+            sign: 1 表示加入该页面，-1 表示移除
+            
+        Returns:
+            Dict: 可传给 apply_delta 的增量
+        """
+        deltas = {f'{status}_count': sign, 'region_count': sign * region_count}
+        if status == 'completed':
+            deltas['confidence_sum'] = sign * (confidence or 0)
+        return deltas
+    
+    @classmethod
+    def rebuild(cls, book_id):
+        """
+        从页面和文本区域重新计算书籍的统计
+        
+        Returns:
+            BookOCRStats: 重建后的统计
+        """
+        counts = dict(
+            BookPage.objects.filter(book_id=book_id)
+            .values_list('ocr_status')
+            .annotate(count=models.Count('id'))
+            .order_by()
+        )
+        confidence_sum = BookPage.objects.filter(book_id=book_id, ocr_status='completed').aggregate(
+            total=models.Sum('ocr_confidence')
+        )['total'] or 0
+        stats, _ = cls.objects.update_or_create(
+            book_id=book_id,
+            defaults={
+                'pending_count': counts.get('pending', 0),
+                'processing_count': counts.get('processing', 0),
+                'completed_count': counts.get('completed', 0),
+                'failed_count': counts.get('failed', 0),
+                'confidence_sum': confidence_sum,
+                'region_count': TextRegion.objects.filter(page__book_id=book_id).count()
+            }
+        )
+        return stats
+
+class PageSnapshot(models.Model):
+    """页面快照 - 预先序列化的页面文本区域数据，编辑器接口直接返回，无需逐行构建"""
+    page = models.OneToOneField(BookPage, on_delete=models.CASCADE, related_name='snapshot', verbose_name="页面")
+    payload = models.BinaryField(verbose_name="序列化数据")
+    compressed = models.BooleanField(default=False, verbose_name="是否gzip压缩")
+    etag = models.CharField(max_length=64, verbose_name="ETag")
+    # 数据变化后标记过期，由后台任务重建；为空表示快照与数据一致
+    stale_since = models.DateTimeField(null=True, blank=True, verbose_name="过期时间")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+    
+    class Meta:
+        verbose_name = "页面快照"
+        verbose_name_plural = "页面快照"
+    
+    def __str__(self):
+        return f"{self.page_id} - 快照"
+
 class TextRegion(models.Model):
     """文本区域模型 - 存储OCR识别出的文本区域信息"""
     page = models.ForeignKey(BookPage, on_delete=models.CASCADE, related_name='text_regions', verbose_name="页面")
@@ -66,16 +193,38 @@ class TextRegion(models.Model):
     # 用于排序显示
     order_index = models.IntegerField(verbose_name="显示顺序")
     
+    # 区域（含校对、翻译）最后一次变化时所属页面的版本号
+    revision = models.PositiveBigIntegerField(default=0, verbose_name="版本")
+    
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
     
     class Meta:
         verbose_name = "文本区域"
         verbose_name_plural = "文本区域"
         ordering = ['order_index']
+        indexes = [
+            models.Index(fields=['page', 'revision'], name='textregion_page_revision_idx'),
+        ]
     
     def __str__(self):
         return f"{self.page} - 区域{self.region_id}"
 
+class RegionTombstone(models.Model):
+    """已删除文本区域的记录，供增量同步通知客户端移除区域"""
+    page = models.ForeignKey(BookPage, on_delete=models.CASCADE, related_name='region_tombstones', verbose_name="页面")
+    region_pk = models.BigIntegerField(verbose_name="文本区域ID")
+    revision = models.PositiveBigIntegerField(verbose_name="删除时版本")
+    
+    class Meta:
+        verbose_name = "已删除文本区域"
+        verbose_name_plural = "已删除文本区域"
+        indexes = [
+            models.Index(fields=['page', 'revision'], name='tombstone_page_revision_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.page_id} - 区域{self.region_pk} @{self.revision}"
+
 class TextCorrection(models.Model):
     """文本校对模型"""
     text_region = models.OneToOneField(TextRegion, on_delete=models.CASCADE, related_name='correction', verbose_name="文本区域")
@@ -142,6 +291,8 @@ class OCRTask(models.Model):
         verbose_name="任务状态"
     )
     error_message = models.TextField(blank=True, verbose_name="错误信息")
+    # 最近一次成功发送到消息队列的时间，为空说明任务从未发送
+    dispatched_at = models.DateTimeField(null=True, blank=True, verbose_name="发送时间")
     started_at = models.DateTimeField(null=True, blank=True, verbose_name="开始时间")
     completed_at = models.DateTimeField(null=True, blank=True, verbose_name="完成时间")
     
@@ -150,4 +301,125 @@ class OCRTask(models.Model):
         verbose_name_plural = "OCR任务"
     
     def __str__(self):
-        return f"{self.page} - OCR任务"
\ No newline at end of file
+        return f"{self.page} - OCR任务"
+
+class PageTiles(models.Model):
+    """页面图片的多分辨率瓦片金字塔（DZI布局），编辑器只加载当前缩放级别可见的瓦片"""
+    page = models.OneToOneField(BookPage, on_delete=models.CASCADE, related_name='tiles', verbose_name="页面")
+    # 由图片内容和切片参数决定，写入瓦片URL；图片或参数变化后生成新目录，旧瓦片可被长期缓存
+    version = models.CharField(max_length=32, blank=True, verbose_name="瓦片版本")
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ('processing', '生成中'),
+            ('completed', '已完成'),
+            ('failed', '生成失败')
+        ],
+        default='processing',
+        verbose_name="状态"
+    )
+    width = models.PositiveIntegerField(default=0, verbose_name="原图宽度")
+    height = models.PositiveIntegerField(default=0, verbose_name="原图高度")
+    tile_size = models.PositiveIntegerField(default=256, verbose_name="瓦片尺寸")
+    overlap = models.PositiveIntegerField(default=1, verbose_name="瓦片重叠")
+    format = models.CharField(max_length=10, default='jpg', verbose_name="瓦片格式")
+    max_level = models.PositiveIntegerField(default=0, verbose_name="最高层级")
+    tile_count = models.PositiveIntegerField(default=0, verbose_name="瓦片数量")
+    error_message = models.TextField(blank=True, verbose_name="错误信息")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+    
+    class Meta:
+        verbose_name = "页面瓦片"
+        verbose_name_plural = "页面瓦片"
+    
+    def __str__(self):
+        return f"{self.page_id} - 瓦片 {self.version}"
+
+class PageSprite(models.Model):
+    """页面所有文本区域裁剪图拼成的雪碧图，供比对视图一次加载全部区域原图"""
+    page = models.OneToOneField(BookPage, on_delete=models.CASCADE, related_name='sprite', verbose_name="页面")
+    # 由图片内容、区域坐标和生成参数决定，未变化时不重新生成
+    version = models.CharField(max_length=32, verbose_name="版本")
+    image = models.ImageField(upload_to='book_pages/sprites/', verbose_name="雪碧图")
+    width = models.PositiveIntegerField(verbose_name="宽度")
+    height = models.PositiveIntegerField(verbose_name="高度")
+    # 文本区域ID -> [x, y, 宽, 高]，区域裁剪图在雪碧图中的位置
+    offsets = models.JSONField(default=dict, verbose_name="区域偏移")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+    
+    class Meta:
+        verbose_name = "区域雪碧图"
+        verbose_name_plural = "区域雪碧图"
+    
+    def __str__(self):
+        return f"{self.page_id} - 雪碧图 {self.version}"
+
+class OCRResultCache(models.Model):
+    """OCR结果缓存 - 按图片内容哈希和识别版本缓存识别结果，相同图片不再重复识别"""
+    fingerprint = models.CharField(max_length=200, unique=True, verbose_name="指纹")
+    content_hash = models.CharField(max_length=64, db_index=True, verbose_name="图片内容哈希")
+    version = models.CharField(max_length=120, verbose_name="识别版本")
+    regions = models.JSONField(default=list, verbose_name="文本区域")
+    region_count = models.IntegerField(default=0, verbose_name="文本区域数")
+    avg_confidence = models.FloatField(default=0, verbose_name="平均置信度")
+    hit_count = models.IntegerField(default=0, verbose_name="命中次数")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+    last_hit_at = models.DateTimeField(null=True, blank=True, verbose_name="最近命中时间")
+    
+    class Meta:
+        verbose_name = "OCR结果缓存"
+        verbose_name_plural = "OCR结果缓存"
+    
+    def __str__(self):
+        return f"{self.content_hash[:12]} - {self.version}"
+
+class OCRCacheStats(models.Model):
+    """OCR结果缓存的命中统计 - 按识别版本累计每次查询的命中和未命中，清理缓存条目不影响统计"""
+    version = models.CharField(max_length=120, unique=True, verbose_name="识别版本")
+    hit_count = models.PositiveBigIntegerField(default=0, verbose_name="命中次数")
+    miss_count = models.PositiveBigIntegerField(default=0, verbose_name="未命中次数")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="更新时间")
+    
+    class Meta:
+        verbose_name = "OCR缓存统计"
+        verbose_name_plural = "OCR缓存统计"
+    
+    def __str__(self):
+        return f"{self.version} - 缓存统计"
+    
+    @classmethod
+    def record(cls, version, hits=0, misses=0):
+        """
+        以原子的增量累加命中和未命中次数
+        
+        Args:
+            version: 识别版本
+            hits: 命中次数增量
+            misses: 未命中次数增量
+        """
+        deltas = {field: delta for field, delta in (('hit_count', hits), ('miss_count', misses)) if delta}
+        if not deltas:
+            return
+        increments = {field: models.F(field) + delta for field, delta in deltas.items()}
+        if not cls.objects.filter(version=version).update(**increments, updated_at=timezone.now()):
+            cls.objects.get_or_create(version=version)
+            cls.objects.filter(version=version).update(**increments, updated_at=timezone.now())
+
+class TranslationMemoryEntry(models.Model):
+    """翻译记忆 - 按规范化原文、目标语言、模型和提示词版本缓存机器翻译结果"""
+    key = models.CharField(max_length=64, unique=True, verbose_name="缓存键")
+    source_text = models.TextField(verbose_name="规范化原文")
+    target_language = models.CharField(max_length=10, verbose_name="目标语言")
+    model = models.CharField(max_length=100, verbose_name="翻译模型")
+    prompt_version = models.IntegerField(verbose_name="提示词版本")
+    translated_text = models.TextField(verbose_name="翻译文本")
+    hit_count = models.IntegerField(default=0, verbose_name="命中次数")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
+    last_hit_at = models.DateTimeField(null=True, blank=True, verbose_name="最近命中时间")
+    
+    class Meta:
+        verbose_name = "翻译记忆"
+        verbose_name_plural = "翻译记忆"
+    
+    def __str__(self):
+        return f"{self.source_text[:20]} -> {self.target_language}"
@@ -0,0 +1,112 @@
+# services/layout_service.py
+import numpy as np
+from itertools import chain
+from typing import Any, Sequence
+
+# 阅读顺序模式
+READING_ORDER_HORIZONTAL = 'horizontal'        # 横排：从上到下逐行，行内从左到右
+READING_ORDER_VERTICAL_RTL = 'vertical_rtl'    # 竖排：从右到左逐列，列内从上到下（古籍常见版式）
+READING_ORDER_AUTO = 'auto'                    # 按区域的主要形状自动判断
+READING_ORDERS = (READING_ORDER_AUTO, READING_ORDER_HORIZONTAL, READING_ORDER_VERTICAL_RTL)
+
+# 相邻区域中心距离超过中位字形尺寸的该比例时，视为新的一行（列）
+LINE_GAP_RATIO = 0.5
+# 自动模式下，区域高宽比的中位数超过该值时判定为竖排
+VERTICAL_ASPECT_RATIO = 1.5
+
+
+def extract_boxes(bboxes: Sequence[Any]) -> np.ndarray:
+    """
+    一次性从全部多边形边框计算外接矩形
+
+    Args:
+        bboxes: EasyOCR返回的边框列表，每个边框为若干 [x, y] 顶点
+
+    Returns:
+        np.ndarray: (n, 4) 的 [x0, y0, x1, y1]
+    """
+    if len(bboxes) == 0:
+        return np.zeros((0, 4), dtype=np.float64)
+    try:
+        # EasyOCR的边框均为4个顶点，展平后一次性转换比逐层构造嵌套数组快
+        points = np.fromiter(
+            chain.from_iterable(chain.from_iterable(bboxes)), dtype=np.float64, count=len(bboxes) * 8
+        ).reshape(-1, 4, 2)
+    except ValueError:
+        # 顶点数不一致时逐个计算
+        return np.array([
+            np.concatenate([np.min(bbox, axis=0), np.max(bbox, axis=0)])
+            for bbox in (np.asarray(bbox, dtype=np.float64) for bbox in bboxes)
+        ])
+    return np.concatenate([points.min(axis=1), points.max(axis=1)], axis=1)
+
+
+def resolve_reading_order(boxes: np.ndarray, mode: str = READING_ORDER_AUTO) -> str:
+    """
+    确定阅读顺序模式，auto 时按区域高宽比的中位数判断横排或竖排
+
+    Returns:
+        str: READING_ORDER_HORIZONTAL 或 READING_ORDER_VERTICAL_RTL
+    """
+    if mode not in READING_ORDERS:
+        raise ValueError(f"不支持的阅读顺序: {mode}")
+    if mode != READING_ORDER_AUTO:
+        return mode
+    if len(boxes) == 0:
+        return READING_ORDER_HORIZONTAL
+    widths = np.maximum(boxes[:, 2] - boxes[:, 0], 1)
+    heights = np.maximum(boxes[:, 3] - boxes[:, 1], 1)
+    if np.median(heights / widths) > VERTICAL_ASPECT_RATIO:
+        return READING_ORDER_VERTICAL_RTL
+    return READING_ORDER_HORIZONTAL
+
+
+def cluster_lines(centers: np.ndarray, glyph_size: float) -> np.ndarray:
+    """
+    将区域中心坐标按一维间隔聚类成行（或列）
+
+    排序后相邻中心的间隔超过 glyph_size * LINE_GAP_RATIO 处断开，复杂度 O(n log n)
+
+    Args:
+        centers: 区域中心在垂直于阅读方向上的坐标
+        glyph_size: 中位字形尺寸（横排为行高，竖排为列宽）
+
+    Returns:
+        np.ndarray: 每个区域所在行（列）的编号，按坐标从小到大编号
+    """
+    order = np.argsort(centers, kind='stable')
+    gaps = np.diff(centers[order]) > max(glyph_size, 1.0) * LINE_GAP_RATIO
+    line_ids = np.empty(len(centers), dtype=np.int64)
+    line_ids[order] = np.concatenate([[0], np.cumsum(gaps)])
+    return line_ids
+
+
+def reading_order(boxes: np.ndarray, mode: str = READING_ORDER_AUTO) -> np.ndarray:
+    """
+    计算区域的阅读顺序
+
+    行（列）的划分阈值由中位字形尺寸决定，不依赖固定像素容差，适应不同分辨率和字号
+
+    Args:
+        boxes: (n, 4) 的 [x0, y0, x1, y1]
+        mode: 阅读顺序模式
+
+    Returns:
+        np.ndarray: 按阅读顺序排列的区域下标
+    """
+    if len(boxes) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    mode = resolve_reading_order(boxes, mode)
+    center_x = (boxes[:, 0] + boxes[:, 2]) / 2
+    center_y = (boxes[:, 1] + boxes[:, 3]) / 2
+
+    if mode == READING_ORDER_VERTICAL_RTL:
+        # 按列宽聚类成列，列从右到左，列内从上到下
+        column_ids = cluster_lines(center_x, float(np.median(boxes[:, 2] - boxes[:, 0])))
+        return np.lexsort((boxes[:, 1], -column_ids))
+
+    # 按行高聚类成行，行从上到下，行内从左到右
+    line_ids = cluster_lines(center_y, float(np.median(boxes[:, 3] - boxes[:, 1])))
+    return np.lexsort((boxes[:, 0], line_ids))
+
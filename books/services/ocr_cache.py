@@ -0,0 +1,163 @@
+# services/ocr_cache.py
+import hashlib
+from typing import List, Dict, Any, Optional
+import logging
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+from ..models import OCRCacheStats, OCRResultCache
+
+logger = logging.getLogger(__name__)
+
+
+class OCRCacheService:
+    """OCR结果缓存服务类，以图片内容哈希加识别版本作为指纹"""
+    
+    def __init__(self, version: str):
+        self.version = version
+    
+    @classmethod
+    def from_settings(cls) -> 'OCRCacheService':
+        """按当前识别配置（settings 中的 OCR_*）创建缓存，worker 和管理命令共用同一版本"""
+        # ocr_service 依赖 cv2 等重量级库，只在需要时导入
+        from .ocr_service import build_cache_version
+        
+        return cls(build_cache_version(
+            settings.OCR_LANGUAGES,
+            settings.OCR_TILE_SIZE,
+            settings.OCR_TILE_OVERLAP,
+            settings.OCR_TILED_MIN_PIXELS,
+            settings.OCR_READING_ORDER,
+            settings.OCR_WORKING_DPI,
+            settings.OCR_TARGET_GLYPH_HEIGHT
+        ))
+    
+    @staticmethod
+    def hash_file(file) -> str:
+        """
+        分块计算文件内容的SHA-256哈希
+        
+        Args:
+            file: Django文件对象（如 page.image）
+            
+        Returns:
+            str: 十六进制哈希
+        """
+        digest = hashlib.sha256()
+        file.open('rb')
+        try:
+            for chunk in file.chunks():
+                digest.update(chunk)
+        finally:
+            file.close()
+        return digest.hexdigest()
+    
+    @staticmethod
+    def frame_hash(content_hash: str, frame: int) -> str:
+        """
+        多页图片中单帧的内容哈希：第0帧即文件哈希，其余帧在文件哈希上附加帧序号
+        
+        Args:
+            content_hash: 文件内容哈希
+            frame: 帧序号
+            
+        Returns:
+            str: 十六进制哈希
+        """
+        if not frame:
+            return content_hash
+        return hashlib.sha256(f"{content_hash}:{frame}".encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def hash_page(cls, page) -> str:
+        """
+        页面图片的内容哈希，上传时已计算的直接复用，不再读取整个文件
+        
+        Args:
+            page: 书页
+            
+        Returns:
+            str: 十六进制哈希
+        """
+        if page.image_hash:
+            return page.image_hash
+        return cls.frame_hash(cls.hash_file(page.image), page.image_frame)
+    
+    def fingerprint(self, content_hash: str) -> str:
+        """由内容哈希和识别版本组成缓存指纹"""
+        return f"{content_hash}:{self.version}"
+    
+    def get(self, content_hash: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        查询缓存的识别结果，命中时累加条目的命中次数，并记录本版本的命中/未命中统计
+        
+        Args:
+            content_hash: 图片内容哈希
+            
+        Returns:
+            List[Dict]: 与 OCRService.process_image 格式一致的文本区域列表，未命中时返回None
+        """
+        fingerprint = self.fingerprint(content_hash)
+        entry = OCRResultCache.objects.filter(fingerprint=fingerprint).only('id', 'regions').first()
+        if entry is None:
+            OCRCacheStats.record(self.version, misses=1)
+            logger.debug(f"OCR缓存未命中: {fingerprint}")
+            return None
+        
+        OCRResultCache.objects.filter(id=entry.id).update(
+            hit_count=F('hit_count') + 1,
+            last_hit_at=timezone.now()
+        )
+        OCRCacheStats.record(self.version, hits=1)
+        logger.debug(f"OCR缓存命中: {fingerprint}")
+        return entry.regions
+    
+    def put(self, content_hash: str, text_regions: List[Dict[str, Any]]) -> None:
+        """
+        写入识别结果
+        
+        Args:
+            content_hash: 图片内容哈希
+            text_regions: OCRService.process_image 返回的文本区域列表
+        """
+        region_count = len(text_regions)
+        avg_confidence = (
+            sum(region['confidence'] for region in text_regions) / region_count if region_count > 0 else 0
+        )
+        OCRResultCache.objects.update_or_create(
+            fingerprint=self.fingerprint(content_hash),
+            defaults={
+                'content_hash': content_hash,
+                'version': self.version,
+                'regions': text_regions,
+                'region_count': region_count,
+                'avg_confidence': avg_confidence
+            }
+        )
+    
+    @staticmethod
+    def stats(version: Optional[str] = None) -> Dict[str, Any]:
+        """
+        缓存统计，命中和未命中为查询时累计的实际次数
+        
+        Args:
+            version: 只统计指定识别版本，默认统计全部版本
+        
+        Returns:
+            Dict: 条目数、命中数、未命中数和命中率
+        """
+        entries = OCRResultCache.objects.all()
+        counters = OCRCacheStats.objects.all()
+        if version is not None:
+            entries = entries.filter(version=version)
+            counters = counters.filter(version=version)
+        aggregated = counters.aggregate(hits=Sum('hit_count'), misses=Sum('miss_count'))
+        hits = aggregated['hits'] or 0
+        misses = aggregated['misses'] or 0
+        lookups = hits + misses
+        return {
+            'entries': entries.count(),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups > 0 else 0
+        }
@@ -0,0 +1,166 @@
+# services/ocr_progress.py
+import asyncio
+import json
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+import logging
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# 订阅端无消息时发送心跳的间隔（秒）
+KEEPALIVE_SECONDS = 15
+
+
+def book_channel(book_id: int) -> str:
+    """书籍OCR进度的发布/订阅频道"""
+    return f"ocr-progress:book:{book_id}"
+
+
+class LocalBroker:
+    """
+    进程内的发布/订阅代理，未配置Redis时使用
+    
+    只能把消息推送给同一进程内的订阅者，仅适用于ASGI开发服务器 + CELERY_TASK_ALWAYS_EAGER；
+    runserver（WSGI）无法推送SSE，页面会退化为轮询进度接口
+    """
+    
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+    
+    def publish(self, channel: str, message: str) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, message)
+    
+    def subscribe(self, channel: str) -> Tuple[asyncio.AbstractEventLoop, asyncio.Queue]:
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, channel: str, subscriber: Tuple[asyncio.AbstractEventLoop, asyncio.Queue]) -> None:
+        with self._lock:
+            self._subscribers.get(channel, set()).discard(subscriber)
+
+
+_local_broker = LocalBroker()
+_redis_client = None
+_push_warning_logged = False
+
+
+def _redis_url() -> Optional[str]:
+    """进度推送使用的Redis地址，未单独配置时复用Celery的Redis消息代理"""
+    url = getattr(settings, 'OCR_PROGRESS_REDIS_URL', None)
+    if url:
+        return url
+    from celery import current_app
+    broker_url = current_app.conf.broker_url or ''
+    if broker_url.startswith(('redis://', 'rediss://')):
+        return broker_url
+    return None
+
+
+def progress_push_available() -> bool:
+    """
+    OCR进度能否推送到Web进程：需要Redis发布/订阅，或者任务在Web进程内执行（CELERY_TASK_ALWAYS_EAGER）
+    
+    两者都没有时worker发布到各自进程内的代理，Web进程收不到，只记录一次警告
+    """
+    global _push_warning_logged
+    if _redis_url() or getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False):
+        return True
+    if not _push_warning_logged:
+        logger.warning(
+            "未配置 OCR_PROGRESS_REDIS_URL，Celery消息代理也不是Redis，OCR进度无法推送，页面将轮询进度"
+        )
+        _push_warning_logged = True
+    return False
+
+
+def publish_book_event(book_id: int, event: Dict[str, Any]) -> None:
+    """
+    发布书籍的OCR进度事件，发布失败只记录日志，不影响OCR任务
+    
+    Args:
+        book_id: 书籍ID
+        event: 事件内容，包含 type（page/book）及状态字段
+    """
+    global _redis_client
+    message = json.dumps(event, ensure_ascii=False)
+    try:
+        url = _redis_url()
+        if url:
+            if _redis_client is None:
+                import redis
+                _redis_client = redis.Redis.from_url(url)
+            _redis_client.publish(book_channel(book_id), message)
+        else:
+            _local_broker.publish(book_channel(book_id), message)
+    except Exception as e:
+        logger.warning(f"发布OCR进度失败: 书籍 {book_id}, 错误: {str(e)}")
+
+
+class BookEventSubscription:
+    """
+    书籍OCR进度事件的订阅
+    
+    用法：
+        subscription = BookEventSubscription(book_id)
+        await subscription.open()
+        message = await subscription.next()
+        await subscription.close()
+    """
+    
+    def __init__(self, book_id: int):
+        self.channel = book_channel(book_id)
+        self._client = None
+        self._pubsub = None
+        self._local_subscriber = None
+    
+    async def open(self) -> None:
+        """完成订阅后返回，之后发布的事件都不会遗漏"""
+        url = _redis_url()
+        if url:
+            import redis.asyncio as aioredis
+            self._client = aioredis.Redis.from_url(url)
+            self._pubsub = self._client.pubsub()
+            await self._pubsub.subscribe(self.channel)
+        else:
+            self._local_subscriber = _local_broker.subscribe(self.channel)
+    
+    async def next(self) -> Optional[str]:
+        """
+        等待下一条事件
+        
+        Returns:
+            Optional[str]: JSON格式的事件，超过 KEEPALIVE_SECONDS 无消息时返回None用于发送心跳
+        """
+        if self._local_subscriber is not None:
+            try:
+                return await asyncio.wait_for(self._local_subscriber[1].get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                return None
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + KEEPALIVE_SECONDS
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return None
+            message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+            if message is not None and message['type'] == 'message':
+                data = message['data']
+                return data.decode('utf-8') if isinstance(data, bytes) else data
+    
+    async def close(self) -> None:
+        if self._local_subscriber is not None:
+            _local_broker.unsubscribe(self.channel, self._local_subscriber)
+            self._local_subscriber = None
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self.channel)
+            await self._pubsub.aclose()
+            await self._client.aclose()
+            self._pubsub = self._client = None
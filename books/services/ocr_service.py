@@ -1,143 +1,852 @@
 # services/ocr_service.py
 import cv2
 import numpy as np
-from PIL import Image
-import easyocr
-from typing import List, Dict, Any
+from PIL import Image, ImageOps
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
 import logging
+import os
+import resource
+import threading
+import time
+
+from .layout_service import READING_ORDER_AUTO, extract_boxes, reading_order
+
+if TYPE_CHECKING:
+    import easyocr
 
 logger = logging.getLogger(__name__)
 
+# 默认识别语言，支持中文和英文
+DEFAULT_LANGUAGES = ('ch_sim', 'en')
+
+# 预处理流程版本，修改预处理或结果格式时递增，使旧的OCR结果缓存失效
+PREPROCESS_VERSION = 2
+
+# 分块识别的默认参数
+DEFAULT_TILE_SIZE = 2048
+DEFAULT_TILE_OVERLAP = 256
+# 超过该像素数的页面自动使用分块识别
+DEFAULT_TILED_MIN_PIXELS = 4096 * 4096
+# 分块重叠区域中，两个区域的交集占较小区域面积超过该比例时视为重复
+TILE_DEDUP_OVERLAP_RATIO = 0.5
+
+# 预处理流水线的默认参数：预处理线程数、最多提前准备的页面数、凑满多少页同尺寸页面送入一次批量识别
+DEFAULT_PREFETCH_WORKERS = 2
+DEFAULT_PREFETCH_DEPTH = 4
+DEFAULT_PIPELINE_GROUP_PAGES = 4
+
+# 按工作DPI缩小解码时，JPEG可在解码阶段直接缩小的倍数（按DCT系数缩放，不解码整幅原图）
+REDUCED_GRAYSCALE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+)
+# 分辨率归一化：在最长边不超过该值的缩小图上估计字形高度
+GLYPH_SAMPLE_SIDE = 2048
+# 参与估计的连通域下限，少于该数量（如空白页）时不缩放
+MIN_GLYPH_COMPONENTS = 20
+# 字形高度估计值比目标大不到该比例时不缩放，避免为微小收益重采样
+MIN_NORMALIZE_RATIO = 1.25
+
+# 区域重新识别时裁剪框四周保留的像素，避免笔画贴边被截断
+REGION_CROP_MARGIN = 2
+
+# 低于该值的DPI元数据（如相机默认的72）不可信，视为未知，不做缩小解码
+MIN_TRUSTED_DPI = 100
+
+# 进程内常驻的EasyOCR模型池，按语言组合缓存
+_reader_pool: Dict[Tuple[str, ...], 'easyocr.Reader'] = {}
+_reader_pool_lock = threading.Lock()
+
+
+def _normalize_languages(languages: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """将语言列表规范化为模型池的键"""
+    if not languages:
+        return DEFAULT_LANGUAGES
+    return tuple(languages)
+
+
+def get_resident_memory_mb() -> float:
+    """
+    获取当前进程的常驻内存（RSS）
+
+    Returns:
+        float: 常驻内存，单位MB
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # 非Linux平台退化为峰值RSS（Linux下单位为KB，macOS下为字节）
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if peak > 1 << 32 else peak / 1024
+
+
+def reset_peak_memory() -> bool:
+    """
+    重置当前进程的峰值常驻内存（VmHWM），用于统计单个页面处理期间的内存峰值
+
+    Returns:
+        bool: 当前平台是否支持重置
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def get_peak_memory_mb() -> float:
+    """
+    获取当前进程自启动（或上次 reset_peak_memory）以来的峰值常驻内存
+
+    Returns:
+        float: 峰值常驻内存，单位MB
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if peak > 1 << 32 else peak / 1024
+
+
+def get_image_dpi(image: Image.Image) -> Optional[float]:
+    """读取图片元数据中的DPI，缺失或不可信时返回None"""
+    dpi = image.info.get('dpi')
+    if isinstance(dpi, (tuple, list)):
+        dpi = dpi[0] if dpi else None
+    try:
+        dpi = float(dpi)
+    except (TypeError, ValueError):
+        return None
+    return dpi if dpi >= MIN_TRUSTED_DPI else None
+
+
+def read_grayscale(image_path: str, frame: int = 0, working_dpi: Optional[int] = None) -> Tuple[np.ndarray, float]:
+    """
+    直接以灰度解码图片，不生成彩色的整页数组
+
+    配置了工作DPI且图片DPI更高时按比例缩小解码：JPEG在解码阶段按 1/2、1/4、1/8 缩小，
+    JPEG 2000 只解码较低的分辨率层级，其余格式解码后立即缩小。
+    多页TIFF只解码指定的一帧，不加载其他帧
+
+    Args:
+        image_path: 图片路径
+        frame: 多页图片中的帧序号
+        working_dpi: OCR工作DPI，为空时按原始分辨率解码
+
+    Returns:
+        tuple: (灰度图片, 原图与解码结果的边长比例)，识别坐标乘以该比例即为原图坐标
+    """
+    gray = None
+    # Image.open 只读取文件头，尺寸和DPI不需要解码像素
+    with Image.open(image_path) as image:
+        image_format = image.format
+        if frame:
+            try:
+                image.seek(frame)
+            except EOFError:
+                raise ValueError(f"图片没有第 {frame} 帧: {image_path}")
+        original_side = max(image.size)
+        dpi = get_image_dpi(image)
+        factor = dpi / working_dpi if working_dpi and dpi and dpi > working_dpi else 1.0
+
+        if frame or (image_format == 'JPEG2000' and factor >= 2):
+            if image_format == 'JPEG2000':
+                # 每降低一个分辨率层级边长减半，与JPEG一致最多缩小到1/8
+                image.reduce = min(int(np.log2(factor)), 3)
+            # 与 cv2.imread 一致，按EXIF方向旋转
+            ImageOps.exif_transpose(image, in_place=True)
+            frame_image = image if image.mode == 'L' else image.convert('L')
+            gray = np.array(frame_image)
+            del frame_image
+
+    if gray is None:
+        flag = cv2.IMREAD_GRAYSCALE
+        if image_format == 'JPEG':
+            flag = next((flag for ratio, flag in REDUCED_GRAYSCALE_FLAGS if factor >= ratio), flag)
+        gray = cv2.imread(image_path, flag)
+        if gray is None:
+            raise ValueError(f"无法读取图片: {image_path}")
+
+    # 解码阶段无法精确缩小的剩余比例在灰度图上完成
+    target_side = original_side / factor
+    if max(gray.shape[:2]) > target_side * 1.05:
+        ratio = target_side / max(gray.shape[:2])
+        gray = cv2.resize(
+            gray,
+            (max(1, round(gray.shape[1] * ratio)), max(1, round(gray.shape[0] * ratio))),
+            interpolation=cv2.INTER_AREA
+        )
+
+    return gray, original_side / max(gray.shape[:2])
+
+
+def estimate_glyph_height(gray: np.ndarray) -> Optional[float]:
+    """
+    由连通域估计页面的字形高度
+
+    在缩小后的页面上二值化（文字为前景），取尺寸合理的连通域高度的75分位数：
+    汉字常由多个部件组成，部件高度偏小，高分位数更接近整字高度
+
+    Args:
+        gray: 灰度页面图片
+
+    Returns:
+        float: 原图像素下的字形高度，可用连通域不足时返回None
+    """
+    height, width = gray.shape[:2]
+    ratio = min(1.0, GLYPH_SAMPLE_SIDE / max(height, width))
+    sample = gray
+    if ratio < 1.0:
+        sample = cv2.resize(gray, (max(1, round(width * ratio)), max(1, round(height * ratio))),
+                            interpolation=cv2.INTER_AREA)
+    _, binary = cv2.threshold(sample, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    
+    # 去掉背景、噪点、边框线和大块插图
+    stats = stats[1:]
+    widths = stats[:, cv2.CC_STAT_WIDTH]
+    heights = stats[:, cv2.CC_STAT_HEIGHT]
+    fill = stats[:, cv2.CC_STAT_AREA] / np.maximum(widths * heights, 1)
+    keep = (
+        (heights >= 3) & (widths >= 2)
+        & (heights < sample.shape[0] / 8) & (widths < sample.shape[1] / 8)
+        & (heights < widths * 8) & (widths < heights * 8)
+        & (fill > 0.1)
+    )
+    if np.count_nonzero(keep) < MIN_GLYPH_COMPONENTS:
+        return None
+    return float(np.percentile(heights[keep], 75)) / ratio
+
+
+def normalize_resolution(gray: np.ndarray, target_glyph_height: Optional[int]) -> Tuple[np.ndarray, float, Optional[float]]:
+    """
+    将页面缩小到字形高度接近 target_glyph_height，只缩小不放大
+
+    Args:
+        gray: 灰度页面图片
+        target_glyph_height: 目标字形高度（像素），为空时不处理
+
+    Returns:
+        tuple: (缩放后的图片, 输入与输出的边长比例, 估计的字形高度)
+    """
+    if not target_glyph_height:
+        return gray, 1.0, None
+    glyph_height = estimate_glyph_height(gray)
+    if glyph_height is None or glyph_height < target_glyph_height * MIN_NORMALIZE_RATIO:
+        return gray, 1.0, glyph_height
+    
+    ratio = target_glyph_height / glyph_height
+    height, width = gray.shape[:2]
+    size = (max(1, round(width * ratio)), max(1, round(height * ratio)))
+    normalized = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+    return normalized, max(height, width) / max(normalized.shape[:2]), glyph_height
+
+
+def scale_results(results: List[Any], scale: float) -> List[Any]:
+    """将识别结果的边框从解码图坐标映射回原图坐标"""
+    if scale == 1.0:
+        return results
+    return [
+        ([[point[0] * scale, point[1] * scale] for point in bbox], text, confidence)
+        for bbox, text, confidence in results
+    ]
+
+
+def get_reader(languages: Optional[Iterable[str]] = None) -> 'easyocr.Reader':
+    """
+    获取常驻的EasyOCR Reader，同一进程内每种语言组合只加载一次模型
+
+    Args:
+        languages: 识别语言列表，默认使用 DEFAULT_LANGUAGES
+
+    Returns:
+        easyocr.Reader: 已加载权重的Reader
+    """
+    key = _normalize_languages(languages)
+    reader = _reader_pool.get(key)
+    if reader is not None:
+        return reader
+
+    with _reader_pool_lock:
+        reader = _reader_pool.get(key)
+        if reader is None:
+            # 深度学习依赖（torch）只在真正需要模型的worker进程中加载
+            import easyocr
+            
+            rss_before = get_resident_memory_mb()
+            started = time.perf_counter()
+            reader = easyocr.Reader(list(key))
+            _reader_pool[key] = reader
+            logger.info(
+                f"加载OCR模型 {list(key)} 耗时 {time.perf_counter() - started:.2f}s, "
+                f"进程 {os.getpid()} 常驻内存 {rss_before:.0f}MB -> {get_resident_memory_mb():.0f}MB"
+            )
+    return reader
+
+
+def warm_up_readers(language_sets: Optional[Iterable[Iterable[str]]] = None) -> None:
+    """
+    预加载模型池
+
+    Args:
+        language_sets: 需要预加载的语言组合列表
+    """
+    for languages in language_sets or [DEFAULT_LANGUAGES]:
+        get_reader(languages)
+
+
+def is_reader_loaded(languages: Optional[Iterable[str]] = None) -> bool:
+    """判断指定语言组合的模型是否已常驻内存"""
+    return _normalize_languages(languages) in _reader_pool
+
+
+def prefetch(func: Callable[[Any], Any], items: Iterable[Any], workers: int = 1, depth: int = 1) -> Iterator[Any]:
+    """
+    有界预取：后台线程按顺序对 items 执行 func，消费者处理当前结果时后续结果已在准备
+
+    同时在准备或已准备好但未被取走的结果最多 depth 个，内存占用不随输入数量增长。
+    OpenCV 在计算时释放GIL，预处理线程可以与模型推理真正并行
+
+    Args:
+        func: 处理函数（如解码和预处理）
+        items: 输入
+        workers: 后台线程数，小于1时在当前线程中顺序执行
+        depth: 最多提前准备的结果数
+
+    Yields:
+        与 items 顺序一致的结果，func 抛出异常时产出该异常对象
+    """
+    def call(item):
+        try:
+            return func(item)
+        except Exception as e:
+            return e
+
+    if workers < 1 or depth < 1:
+        for item in items:
+            yield call(item)
+        return
+
+    iterator = iter(items)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ocr-prefetch') as executor:
+        pending = deque()
+        try:
+            for item in iterator:
+                pending.append(executor.submit(call, item))
+                if len(pending) >= depth:
+                    break
+            while pending:
+                result = pending.popleft().result()
+                # 先补充下一个任务再交出结果，消费者推理期间预处理继续进行
+                for item in iterator:
+                    pending.append(executor.submit(call, item))
+                    break
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def build_cache_version(languages: Optional[Iterable[str]] = None,
+                        tile_size: int = DEFAULT_TILE_SIZE,
+                        tile_overlap: int = DEFAULT_TILE_OVERLAP,
+                        tiled_min_pixels: int = DEFAULT_TILED_MIN_PIXELS,
+                        reading_order_mode: str = READING_ORDER_AUTO,
+                        working_dpi: Optional[int] = None,
+                        target_glyph_height: Optional[int] = None) -> str:
+    """
+    构建识别版本标识，识别结果只在版本一致时可以复用
+    
+    Returns:
+        str: 版本标识
+    """
+    return (
+        f"p{PREPROCESS_VERSION}|{'+'.join(_normalize_languages(languages))}"
+        f"|t{tile_size}-{tile_overlap}-{tiled_min_pixels}|o{reading_order_mode}|d{working_dpi or 0}"
+        f"|g{target_glyph_height or 0}"
+    )
+
+
 class OCRService:
     """OCR服务类"""
     
-    def __init__(self):
-        # 初始化EasyOCR，支持中文和英文
-        self.reader = easyocr.Reader(['ch_sim', 'en'])
+    def __init__(self, languages: Optional[Iterable[str]] = None,
+                 tile_size: int = DEFAULT_TILE_SIZE,
+                 tile_overlap: int = DEFAULT_TILE_OVERLAP,
+                 tile_workers: int = 1,
+                 tiled_min_pixels: int = DEFAULT_TILED_MIN_PIXELS,
+                 reading_order_mode: str = READING_ORDER_AUTO,
+                 prefetch_workers: int = DEFAULT_PREFETCH_WORKERS,
+                 prefetch_depth: int = DEFAULT_PREFETCH_DEPTH,
+                 working_dpi: Optional[int] = None,
+                 target_glyph_height: Optional[int] = None):
+        # 从进程内模型池获取EasyOCR，避免每个任务重复加载模型权重
+        self.languages = _normalize_languages(languages)
+        self.reader = get_reader(self.languages)
+        
+        # 分块识别配置
+        if tile_overlap >= tile_size:
+            raise ValueError("分块重叠必须小于分块尺寸")
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_workers = max(1, tile_workers)
+        self.tiled_min_pixels = tiled_min_pixels
+        
+        # 阅读顺序：auto / horizontal / vertical_rtl（竖排从右到左）
+        self.reading_order_mode = reading_order_mode
+        
+        # 预处理流水线：后台线程解码、预处理后续页面（或分块），模型只消费已准备好的数组
+        self.prefetch_workers = prefetch_workers
+        self.prefetch_depth = max(1, prefetch_depth)
+        
+        # 工作DPI：高于该DPI的扫描件缩小解码，为空时按原始分辨率识别
+        self.working_dpi = working_dpi
+        
+        # 分辨率归一化：字形高于该高度（像素）的页面按比例缩小后再识别，为空时不处理
+        self.target_glyph_height = target_glyph_height
+    
+    @property
+    def cache_version(self) -> str:
+        """识别版本标识，包含模型语言、预处理版本、分块参数、阅读顺序、工作DPI和目标字形高度，用于OCR结果缓存"""
+        return build_cache_version(
+            self.languages, self.tile_size, self.tile_overlap, self.tiled_min_pixels, self.reading_order_mode,
+            self.working_dpi, self.target_glyph_height
+        )
     
-    def process_image(self, image_path: str) -> List[Dict[str, Any]]:
+    def process_image(self, image_path: str, tiled: Optional[bool] = None, frame: int = 0,
+                      stats: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         处理图片，返回OCR识别结果
         
         Args:
             image_path: 图片路径
+            tiled: 是否分块识别，默认在页面像素数超过 tiled_min_pixels 时自动启用
+            frame: 多页图片中的帧序号
+            stats: 不为空时写入解码统计（缩放比例、工作尺寸、字形高度、图片缓冲区占用）
             
         Returns:
-            List[Dict]: 包含文本区域信息的列表
+            List[Dict]: 包含文本区域信息的列表，坐标为原图像素坐标
         """
         try:
-            # 预处理图片
-            processed_image = self._preprocess_image(image_path)
-            
-            # OCR识别
-            results = self.reader.readtext(processed_image)
-            
-            # 处理识别结果
-            text_regions = []
-            for i, (bbox, text, confidence) in enumerate(results):
-                # 计算边界框坐标
-                x_coords = [point[0] for point in bbox]
-                y_coords = [point[1] for point in bbox]
-                
-                x = int(min(x_coords))
-                y = int(min(y_coords))
-                width = int(max(x_coords) - min(x_coords))
-                height = int(max(y_coords) - min(y_coords))
+            gray, scale, glyph_height = self._load_page(image_path, frame)
+            buffer_bytes = gray.nbytes
+            
+            if tiled is None:
+                tiled = gray.shape[0] * gray.shape[1] > self.tiled_min_pixels
+            
+            if tiled:
+                # 大幅面扫描件分块识别：整页灰度图仍完整解码，分块只限制预处理和识别的工作缓冲区
+                results, tile_bytes = self._readtext_tiled(gray)
+                buffer_bytes += tile_bytes
+            else:
+                # 解码结果只属于本页，直接原地预处理
+                processed_image = self._preprocess_array(gray, out=gray)
                 
-                text_region = {
-                    'region_id': f'region_{i}',
-                    'x': x,
-                    'y': y,
-                    'width': width,
-                    'height': height,
-                    'text': text.strip(),
-                    'confidence': float(confidence),
-                    'order_index': i
-                }
-                text_regions.append(text_region)
-            
-            # 按照阅读顺序排序（从上到下，从左到右）
-            text_regions = self._sort_text_regions(text_regions)
-            
-            return text_regions
+                # OCR识别
+                results = self.reader.readtext(processed_image)
+            
+            if stats is not None:
+                stats.update(self._decode_stats(gray, scale, glyph_height, buffer_bytes))
+            
+            return self._build_text_regions(scale_results(results, scale))
             
         except Exception as e:
             logger.error(f"OCR处理失败: {str(e)}")
             raise
     
-    def _preprocess_image(self, image_path: str) -> np.ndarray:
+    def process_images(self, image_paths: List[str], batch_size: int = 16,
+                       group_pages: int = DEFAULT_PIPELINE_GROUP_PAGES,
+                       frames: Optional[List[int]] = None,
+                       stats: Optional[List[Dict[str, Any]]] = None) -> List[Any]:
         """
-        图片预处理
+        批量处理多张图片，尺寸相同的页面合并为一批送入检测/识别模型
+        
+        解码和预处理在后台线程中流水线进行，凑满 group_pages 页即开始识别，
+        识别期间继续准备后续页面；内存中最多保留约 group_pages + prefetch_depth 页。
+        像素数超过 tiled_min_pixels 的页面不参与合批，逐页分块识别
+        
+        Args:
+            image_paths: 图片路径列表
+            batch_size: 识别模型每次前向处理的文本框数量
+            group_pages: 每次批量识别的最大页数
+            frames: 与 image_paths 对应的帧序号，为空时均为第0帧
+            stats: 不为空时依次追加每页的解码统计，失败的页面为空字典
+            
+        Returns:
+            List: 与 image_paths 一一对应，成功时为文本区域列表，失败时为对应的异常对象
+        """
+        outcomes: List[Any] = [None] * len(image_paths)
+        scales: List[float] = [1.0] * len(image_paths)
+        page_stats: List[Dict[str, Any]] = [{} for _ in image_paths]
+        group_pages = max(1, group_pages)
+        
+        # EasyOCR的批量检测要求同一批图片尺寸一致，因此按尺寸分组
+        groups: Dict[Tuple[int, ...], List[Tuple[int, np.ndarray]]] = {}
+        
+        def prepare(index):
+            gray, scale, glyph_height = self._load_page(image_paths[index], frames[index] if frames else 0)
+            if gray.shape[0] * gray.shape[1] > self.tiled_min_pixels:
+                # 大幅面页面由分块识别逐块预处理，这里只解码
+                return gray, scale, glyph_height, True
+            return self._preprocess_array(gray, out=gray), scale, glyph_height, False
+        
+        def recognize(shape):
+            members = groups.pop(shape)
+            try:
+                batch_results = self.reader.readtext_batched([image for _, image in members], batch_size=batch_size)
+            except Exception as e:
+                logger.warning(f"批量OCR识别失败，改为逐页识别: {str(e)}")
+                batch_results = []
+                for index, image in members:
+                    try:
+                        batch_results.append(self.reader.readtext(image, batch_size=batch_size))
+                    except Exception as page_error:
+                        logger.error(f"OCR处理失败: {image_paths[index]}, 错误: {str(page_error)}")
+                        batch_results.append(page_error)
+            
+            for (index, _), results in zip(members, batch_results):
+                if isinstance(results, Exception):
+                    outcomes[index] = results
+                else:
+                    outcomes[index] = self._build_text_regions(scale_results(results, scales[index]))
+        
+        prepared = prefetch(prepare, range(len(image_paths)), self.prefetch_workers, self.prefetch_depth)
+        for index, prepared_page in enumerate(prepared):
+            # 预处理失败不影响其他页面
+            if isinstance(prepared_page, Exception):
+                logger.error(f"OCR预处理失败: {image_paths[index]}, 错误: {str(prepared_page)}")
+                outcomes[index] = prepared_page
+                continue
+            
+            processed_image, scales[index], glyph_height, tiled = prepared_page
+            if tiled:
+                try:
+                    results, tile_bytes = self._readtext_tiled(processed_image)
+                    outcomes[index] = self._build_text_regions(scale_results(results, scales[index]))
+                except Exception as e:
+                    logger.error(f"OCR处理失败: {image_paths[index]}, 错误: {str(e)}")
+                    outcomes[index] = e
+                    continue
+                page_stats[index] = self._decode_stats(
+                    processed_image, scales[index], glyph_height, processed_image.nbytes + tile_bytes
+                )
+                continue
+            
+            page_stats[index] = self._decode_stats(processed_image, scales[index], glyph_height, processed_image.nbytes)
+            groups.setdefault(processed_image.shape, []).append((index, processed_image))
+            # 页面尺寸各不相同时按页数总量限制，识别最大的一组，保证等待识别的页面有上限
+            if sum(len(members) for members in groups.values()) >= group_pages:
+                recognize(max(groups, key=lambda shape: len(groups[shape])))
+        
+        for shape in list(groups):
+            recognize(shape)
+        
+        if stats is not None:
+            stats.extend(page_stats)
+        return outcomes
+    
+    @staticmethod
+    def _decode_stats(gray: np.ndarray, scale: float, glyph_height: Optional[float], buffer_bytes: int) -> Dict[str, Any]:
+        """单页解码统计：缩放比例、工作尺寸、原图字形高度和预处理期间图片缓冲区的峰值占用（MB）"""
+        return {
+            'decode_scale': scale,
+            'working_size': [int(gray.shape[1]), int(gray.shape[0])],
+            'glyph_height': glyph_height,
+            'buffer_mb': buffer_bytes / (1024 * 1024)
+        }
+    
+    def recognize_regions(self, image_path: str, boxes: List[Tuple[int, int, int, int]], frame: int = 0,
+                          batch_size: int = 16) -> List[Optional[Tuple[str, float]]]:
+        """
+        只对给定矩形运行识别模型，跳过整页的文字检测
+        
+        只预处理覆盖全部矩形的最小区域，用于校对时重新识别个别文本区域
         
         Args:
             image_path: 图片路径
+            boxes: 原图像素坐标下的 (x, y, 宽, 高) 列表
+            frame: 多页图片中的帧序号
+            batch_size: 识别模型每次前向处理的文本框数量
             
         Returns:
-            np.ndarray: 预处理后的图片
+            List: 与 boxes 一一对应的 (文本, 置信度)，矩形在图片之外时为None
         """
-        # 读取图片
-        image = cv2.imread(image_path)
+        if not boxes:
+            return []
+        gray, scale = self._read_grayscale(image_path, frame)
+        height, width = gray.shape[:2]
         
-        # 转换为灰度图
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        # 原图坐标换算到解码图坐标，并裁剪到图片范围内
+        rects = []
+        for x, y, box_width, box_height in boxes:
+            x0 = max(int(np.floor(x / scale)) - REGION_CROP_MARGIN, 0)
+            y0 = max(int(np.floor(y / scale)) - REGION_CROP_MARGIN, 0)
+            x1 = min(int(np.ceil((x + box_width) / scale)) + REGION_CROP_MARGIN, width)
+            y1 = min(int(np.ceil((y + box_height) / scale)) + REGION_CROP_MARGIN, height)
+            rects.append((x0, y0, x1, y1) if x1 > x0 and y1 > y0 else None)
+        valid = [rect for rect in rects if rect is not None]
+        if not valid:
+            return [None] * len(boxes)
         
-        # 降噪
-        denoised = cv2.medianBlur(gray, 3)
+        left = min(rect[0] for rect in valid)
+        top = min(rect[1] for rect in valid)
+        right = max(rect[2] for rect in valid)
+        bottom = max(rect[3] for rect in valid)
+        processed_image = self._preprocess_array(gray[top:bottom, left:right])
+        del gray
         
-        # 二值化
-        _, binary = cv2.threshold(denoised, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # EasyOCR的 horizontal_list 为 [x_min, x_max, y_min, y_max]，结果会按纵坐标重新排序，
+        # 因此按返回的边框坐标对应回输入
+        horizontal_list = [
+            [x0 - left, x1 - left, y0 - top, y1 - top] for x0, y0, x1, y1 in valid
+        ]
+        results = self.reader.recognize(
+            processed_image, horizontal_list=horizontal_list, free_list=[], batch_size=batch_size
+        )
+        recognized: Dict[Tuple[int, int, int, int], List[Tuple[str, float]]] = {}
+        for bbox, text, confidence in results:
+            (x_min, y_min), (x_max, y_max) = bbox[0], bbox[2]
+            key = (int(x_min), int(y_min), int(x_max), int(y_max))
+            recognized.setdefault(key, []).append((text.strip(), float(confidence)))
         
-        # 形态学处理，去除噪点
-        kernel = np.ones((2, 2), np.uint8)
-        processed = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+        outcomes = []
+        for rect in rects:
+            matches = None
+            if rect is not None:
+                x0, y0, x1, y1 = rect
+                matches = recognized.get((x0 - left, y0 - top, x1 - left, y1 - top))
+            outcomes.append(matches.pop(0) if matches else None)
+        return outcomes
+    
+    def _build_text_regions(self, results: List[Any]) -> List[Dict[str, Any]]:
+        """
+        将EasyOCR的识别结果转换为文本区域，并按阅读顺序排序
         
-        return processed
+        Args:
+            results: EasyOCR返回的 (bbox, text, confidence) 列表
+            
+        Returns:
+            List[Dict]: 包含文本区域信息的列表
+        """
+        if not results:
+            return []
+        
+        # 一次性计算全部边界框，再按阅读顺序输出
+        boxes = extract_boxes([bbox for bbox, _, _ in results])
+        xy = boxes[:, :2].astype(int)
+        sizes = (boxes[:, 2:] - boxes[:, :2]).astype(int)
+        
+        text_regions = []
+        for order_index, i in enumerate(reading_order(boxes, self.reading_order_mode).tolist()):
+            _, text, confidence = results[i]
+            text_regions.append({
+                'region_id': f'region_{i}',
+                'x': int(xy[i, 0]),
+                'y': int(xy[i, 1]),
+                'width': int(sizes[i, 0]),
+                'height': int(sizes[i, 1]),
+                'text': text.strip(),
+                'confidence': float(confidence),
+                'order_index': order_index
+            })
+        
+        return text_regions
     
-    def _sort_text_regions(self, regions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _readtext_tiled(self, gray: np.ndarray) -> Tuple[List[Any], int]:
         """
-        按照阅读顺序排序文本区域
+        将页面切分为相互重叠的分块分别识别，再合并回页面坐标
+        
+        整页灰度图由调用方完整解码并在识别期间常驻内存（全页阈值需要整页像素），
+        分块只限制预处理和识别模型的工作缓冲区大小，不减少整页解码的内存占用
         
         Args:
-            regions: 文本区域列表
+            gray: 灰度页面图片
             
         Returns:
-            List[Dict]: 排序后的文本区域列表
-        """
-        # 按照Y坐标分组（处理同一行的文本）
-        lines = []
-        current_line = []
-        current_y = None
-        tolerance = 20  # Y坐标容差
-        
-        # 先按Y坐标排序
-        regions_sorted_by_y = sorted(regions, key=lambda r: r['y'])
-        
-        for region in regions_sorted_by_y:
-            if current_y is None or abs(region['y'] - current_y) <= tolerance:
-                # 同一行
-                current_line.append(region)
-                current_y = region['y'] if current_y is None else current_y
-            else:
-                # 新的一行
-                if current_line:
-                    # 当前行按X坐标排序
-                    current_line.sort(key=lambda r: r['x'])
-                    lines.append(current_line)
-                current_line = [region]
-                current_y = region['y']
+            tuple: (页面坐标下去重后的 (bbox, text, confidence) 列表, 同时存在的分块缓冲区最大字节数)
+        """
+        height, width = gray.shape[:2]
+        # 全页统一的二值化阈值，避免各分块阈值不一致
+        threshold = self._estimate_threshold(gray)
         
-        # 处理最后一行
-        if current_line:
-            current_line.sort(key=lambda r: r['x'])
-            lines.append(current_line)
+        def preprocess_tile(tile_box):
+            x0, y0, x1, y1 = tile_box
+            # 分块是整页的视图且相互重叠，输出到单独的缓冲区
+            return self._preprocess_array(gray[y0:y1, x0:x1], threshold)
         
-        # 重新分配order_index
-        sorted_regions = []
-        for line in lines:
-            sorted_regions.extend(line)
+        def recognize_tile(tile_box, tile):
+            x0, y0 = tile_box[:2]
+            tile_results = self.reader.readtext(tile)
+            return [
+                ([[point[0] + x0, point[1] + y0] for point in bbox], text, confidence)
+                for bbox, text, confidence in tile_results
+            ]
         
-        for i, region in enumerate(sorted_regions):
-            region['order_index'] = i
+        tile_boxes = self._tile_boxes(width, height)
+        if self.tile_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.tile_workers) as executor:
+                tile_results = list(executor.map(
+                    lambda tile_box: recognize_tile(tile_box, preprocess_tile(tile_box)), tile_boxes
+                ))
+        else:
+            # 单线程识别时，后台预处理下一个分块
+            tile_results = []
+            prepared = prefetch(preprocess_tile, tile_boxes, min(self.prefetch_workers, 1), self.prefetch_depth)
+            for tile_box, tile in zip(tile_boxes, prepared):
+                if isinstance(tile, Exception):
+                    raise tile
+                tile_results.append(recognize_tile(tile_box, tile))
         
-        return sorted_regions
-
+        results = [result for results in tile_results for result in results]
+        logger.debug(f"分块识别: {width}x{height}, {len(tile_boxes)} 个分块, {len(results)} 个区域")
+        
+        # 同时存在的分块缓冲区上限：并行识别的分块，或预取队列中的分块加上正在识别的一块
+        tile_bytes = max((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in tile_boxes) * gray.itemsize
+        in_flight = self.tile_workers if self.tile_workers > 1 else self.prefetch_depth + 1
+        return self._merge_tile_results(results), tile_bytes * min(in_flight, len(tile_boxes))
+    
+    def _tile_boxes(self, width: int, height: int) -> List[Tuple[int, int, int, int]]:
+        """
+        计算覆盖整页的分块坐标，相邻分块之间重叠 tile_overlap 像素
+        
+        Returns:
+            List[Tuple]: (x0, y0, x1, y1) 列表
+        """
+        step = self.tile_size - self.tile_overlap
+        
+        def starts(length):
+            positions = list(range(0, max(length - self.tile_overlap, 1), step))
+            # 最后一块贴齐页面边缘，保证分块尺寸一致
+            if positions[-1] + self.tile_size < length:
+                positions.append(length - self.tile_size)
+            return [max(0, min(position, length - self.tile_size)) for position in positions]
+        
+        return [
+            (x0, y0, min(x0 + self.tile_size, width), min(y0 + self.tile_size, height))
+            for y0 in sorted(set(starts(height)))
+            for x0 in sorted(set(starts(width)))
+        ]
+    
+    def _merge_tile_results(self, results: List[Any]) -> List[Any]:
+        """
+        去除分块重叠区域中的重复识别结果
+        
+        同一文字被相邻分块同时识别时，保留面积更大（未被接缝截断）且置信度更高的结果
+        
+        Args:
+            results: 页面坐标下的 (bbox, text, confidence) 列表
+            
+        Returns:
+            List: 去重后的结果
+        """
+        if not results:
+            return []
+        
+        rects = extract_boxes([bbox for bbox, _, _ in results])
+        areas = np.maximum(rects[:, 2] - rects[:, 0], 1) * np.maximum(rects[:, 3] - rects[:, 1], 1)
+        confidences = np.array([float(confidence) for _, _, confidence in results])
+        
+        # 面积优先，其次置信度
+        order = np.lexsort((-confidences, -areas))
+        suppressed = np.zeros(len(results), dtype=bool)
+        kept = []
+        for index in order:
+            if suppressed[index]:
+                continue
+            kept.append(index)
+            ix0 = np.maximum(rects[index, 0], rects[:, 0])
+            iy0 = np.maximum(rects[index, 1], rects[:, 1])
+            ix1 = np.minimum(rects[index, 2], rects[:, 2])
+            iy1 = np.minimum(rects[index, 3], rects[:, 3])
+            intersection = np.clip(ix1 - ix0, 0, None) * np.clip(iy1 - iy0, 0, None)
+            overlap = intersection / np.minimum(areas[index], areas)
+            suppressed |= overlap > TILE_DEDUP_OVERLAP_RATIO
+        
+        return [results[index] for index in sorted(kept)]
+    
+    def _read_grayscale(self, image_path: str, frame: int = 0) -> Tuple[np.ndarray, float]:
+        """
+        以灰度方式读取图片，配置了工作DPI时缩小解码
+        
+        Args:
+            image_path: 图片路径
+            frame: 多页图片中的帧序号
+            
+        Returns:
+            tuple: (灰度图片, 原图与解码结果的边长比例)
+        """
+        return read_grayscale(image_path, frame, self.working_dpi)
+    
+    def _load_page(self, image_path: str, frame: int = 0) -> Tuple[np.ndarray, float, Optional[float]]:
+        """
+        解码页面并做分辨率归一化
+        
+        Args:
+            image_path: 图片路径
+            frame: 多页图片中的帧序号
+            
+        Returns:
+            tuple: (工作尺寸的灰度图片, 原图与工作图的边长比例, 原图像素下的字形高度)
+        """
+        gray, scale = self._read_grayscale(image_path, frame)
+        gray, ratio, glyph_height = normalize_resolution(gray, self.target_glyph_height)
+        return gray, scale * ratio, glyph_height * scale if glyph_height is not None else None
+    
+    def _estimate_threshold(self, gray: np.ndarray) -> float:
+        """
+        在缩小后的页面上估计Otsu二值化阈值
+        
+        Args:
+            gray: 灰度图片
+            
+        Returns:
+            float: 二值化阈值
+        """
+        height, width = gray.shape[:2]
+        scale = min(1.0, self.tile_size / max(height, width))
+        if scale < 1.0:
+            gray = cv2.resize(gray, (max(1, int(width * scale)), max(1, int(height * scale))),
+                              interpolation=cv2.INTER_AREA)
+        threshold, _ = cv2.threshold(cv2.medianBlur(gray, 3), 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        return threshold
+    
+    def _preprocess_array(self, gray: np.ndarray, threshold: Optional[float] = None,
+                          out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        灰度图片预处理，降噪、二值化和形态学处理依次写入同一个缓冲区
+        
+        Args:
+            gray: 灰度图片
+            threshold: 二值化阈值，为空时使用Otsu自动计算
+            out: 输出缓冲区，可以是 gray 本身（原地处理）；为空时分配一个新数组
+            
+        Returns:
+            np.ndarray: 预处理后的图片
+        """
+        if out is None:
+            out = np.empty_like(gray)
+        
+        # 降噪
+        cv2.medianBlur(gray, 3, dst=out)
+        
+        # 二值化
+        if threshold is None:
+            cv2.threshold(out, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=out)
+        else:
+            cv2.threshold(out, threshold, 255, cv2.THRESH_BINARY, dst=out)
+        
+        # 形态学处理，去除噪点
+        kernel = np.ones((2, 2), np.uint8)
+        cv2.morphologyEx(out, cv2.MORPH_CLOSE, kernel, dst=out)
+        
+        return out
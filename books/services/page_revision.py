@@ -0,0 +1,122 @@
+# services/page_revision.py
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Tuple
+import logging
+from django.db import transaction
+from django.db.models import F
+from ..models import BookPage, TextRegion, RegionTombstone
+from .page_sprite import get_sprite_offsets
+from .page_snapshot import build_page_payload, serialize_page, serialize_region, schedule_snapshot_refresh
+
+logger = logging.getLogger(__name__)
+
+
+def _group_by_page(page_region_ids: Iterable[Tuple[int, int]]) -> Dict[int, set]:
+    grouped = defaultdict(set)
+    for page_id, region_id in page_region_ids:
+        grouped[page_id].add(region_id)
+    return grouped
+
+
+def bump_page_revision(page_id: int) -> int:
+    """
+    递增页面版本号（需在事务中调用）。UPDATE 会锁定页面行直到事务提交，
+    同一页面的写入按版本号顺序提交，客户端不会错过较小版本的修改
+
+    Returns:
+        int: 新版本号
+    """
+    BookPage.objects.filter(id=page_id).update(revision=F('revision') + 1)
+    return BookPage.objects.filter(id=page_id).values_list('revision', flat=True).get()
+
+
+def mark_regions_changed(page_region_ids: Iterable[Tuple[int, int]]) -> Dict[int, int]:
+    """
+    记录文本区域（原文、校对或翻译）发生变化，并在提交后刷新页面快照
+
+    Args:
+        page_region_ids: (页面ID, 区域ID) 列表
+
+    Returns:
+        Dict: 页面ID -> 新版本号
+    """
+    revisions = {}
+    with transaction.atomic():
+        for page_id, region_ids in sorted(_group_by_page(page_region_ids).items()):
+            revisions[page_id] = bump_page_revision(page_id)
+            TextRegion.objects.filter(id__in=region_ids).update(revision=revisions[page_id])
+        schedule_snapshot_refresh(list(revisions))
+    return revisions
+
+
+def record_region_deletions(page_region_ids: Iterable[Tuple[int, int]]) -> Dict[int, int]:
+    """
+    记录被删除的文本区域，增量同步时返回给客户端
+
+    Returns:
+        Dict: 页面ID -> 新版本号
+    """
+    revisions = {}
+    with transaction.atomic():
+        for page_id, region_ids in sorted(_group_by_page(page_region_ids).items()):
+            revisions[page_id] = bump_page_revision(page_id)
+            RegionTombstone.objects.bulk_create([
+                RegionTombstone(page_id=page_id, region_pk=region_id, revision=revisions[page_id])
+                for region_id in region_ids
+            ])
+        schedule_snapshot_refresh(list(revisions))
+    return revisions
+
+
+def reset_page_regions(page_id: int) -> int:
+    """
+    整页替换文本区域前调用（需在事务中调用）。旧版本的客户端改为全量同步，
+    因此不必为每个旧区域保留删除记录，已有的删除记录也一并清理
+
+    Returns:
+        int: 新版本号，新建的区域应使用此版本
+    """
+    revision = bump_page_revision(page_id)
+    BookPage.objects.filter(id=page_id).update(reset_revision=revision)
+    RegionTombstone.objects.filter(page_id=page_id).delete()
+    return revision
+
+
+def build_page_delta(page: BookPage, since: int) -> Dict[str, Any]:
+    """
+    构建增量同步数据：只返回 since 版本之后变化的区域和已删除的区域ID
+
+    Args:
+        page: 书页（需包含最新的 revision 和 reset_revision）
+        since: 客户端已同步到的版本号
+
+    Returns:
+        Dict: 与 get_page_data 相同的结构，full 为 False 时 text_regions 只含变化的区域
+    """
+    # 客户端版本早于整页重置或比服务器更新（例如数据库已恢复），只能全量同步
+    if since < page.reset_revision or since > page.revision:
+        return build_page_payload(page)
+
+    regions = []
+    deleted_region_ids = []
+    if since < page.revision:
+        sprite_offsets = get_sprite_offsets(page)
+        regions = [
+            serialize_region(region, sprite_offsets)
+            for region in page.text_regions.filter(revision__gt=since)
+            .select_related('correction', 'translation')
+            .order_by('order_index')
+        ]
+        deleted_region_ids = list(
+            RegionTombstone.objects.filter(page=page, revision__gt=since)
+            .values_list('region_pk', flat=True)
+        )
+
+    return {
+        'success': True,
+        'full': False,
+        'since': since,
+        'page': serialize_page(page),
+        'text_regions': regions,
+        'deleted_region_ids': deleted_region_ids
+    }
@@ -0,0 +1,173 @@
+# services/page_snapshot.py
+import gzip
+import hashlib
+import json
+from typing import Any, Dict, Iterable, Optional
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from ..models import BookPage, PageSnapshot, TextCorrection, Translation
+from .page_sprite import get_sprite_offsets, serialize_sprite
+from .page_tiles import serialize_tiles
+
+logger = logging.getLogger(__name__)
+
+# 快照过期超过该秒数仍未被后台任务重建（如消息队列不可用）时，读取时即时重建
+SNAPSHOT_STALE_REBUILD_SECONDS = 60
+
+
+def serialize_region(region, sprite_offsets: Optional[Dict[str, list]] = None) -> Dict[str, Any]:
+    """
+    序列化文本区域（需已 select_related correction 和 translation）
+    
+    Args:
+        region: 文本区域
+        sprite_offsets: 页面雪碧图的区域偏移（get_sprite_offsets 的返回值）
+    
+    Returns:
+        Dict: 编辑器使用的区域数据
+    """
+    region_data = {
+        'id': region.id,
+        'region_id': region.region_id,
+        'x': region.x,
+        'y': region.y,
+        'width': region.width,
+        'height': region.height,
+        'original_text': region.original_text,
+        'confidence': region.confidence,
+        'order_index': region.order_index,
+        # 区域裁剪图在页面雪碧图中的 [x, y, 宽, 高]
+        'sprite': (sprite_offsets or {}).get(str(region.id))
+    }
+    
+    # 添加校对信息
+    try:
+        region_data['corrected_text'] = region.correction.corrected_text
+        region_data['correction_notes'] = region.correction.correction_notes
+        region_data['correction_updated_at'] = region.correction.updated_at.isoformat()
+    except TextCorrection.DoesNotExist:
+        region_data['corrected_text'] = None
+        region_data['correction_notes'] = None
+        region_data['correction_updated_at'] = None
+    
+    # 添加翻译信息
+    try:
+        region_data['translated_text'] = region.translation.translated_text
+        region_data['translation_language'] = region.translation.translation_language
+    except Translation.DoesNotExist:
+        region_data['translated_text'] = None
+        region_data['translation_language'] = None
+    
+    return region_data
+
+
+def serialize_page(page: BookPage) -> Dict[str, Any]:
+    """序列化页面信息"""
+    return {
+        'id': page.id,
+        'page_number': page.page_number,
+        'image_url': page.image.url,
+        'preview_url': page.preview.url if page.preview else None,
+        'width': page.image_width,
+        'height': page.image_height,
+        'ocr_status': page.ocr_status,
+        'revision': page.revision,
+        'tiles': serialize_tiles(page),
+        'sprite': serialize_sprite(page)
+    }
+
+
+def build_page_payload(page: BookPage) -> Dict[str, Any]:
+    """
+    构建 get_page_data 返回的完整数据
+    
+    Args:
+        page: 书页
+        
+    Returns:
+        Dict: 页面信息和文本区域列表
+    """
+    # 版本号先于区域读取，并发修改时客户端最多重复收到一次区域，不会遗漏
+    regions = page.text_regions.select_related('correction', 'translation').order_by('order_index')
+    sprite_offsets = get_sprite_offsets(page)
+    return {
+        'success': True,
+        'full': True,
+        'page': serialize_page(page),
+        'text_regions': [serialize_region(region, sprite_offsets) for region in regions]
+    }
+
+
+def refresh_page_snapshot(page_id: int) -> Optional[PageSnapshot]:
+    """
+    重新生成页面快照
+    
+    先清除过期标记再读取数据：此后提交的修改会重新标记过期并再次触发重建，不会被遗漏。
+    锁定快照行后再读取数据，并发刷新时后完成的一方总能看到全部已提交的修改
+    
+    Args:
+        page_id: 页面ID
+        
+    Returns:
+        PageSnapshot: 新快照，页面不存在时返回None
+    """
+    PageSnapshot.objects.filter(page_id=page_id).exclude(stale_since=None).update(stale_since=None)
+    with transaction.atomic():
+        page = BookPage.objects.filter(id=page_id).first()
+        if page is None:
+            return None
+        snapshot, _ = PageSnapshot.objects.get_or_create(page=page, defaults={'payload': b''})
+        snapshot = PageSnapshot.objects.select_for_update().get(id=snapshot.id)
+        
+        data = json.dumps(build_page_payload(page), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        snapshot.etag = hashlib.md5(data).hexdigest()
+        snapshot.compressed = getattr(settings, 'PAGE_SNAPSHOT_COMPRESS', True)
+        snapshot.payload = gzip.compress(data, compresslevel=6) if snapshot.compressed else data
+        # 不写 stale_since，保留读取数据之后其他写入设置的过期标记
+        snapshot.save(update_fields=['etag', 'compressed', 'payload', 'updated_at'])
+    return snapshot
+
+
+def schedule_snapshot_refresh(page_ids: Iterable[int]) -> None:
+    """
+    在当前事务提交后将页面快照标记为过期，并发送后台任务重建
+    
+    写入请求只执行一次UPDATE，不在请求中重新序列化整页数据；已过期的快照不重复发送任务。
+    快照重建前读取到的是旧版本数据，其中的 revision 也是旧的，客户端用 ?since 增量同步补齐
+    """
+    page_ids = set(page_ids)
+    
+    def mark_stale():
+        stale_ids = list(
+            PageSnapshot.objects.filter(page_id__in=page_ids, stale_since=None).values_list('page_id', flat=True)
+        )
+        if not stale_ids:
+            return
+        PageSnapshot.objects.filter(page_id__in=stale_ids, stale_since=None).update(stale_since=timezone.now())
+        try:
+            from ..tasks import refresh_page_snapshots
+            refresh_page_snapshots.delay(stale_ids)
+        except Exception as e:
+            # 读取时会即时重建过期过久的快照
+            logger.error(f"发送快照重建任务失败: 页面 {stale_ids}, 错误: {str(e)}")
+    
+    transaction.on_commit(mark_stale)
+
+
+def get_page_snapshot(page_id: int) -> Optional[PageSnapshot]:
+    """
+    读取页面快照，快照不存在或过期过久仍未重建时即时生成
+    
+    Returns:
+        PageSnapshot: 页面快照，页面不存在时返回None
+    """
+    snapshot = PageSnapshot.objects.filter(page_id=page_id).first()
+    if snapshot is None or (
+        snapshot.stale_since is not None
+        and timezone.now() - snapshot.stale_since > timedelta(seconds=SNAPSHOT_STALE_REBUILD_SECONDS)
+    ):
+        snapshot = refresh_page_snapshot(page_id)
+    return snapshot
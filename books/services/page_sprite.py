@@ -0,0 +1,155 @@
+# services/page_sprite.py
+import hashlib
+import io
+import math
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+from ..models import BookPage, PageSprite
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPRITE_MAX_SIDE = 512
+DEFAULT_SPRITE_QUALITY = 80
+# 裁剪图之间的间距，避免浏览器缩放时相邻区域的像素渗入
+SPRITE_PADDING = 2
+
+
+def build_sprite_version(content_hash: str, regions: List[Tuple[int, int, int, int, int]], max_side: int, quality: int) -> str:
+    """由图片内容哈希、区域坐标和生成参数计算雪碧图版本，区域未变化时版本不变"""
+    digest = hashlib.sha256(f"{content_hash}:{max_side}:{quality}".encode('utf-8'))
+    for region in sorted(regions):
+        digest.update((','.join(str(value) for value in region) + ';').encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def pack_shelves(sizes: List[Tuple[int, int]]) -> Tuple[List[Tuple[int, int]], int, int]:
+    """
+    货架法排列矩形：按高度从大到小逐行放置，行宽接近总面积的平方根
+
+    Args:
+        sizes: 每个矩形的 (宽, 高)
+
+    Returns:
+        tuple: (与 sizes 顺序一致的左上角坐标, 总宽度, 总高度)
+    """
+    if not sizes:
+        return [], 0, 0
+
+    area = sum((width + SPRITE_PADDING) * (height + SPRITE_PADDING) for width, height in sizes)
+    sheet_width = max(max(width for width, _ in sizes) + SPRITE_PADDING, int(math.ceil(math.sqrt(area))))
+
+    positions = [None] * len(sizes)
+    x = y = shelf_height = used_width = 0
+    for index in sorted(range(len(sizes)), key=lambda i: sizes[i][1], reverse=True):
+        width, height = sizes[index]
+        if x > 0 and x + width > sheet_width:
+            y += shelf_height + SPRITE_PADDING
+            x = shelf_height = 0
+        positions[index] = (x, y)
+        x += width + SPRITE_PADDING
+        used_width = max(used_width, x - SPRITE_PADDING)
+        shelf_height = max(shelf_height, height)
+
+    return positions, used_width, y + shelf_height
+
+
+def generate_page_sprite(page: BookPage, force: bool = False) -> Optional[PageSprite]:
+    """
+    将页面所有文本区域的裁剪图拼成一张灰度JPEG雪碧图
+
+    Args:
+        page: 书页
+        force: 区域未变化时是否仍重新生成
+
+    Returns:
+        PageSprite: 雪碧图，页面没有文本区域时返回None（并删除旧雪碧图）
+    """
+    max_side = getattr(settings, 'PAGE_SPRITE_MAX_SIDE', DEFAULT_SPRITE_MAX_SIDE)
+    quality = getattr(settings, 'PAGE_SPRITE_QUALITY', DEFAULT_SPRITE_QUALITY)
+
+    regions = list(page.text_regions.values_list('id', 'x', 'y', 'width', 'height'))
+    sprite = PageSprite.objects.filter(page=page).first()
+    if not regions:
+        if sprite is not None:
+            sprite.image.delete(save=False)
+            sprite.delete()
+        return None
+
+    from .ocr_cache import OCRCacheService
+    content_hash = OCRCacheService.hash_page(page)
+    version = build_sprite_version(content_hash, regions, max_side, quality)
+    if sprite is not None and sprite.version == version and not force:
+        return sprite
+
+    with page.image.open('rb') as image_file, Image.open(image_file) as image:
+        # 多页TIFF只解码本页所在的帧
+        if page.image_frame:
+            image.seek(page.image_frame)
+        # 与OCR读取和浏览器显示保持一致的方向
+        page_image = ImageOps.exif_transpose(image).convert('L')
+
+    crops = []
+    for region_id, x, y, width, height in regions:
+        box = (
+            max(x, 0),
+            max(y, 0),
+            min(x + max(width, 1), page_image.width),
+            min(y + max(height, 1), page_image.height)
+        )
+        crop = page_image.crop(box) if box[2] > box[0] and box[3] > box[1] else Image.new('L', (1, 1), 255)
+        # 过大的区域（如整列竖排文字）按最长边缩小
+        if max(crop.size) > max_side:
+            crop.thumbnail((max_side, max_side), reducing_gap=2.0)
+        crops.append((region_id, crop))
+    del page_image
+
+    positions, sheet_width, sheet_height = pack_shelves([crop.size for _, crop in crops])
+    sheet = Image.new('L', (sheet_width, sheet_height), 255)
+    offsets = {}
+    for (region_id, crop), (left, top) in zip(crops, positions):
+        sheet.paste(crop, (left, top))
+        offsets[str(region_id)] = [left, top, crop.width, crop.height]
+
+    buffer = io.BytesIO()
+    sheet.save(buffer, format='JPEG', quality=quality, optimize=True)
+
+    old_image = sprite.image.name if sprite is not None else None
+    if sprite is None:
+        sprite = PageSprite(page=page)
+    sprite.version = version
+    sprite.width = sheet_width
+    sprite.height = sheet_height
+    sprite.offsets = offsets
+    # 文件名包含版本号，内容不变时URL不变，可被长期缓存
+    sprite.image.save(f"{page.id}_{version}.jpg", ContentFile(buffer.getvalue()), save=False)
+    sprite.save()
+
+    if old_image and old_image != sprite.image.name:
+        sprite.image.storage.delete(old_image)
+
+    logger.info(f"生成区域雪碧图: 页面 {page.id}, {len(crops)} 个区域, {sheet_width}x{sheet_height}")
+    return sprite
+
+
+def get_sprite_offsets(page: BookPage) -> Dict[str, List[int]]:
+    """返回页面雪碧图的区域偏移，尚未生成时返回空字典"""
+    try:
+        return page.sprite.offsets
+    except PageSprite.DoesNotExist:
+        return {}
+
+
+def serialize_sprite(page: BookPage) -> Optional[Dict[str, Any]]:
+    """序列化页面雪碧图信息，尚未生成时返回None"""
+    try:
+        sprite = page.sprite
+    except PageSprite.DoesNotExist:
+        return None
+    return {
+        'url': sprite.image.url,
+        'width': sprite.width,
+        'height': sprite.height
+    }
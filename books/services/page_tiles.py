@@ -0,0 +1,204 @@
+# services/page_tiles.py
+import hashlib
+import io
+import math
+import posixpath
+from typing import Any, Dict, Optional
+import logging
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from ..models import BookPage, PageTiles
+from .page_upload import DEFAULT_PREVIEW_SIZE, render_preview
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TILE_SIZE = 256
+DEFAULT_TILE_OVERLAP = 1
+DEFAULT_TILE_QUALITY = 85
+TILE_ROOT = 'book_pages/tiles'
+
+# 瓦片文件名包含版本号，内容永不变化，可以被浏览器长期缓存
+TILE_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+
+TILE_CONTENT_TYPES = {
+    'jpg': 'image/jpeg',
+    'png': 'image/png',
+}
+
+
+def tile_directory(page_id: int, version: str) -> str:
+    """瓦片在存储中的目录，目录下按 <层级>/<列>_<行>.<格式> 存放（与DZI的 _files 目录相同）"""
+    return posixpath.join(TILE_ROOT, str(page_id), version)
+
+
+def tile_name(page_id: int, version: str, level: int, col: int, row: int, tile_format: str) -> str:
+    return posixpath.join(tile_directory(page_id, version), str(level), f"{col}_{row}.{tile_format}")
+
+
+def get_max_level(width: int, height: int) -> int:
+    """DZI最高层级：第 max_level 层为原图，每降一级宽高减半，第0层为1x1"""
+    return int(math.ceil(math.log2(max(width, height, 1))))
+
+
+def build_tile_version(content_hash: str, tile_size: int, overlap: int, tile_format: str, quality: int) -> str:
+    """由图片内容哈希和切片参数生成瓦片版本号"""
+    key = f"{content_hash}:{tile_size}:{overlap}:{tile_format}:{quality}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+
+
+def _delete_directory(directory: str) -> None:
+    """递归删除存储中的目录"""
+    try:
+        subdirs, files = default_storage.listdir(directory)
+    except (FileNotFoundError, NotImplementedError):
+        return
+    for name in files:
+        default_storage.delete(posixpath.join(directory, name))
+    for subdir in subdirs:
+        _delete_directory(posixpath.join(directory, subdir))
+
+
+def _save_level_tiles(level_image, page_id, version, level, tile_size, overlap, tile_format, quality) -> int:
+    """切割并保存一个层级的全部瓦片，返回瓦片数"""
+    width, height = level_image.size
+    cols = int(math.ceil(width / tile_size))
+    rows = int(math.ceil(height / tile_size))
+    save_format = 'JPEG' if tile_format == 'jpg' else 'PNG'
+    save_options = {'quality': quality} if save_format == 'JPEG' else {'optimize': True}
+
+    for col in range(cols):
+        for row in range(rows):
+            # 除边缘外每个瓦片四周各多取 overlap 像素，避免查看器拼接时出现缝隙
+            left = max(col * tile_size - overlap, 0)
+            top = max(row * tile_size - overlap, 0)
+            right = min((col + 1) * tile_size + overlap, width)
+            bottom = min((row + 1) * tile_size + overlap, height)
+
+            buffer = io.BytesIO()
+            level_image.crop((left, top, right, bottom)).save(buffer, format=save_format, **save_options)
+            default_storage.save(
+                tile_name(page_id, version, level, col, row, tile_format),
+                ContentFile(buffer.getvalue())
+            )
+    return cols * rows
+
+
+def _save_preview(page: BookPage, content: bytes) -> None:
+    """保存任务中生成的预览图，页面已有预览图时丢弃"""
+    stem = posixpath.splitext(posixpath.basename(page.image.name))[0]
+    name = f"{stem}_{page.image_frame}.jpg" if page.image_frame else f"{stem}.jpg"
+    field = BookPage._meta.get_field('preview')
+    saved_name = default_storage.save(field.generate_filename(page, name), ContentFile(content))
+    if not BookPage.objects.filter(id=page.id, preview='').update(preview=saved_name):
+        default_storage.delete(saved_name)
+        return
+    page.preview.name = saved_name
+
+
+def generate_page_tiles(page: BookPage, force: bool = False) -> PageTiles:
+    """
+    为页面生成瓦片金字塔，从原图逐级减半切片，页面没有预览图时顺带生成
+
+    Args:
+        page: 书页
+        force: 已有相同版本的瓦片时是否仍重新生成
+
+    Returns:
+        PageTiles: 瓦片元数据
+    """
+    tile_size = getattr(settings, 'PAGE_TILE_SIZE', DEFAULT_TILE_SIZE)
+    overlap = getattr(settings, 'PAGE_TILE_OVERLAP', DEFAULT_TILE_OVERLAP)
+    quality = getattr(settings, 'PAGE_TILE_QUALITY', DEFAULT_TILE_QUALITY)
+    preview_size = getattr(settings, 'PAGE_PREVIEW_SIZE', DEFAULT_PREVIEW_SIZE)
+    tile_format = 'jpg'
+
+    from .ocr_cache import OCRCacheService
+    content_hash = OCRCacheService.hash_page(page)
+    version = build_tile_version(content_hash, tile_size, overlap, tile_format, quality)
+
+    tiles, _ = PageTiles.objects.get_or_create(page=page)
+    if tiles.version == version and tiles.status == 'completed' and not force:
+        return tiles
+
+    previous_version = tiles.version
+    tiles.version = version
+    tiles.status = 'processing'
+    tiles.save(update_fields=['version', 'status', 'updated_at'])
+
+    try:
+        # 清理同版本中断遗留的瓦片，避免存储为重名文件追加后缀
+        _delete_directory(tile_directory(page.id, version))
+
+        with page.image.open('rb') as image_file, Image.open(image_file) as image:
+            # 多页TIFF只解码本页所在的帧
+            if page.image_frame:
+                image.seek(page.image_frame)
+            # 与浏览器显示和OCR读取保持一致的方向
+            level_image = ImageOps.exif_transpose(image)
+            if level_image.mode not in ('L', 'RGB'):
+                level_image = level_image.convert('RGB')
+            width, height = level_image.size
+            max_level = get_max_level(width, height)
+
+            tile_count = 0
+            preview_content = None
+            for level in range(max_level, -1, -1):
+                tile_count += _save_level_tiles(
+                    level_image, page.id, version, level, tile_size, overlap, tile_format, quality
+                )
+                # 上传时只为JPEG生成预览图，其他格式在缩小到预览尺寸附近的一级顺带生成
+                if not page.preview and preview_content is None and max(level_image.size) <= 2 * preview_size:
+                    preview_content = render_preview(level_image)
+                if level > 0:
+                    # 下一级尺寸为 ceil(w/2) x ceil(h/2)，reduce 按2x2块求平均，比重采样快
+                    level_image = level_image.reduce(2)
+    except Exception as e:
+        tiles.status = 'failed'
+        tiles.error_message = str(e)
+        tiles.save(update_fields=['status', 'error_message', 'updated_at'])
+        raise
+
+    tiles.status = 'completed'
+    tiles.width = width
+    tiles.height = height
+    tiles.tile_size = tile_size
+    tiles.overlap = overlap
+    tiles.format = tile_format
+    tiles.max_level = max_level
+    tiles.tile_count = tile_count
+    tiles.error_message = ''
+    tiles.save()
+
+    if previous_version and previous_version != version:
+        _delete_directory(tile_directory(page.id, previous_version))
+    if preview_content is not None:
+        _save_preview(page, preview_content)
+
+    logger.info(f"生成页面瓦片: 页面 {page.id}, {width}x{height}, 共 {max_level + 1} 级 {tile_count} 个瓦片")
+    return tiles
+
+
+def serialize_tiles(page: BookPage) -> Optional[Dict[str, Any]]:
+    """
+    序列化页面的瓦片金字塔元数据，瓦片尚未生成时返回None
+
+    瓦片地址为 url + '<层级>/<列>_<行>.<格式>'
+    """
+    try:
+        tiles = page.tiles
+    except PageTiles.DoesNotExist:
+        return None
+    if tiles.status != 'completed':
+        return None
+
+    return {
+        'url': f"/books/page/{page.id}/tiles/{tiles.version}/",
+        'format': tiles.format,
+        'tile_size': tiles.tile_size,
+        'overlap': tiles.overlap,
+        'width': tiles.width,
+        'height': tiles.height,
+        'max_level': tiles.max_level
+    }
@@ -0,0 +1,187 @@
+# services/page_upload.py
+import hashlib
+import io
+from typing import Optional
+import logging
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopFutureHandlers
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# 文件头魔数 -> 图片格式，只按内容判断类型，不信任客户端声明的 content_type
+IMAGE_SIGNATURES = [
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'II*\x00', 'TIFF'),
+    (b'MM\x00*', 'TIFF'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+    (b'BM', 'BMP'),
+    (b'\x00\x00\x00\x0cjP  \r\n\x87\n', 'JPEG2000'),
+    (b'\xff\x4f\xff\x51', 'JPEG2000'),
+]
+
+# 判断类型所需的最少字节数
+SNIFF_BYTES = 12
+
+DEFAULT_PREVIEW_SIZE = 512
+
+# 多页TIFF每帧作为一个书页，单个文件最多展开的帧数
+MAX_UPLOAD_FRAMES = 500
+
+
+def sniff_image_format(head: bytes) -> Optional[str]:
+    """
+    根据文件头判断图片格式
+
+    Args:
+        head: 文件开头的字节
+
+    Returns:
+        str: 图片格式，不是支持的图片时返回None
+    """
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'WEBP'
+    for signature, image_format in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return image_format
+    return None
+
+
+class PageImageUpload(TemporaryUploadedFile):
+    """
+    经过校验的页面图片上传文件，附带上传过程中得到的内容哈希、尺寸和预览图（仅JPEG）
+
+    error 不为空表示文件在上传完成后仍无法解析，应拒绝
+    """
+    content_hash = ''
+    image_format = ''
+    image_width = None
+    image_height = None
+    # 多页TIFF各帧的 (宽, 高)，单帧图片为空
+    frame_sizes = ()
+    preview_content = None
+    error = None
+
+
+class PageImageUploadHandler(FileUploadHandler):
+    """
+    页面图片上传处理器：分块写入临时文件的同时计算SHA-256并嗅探真实类型，
+    非图片在第一个分块即被拒绝，不会缓冲整个文件
+
+    临时文件与存储位于同一文件系统时，default_storage.save 直接移动文件而不再复制。
+    被拒绝的文件记录在 request.rejected_page_uploads 中
+    """
+    field_name = 'pages'
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.active = False
+        if request is not None and not hasattr(request, 'rejected_page_uploads'):
+            request.rejected_page_uploads = []
+
+    def _reject(self, reason):
+        logger.warning(f"拒绝上传的页面文件: {self.file_name}, 原因: {reason}")
+        if self.request is not None:
+            self.request.rejected_page_uploads.append({'name': self.file_name, 'error': reason})
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.active = field_name == self.field_name
+        if not self.active:
+            return
+        self.file = PageImageUpload(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+        self.digest = hashlib.sha256()
+        self.head = b''
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+
+        if len(self.head) < SNIFF_BYTES:
+            self.head += raw_data[:SNIFF_BYTES - len(self.head)]
+            if len(self.head) >= SNIFF_BYTES:
+                self.file.image_format = sniff_image_format(self.head)
+                if self.file.image_format is None:
+                    self.active = False
+                    self._reject('不是支持的图片格式')
+                    raise SkipFile()
+
+        self.digest.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        self.active = False
+
+        upload = self.file
+        upload.seek(0)
+        upload.size = file_size
+        upload.content_hash = self.digest.hexdigest()
+        if len(self.head) < SNIFF_BYTES or upload.image_format is None:
+            upload.error = '不是支持的图片格式'
+        else:
+            try:
+                with Image.open(upload.temporary_file_path()) as image:
+                    upload.image_width, upload.image_height = image.size
+                    if upload.image_format == 'TIFF' and getattr(image, 'n_frames', 1) > MAX_UPLOAD_FRAMES:
+                        upload.error = f'帧数超过上限 {MAX_UPLOAD_FRAMES}'
+                    elif upload.image_format == 'TIFF':
+                        upload.frame_sizes = self._frame_sizes(image)
+            except Exception as e:
+                logger.debug(f"解析上传图片失败: {self.file_name}, 错误: {str(e)}")
+                upload.error = '无法解析图片'
+            # 只有JPEG能在请求中以缩小尺寸解码；其他格式的预览图由生成瓦片的任务顺带生成
+            if upload.error is None and upload.image_format == 'JPEG':
+                try:
+                    upload.preview_content = self._render_preview(upload.temporary_file_path())
+                except Exception as e:
+                    # 预览图只用于展示，生成失败不影响上传
+                    logger.warning(f"生成预览图失败: {self.file_name}, 错误: {str(e)}")
+        if upload.error is not None:
+            self._reject(upload.error)
+        upload.seek(0)
+        return upload
+
+    @staticmethod
+    def _frame_sizes(image):
+        """逐帧读取多页TIFF的帧头，不解码像素；单帧时返回空元组"""
+        if getattr(image, 'n_frames', 1) <= 1:
+            return ()
+        sizes = []
+        for frame in range(image.n_frames):
+            image.seek(frame)
+            sizes.append(image.size)
+        image.seek(0)
+        return tuple(sizes)
+    
+    @staticmethod
+    def _render_preview(path) -> bytes:
+        """生成缩小的JPEG预览图，JPEG在解码时按比例缩小，不解码整幅原图"""
+        preview_size = getattr(settings, 'PAGE_PREVIEW_SIZE', DEFAULT_PREVIEW_SIZE)
+        with Image.open(path) as image:
+            image.draft('RGB', (preview_size, preview_size))
+            return render_preview(image)
+
+
+def render_preview(image: Image.Image) -> bytes:
+    """
+    将已打开的图片缩小编码为JPEG预览图
+
+    Args:
+        image: 图片
+
+    Returns:
+        bytes: JPEG数据
+    """
+    preview_size = getattr(settings, 'PAGE_PREVIEW_SIZE', DEFAULT_PREVIEW_SIZE)
+    image = image.copy() if image.mode in ('L', 'RGB') else image.convert('RGB')
+    image.thumbnail((preview_size, preview_size), reducing_gap=2.0)
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=80, optimize=True)
+    return buffer.getvalue()
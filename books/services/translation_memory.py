@@ -0,0 +1,136 @@
+# services/translation_memory.py
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+import logging
+from django.db.models import F
+from django.utils import timezone
+from ..models import TranslationMemoryEntry
+
+logger = logging.getLogger(__name__)
+
+# 进程内LRU默认容量
+DEFAULT_LRU_SIZE = 10000
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# 进程内LRU层，由同一进程内所有 TranslationMemory 实例共享
+_lru: 'OrderedDict[str, str]' = OrderedDict()
+_lru_lock = threading.Lock()
+_stats = {'lru_hits': 0, 'db_hits': 0, 'misses': 0}
+
+
+def normalize_source_text(text: str) -> str:
+    """
+    规范化原文：统一Unicode兼容字符并去除空白，古文中的空白和换行不影响语义
+    
+    Args:
+        text: 原文
+        
+    Returns:
+        str: 规范化后的原文
+    """
+    return _WHITESPACE_RE.sub('', unicodedata.normalize('NFKC', text))
+
+
+class TranslationMemory:
+    """翻译记忆服务类：进程内LRU + 数据库持久层"""
+    
+    def __init__(self, model: str, prompt_version: int, lru_size: int = DEFAULT_LRU_SIZE):
+        self.model = model
+        self.prompt_version = prompt_version
+        self.lru_size = lru_size
+    
+    def key(self, text: str, target_language: str) -> str:
+        """由规范化原文、目标语言、模型和提示词版本计算缓存键"""
+        raw = f"{target_language}\x00{self.model}\x00{self.prompt_version}\x00{normalize_source_text(text)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+    
+    def get_many(self, texts: List[str], target_language: str) -> Dict[str, str]:
+        """
+        批量查询翻译记忆，先查进程内LRU，再用一次查询访问数据库
+        
+        Args:
+            texts: 原文列表
+            target_language: 目标语言
+            
+        Returns:
+            Dict[str, str]: 命中的 {缓存键: 译文}
+        """
+        keys = {self.key(text, target_language) for text in texts}
+        found = {}
+        with _lru_lock:
+            for key in keys:
+                if key in _lru:
+                    _lru.move_to_end(key)
+                    found[key] = _lru[key]
+            _stats['lru_hits'] += len(found)
+        
+        missing = keys - found.keys()
+        if missing:
+            db_found = dict(
+                TranslationMemoryEntry.objects.filter(key__in=missing).values_list('key', 'translated_text')
+            )
+            if db_found:
+                TranslationMemoryEntry.objects.filter(key__in=db_found.keys()).update(
+                    hit_count=F('hit_count') + 1,
+                    last_hit_at=timezone.now()
+                )
+                self._remember(db_found)
+                found.update(db_found)
+            with _lru_lock:
+                _stats['db_hits'] += len(db_found)
+                _stats['misses'] += len(missing) - len(db_found)
+        
+        return found
+    
+    def put_many(self, translations: List[Dict[str, str]], target_language: str) -> None:
+        """
+        写入翻译记忆
+        
+        Args:
+            translations: [{'source': 原文, 'translation': 译文}, ...]
+            target_language: 目标语言
+        """
+        entries = {}
+        for item in translations:
+            key = self.key(item['source'], target_language)
+            entries[key] = TranslationMemoryEntry(
+                key=key,
+                source_text=normalize_source_text(item['source']),
+                target_language=target_language,
+                model=self.model,
+                prompt_version=self.prompt_version,
+                translated_text=item['translation']
+            )
+        if not entries:
+            return
+        
+        TranslationMemoryEntry.objects.bulk_create(entries.values(), ignore_conflicts=True)
+        self._remember({key: entry.translated_text for key, entry in entries.items()})
+    
+    def _remember(self, translations: Dict[str, str]) -> None:
+        """写入进程内LRU，超出容量时淘汰最久未使用的条目"""
+        with _lru_lock:
+            for key, translation in translations.items():
+                _lru[key] = translation
+                _lru.move_to_end(key)
+            while len(_lru) > self.lru_size:
+                _lru.popitem(last=False)
+    
+    @staticmethod
+    def stats() -> Dict[str, Any]:
+        """
+        当前进程的翻译记忆命中统计
+        
+        Returns:
+            Dict: LRU命中数、数据库命中数、未命中数和命中率
+        """
+        with _lru_lock:
+            stats = dict(_stats)
+        lookups = stats['lru_hits'] + stats['db_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['lru_hits'] + stats['db_hits']) / lookups if lookups > 0 else 0
+        return stats
@@ -1,17 +1,100 @@
-
 # services/translation_service.py
+import json
 import openai
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from typing import List, Dict, Any, Optional
 import logging
+import random
+import time
+from .translation_memory import TranslationMemory, DEFAULT_LRU_SIZE
 
 logger = logging.getLogger(__name__)
 
+# 提示词版本，修改提示词时递增，使翻译记忆中的旧译文失效
+PROMPT_VERSION = 1
+
+# 默认翻译模型和并发配置，可通过 settings 中的 TRANSLATION_* 覆盖
+DEFAULT_MODEL = 'gpt-3.5-turbo'
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_MAX = 30.0
+DEFAULT_TIMEOUT = 60.0
+
+# 打包翻译：每个请求的固定开销（系统提示词、说明、JSON结构）估算的token数
+PACK_OVERHEAD_TOKENS = 120
+# 打包翻译单条文本的JSON结构开销
+PACK_ITEM_OVERHEAD_TOKENS = 12
+# 打包翻译响应的最大token数
+PACK_MAX_RESPONSE_TOKENS = 4000
+
+
+class PackParseError(ValueError):
+    """打包翻译的响应无法解析或与输入条目不对应"""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的token数：汉字等非ASCII字符按每字1个token，ASCII字符按每4字符1个token
+    
+    Args:
+        text: 文本
+        
+    Returns:
+        int: 估算的token数
+    """
+    non_ascii = sum(1 for char in text if ord(char) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+# 可重试的错误：限流、超时、连接失败和服务端错误
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
 class TranslationService:
     """翻译服务类"""
     
-    def __init__(self, api_key: str = None):
-        if api_key:
-            openai.api_key = api_key
+    def __init__(self, api_key: str = None, base_url: Optional[str] = None, model: Optional[str] = None,
+                 max_in_flight: Optional[int] = None, max_retries: Optional[int] = None,
+                 backoff_base: Optional[float] = None, backoff_max: Optional[float] = None,
+                 use_memory: Optional[bool] = None):
+        self.api_key = api_key or getattr(settings, 'TRANSLATION_API_KEY', None)
+        self.base_url = base_url or getattr(settings, 'TRANSLATION_API_BASE_URL', None)
+        self.model = model or getattr(settings, 'TRANSLATION_MODEL', DEFAULT_MODEL)
+        self.max_in_flight = max(1, max_in_flight or getattr(settings, 'TRANSLATION_MAX_IN_FLIGHT', DEFAULT_MAX_IN_FLIGHT))
+        self.max_retries = max_retries if max_retries is not None else getattr(
+            settings, 'TRANSLATION_MAX_RETRIES', DEFAULT_MAX_RETRIES
+        )
+        self.backoff_base = backoff_base if backoff_base is not None else DEFAULT_BACKOFF_BASE
+        self.backoff_max = backoff_max if backoff_max is not None else DEFAULT_BACKOFF_MAX
+        self._client = None
+        
+        # 翻译记忆：相同原文（规范化后）直接复用已有译文，不再调用API
+        if use_memory is None:
+            use_memory = getattr(settings, 'TRANSLATION_MEMORY_ENABLED', True)
+        self.memory = TranslationMemory(
+            self.model,
+            PROMPT_VERSION,
+            getattr(settings, 'TRANSLATION_MEMORY_LRU_SIZE', DEFAULT_LRU_SIZE)
+        ) if use_memory else None
+    
+    @property
+    def client(self) -> openai.OpenAI:
+        """延迟创建API客户端（客户端线程安全，可在并发请求间共享）"""
+        if self._client is None:
+            self._client = openai.OpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0,  # 重试由本服务统一控制
+                timeout=getattr(settings, 'TRANSLATION_TIMEOUT', DEFAULT_TIMEOUT)
+            )
+        return self._client
     
     def translate_text(self, text: str, target_language: str = 'zh-cn') -> str:
         """
@@ -24,31 +107,90 @@ class TranslationService:
         Returns:
             str: 翻译结果
         """
-        try:
-            if target_language == 'zh-cn':
-                prompt = f"请将以下古文翻译成现代简体中文，保持原意，语言流畅自然：\n\n{text}"
-            elif target_language == 'en':
-                prompt = f"Please translate the following classical Chinese text into English, maintaining the original meaning:\n\n{text}"
-            else:
-                prompt = f"请翻译以下文本：\n\n{text}"
+        result = self.translate_many([text], target_language)[0]
+        if result['error'] is not None:
+            return f"翻译失败: {result['error']}"
+        return result['translation']
+    
+    def translate_many(self, texts: List[str], target_language: str = 'zh-cn',
+                       max_in_flight: Optional[int] = None, pack_token_budget: int = 0,
+                       pack_groups: Optional[List[Any]] = None) -> List[Dict[str, Any]]:
+        """
+        并发翻译多段文本，结果顺序与输入一致，单条失败不影响其他文本
+        
+        Args:
+            texts: 待翻译文本列表
+            target_language: 目标语言
+            max_in_flight: 同时进行的请求数上限，默认使用 self.max_in_flight
+            pack_token_budget: 大于0时将相邻文本打包进同一请求，每个请求不超过该token预算
+            pack_groups: 与 texts 对应的分组标识（如页面ID），打包不会跨越分组
             
-            # 这里可以替换为其他翻译API，如百度翻译、腾讯翻译等
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "你是一个专业的古文翻译专家。"},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=500,
-                temperature=0.3
+        Returns:
+            List[Dict]: 每条包含 translation（失败时为None）和 error（成功时为None）
+        """
+        if not texts:
+            return []
+        
+        # 先查翻译记忆
+        remembered = {}
+        if self.memory is not None:
+            try:
+                remembered = self.memory.get_many([text for text in texts if text and text.strip()], target_language)
+            except Exception as e:
+                logger.warning(f"查询翻译记忆失败: {str(e)}")
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        # 未命中的文本按缓存键去重，同一批次中重复的原文只请求一次
+        requests: Dict[str, List[int]] = {}
+        for index, text in enumerate(texts):
+            key = self.memory.key(text, target_language) if self.memory is not None else str(index)
+            if key in remembered:
+                results[index] = {'translation': remembered[key], 'error': None}
+            else:
+                requests.setdefault(key, []).append(index)
+        
+        pending = [indexes[0] for indexes in requests.values()]
+        if pack_token_budget > 0:
+            packs = self._build_packs(
+                [texts[index] for index in pending],
+                pack_token_budget,
+                [pack_groups[index] for index in pending] if pack_groups is not None else None
             )
-            
-            translation = response.choices[0].message.content.strip()
-            return translation
-            
-        except Exception as e:
-            logger.error(f"翻译失败: {str(e)}")
-            return f"翻译失败: {str(e)}"
+        else:
+            packs = [[position] for position in range(len(pending))]
+        
+        def translate_pack(pack):
+            return self._translate_pack([texts[pending[position]] for position in pack], target_language)
+        
+        workers = min(max_in_flight or self.max_in_flight, len(packs))
+        if workers <= 1:
+            pack_results = [translate_pack(pack) for pack in packs]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pack_results = list(executor.map(translate_pack, packs))
+        
+        translated: List[Optional[Dict[str, Any]]] = [None] * len(pending)
+        for pack, results_of_pack in zip(packs, pack_results):
+            for position, result in zip(pack, results_of_pack):
+                translated[position] = result
+        
+        for indexes, result in zip(requests.values(), translated):
+            for index in indexes:
+                results[index] = dict(result)
+        
+        # 成功的译文写入翻译记忆
+        if self.memory is not None:
+            new_entries = [
+                {'source': texts[index], 'translation': result['translation']}
+                for index, result in zip(pending, translated)
+                if result['error'] is None and texts[index] and texts[index].strip()
+            ]
+            try:
+                self.memory.put_many(new_entries, target_language)
+            except Exception as e:
+                logger.warning(f"写入翻译记忆失败: {str(e)}")
+        
+        return results
     
     def batch_translate(self, texts: List[str], target_language: str = 'zh-cn') -> List[str]:
         """
@@ -61,9 +203,208 @@ class TranslationService:
         Returns:
             List[str]: 翻译结果列表
         """
-        translations = []
-        for text in texts:
-            translation = self.translate_text(text, target_language)
-            translations.append(translation)
+        return [
+            result['translation'] if result['error'] is None else f"翻译失败: {result['error']}"
+            for result in self.translate_many(texts, target_language)
+        ]
+    
+    def _build_packs(self, texts: List[str], token_budget: int,
+                     groups: Optional[List[Any]] = None) -> List[List[int]]:
+        """
+        将相邻文本按token预算分组
+        
+        Args:
+            texts: 待翻译文本列表
+            token_budget: 每个请求的token预算（含固定开销）
+            groups: 分组标识，打包不会跨越分组
+            
+        Returns:
+            List[List[int]]: 每个打包包含的文本下标
+        """
+        packs = []
+        current = []
+        current_tokens = PACK_OVERHEAD_TOKENS
+        for index, text in enumerate(texts):
+            tokens = estimate_tokens(text) + PACK_ITEM_OVERHEAD_TOKENS
+            crosses_group = groups is not None and current and groups[current[-1]] != groups[index]
+            if current and (crosses_group or current_tokens + tokens > token_budget):
+                packs.append(current)
+                current = []
+                current_tokens = PACK_OVERHEAD_TOKENS
+            current.append(index)
+            current_tokens += tokens
+        if current:
+            packs.append(current)
+        return packs
+    
+    def _translate_pack(self, texts: List[str], target_language: str) -> List[Dict[str, Any]]:
+        """
+        翻译一个打包，响应无法解析时拆分为更小的打包重试，最终退化为逐条翻译；
+        接口拒绝打包请求时直接逐条翻译
+        
+        Returns:
+            List[Dict]: 与 texts 对应的翻译结果
+        """
+        if len(texts) == 1:
+            try:
+                return [{'translation': self._translate_with_retry(texts[0], target_language), 'error': None}]
+            except Exception as e:
+                logger.error(f"翻译失败: {str(e)}")
+                return [{'translation': None, 'error': str(e)}]
+        
+        try:
+            translations = self._with_retry(self._request_packed_translation, texts, target_language)
+            return [{'translation': translation, 'error': None} for translation in translations]
+        except PackParseError as e:
+            logger.warning(f"打包翻译响应解析失败，拆分 {len(texts)} 条重试: {str(e)}")
+        except RETRYABLE_ERRORS as e:
+            # 重试耗尽说明服务暂不可用，逐条请求也会失败
+            logger.error(f"打包翻译失败: {str(e)}")
+            return [{'translation': None, 'error': str(e)} for _ in texts]
+        except openai.APIError as e:
+            # 接口拒绝打包请求（如不支持 response_format），退化为逐条翻译
+            logger.warning(f"打包翻译请求被拒绝，逐条翻译 {len(texts)} 条: {str(e)}")
+            return [self._translate_pack([text], target_language)[0] for text in texts]
+        except Exception as e:
+            logger.error(f"打包翻译失败: {str(e)}")
+            return [{'translation': None, 'error': str(e)} for _ in texts]
+        
+        middle = len(texts) // 2
+        return (
+            self._translate_pack(texts[:middle], target_language)
+            + self._translate_pack(texts[middle:], target_language)
+        )
+    
+    def _translate_with_retry(self, text: str, target_language: str) -> str:
+        """
+        调用翻译API，遇到限流或临时错误时按指数退避重试
+        
+        Raises:
+            Exception: 重试耗尽或遇到不可重试的错误
+        """
+        if not text or not text.strip():
+            return ''
+        
+        return self._with_retry(self._request_translation, text, target_language)
+    
+    def _with_retry(self, request, *args):
+        """执行请求，遇到限流或临时错误时按指数退避重试"""
+        attempt = 0
+        while True:
+            try:
+                return request(*args)
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                attempt += 1
+                logger.warning(f"翻译请求失败，{delay:.1f}s 后第 {attempt} 次重试: {str(e)}")
+                time.sleep(delay)
+    
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        """计算退避时间，优先使用服务端返回的 Retry-After"""
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            if retry_after is not None:
+                return min(float(retry_after), self.backoff_max)
+        except ValueError:
+            pass
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        # 加入随机抖动，避免并发请求同时重试
+        return delay * random.uniform(0.5, 1.0)
+    
+    def _language_instruction(self, target_language: str) -> str:
+        """按目标语言生成翻译说明"""
+        if target_language == 'zh-cn':
+            return "请将以下古文翻译成现代简体中文，保持原意，语言流畅自然："
+        elif target_language == 'en':
+            return "Please translate the following classical Chinese text into English, maintaining the original meaning:"
+        else:
+            return "请翻译以下文本："
+    
+    def _request_translation(self, text: str, target_language: str) -> str:
+        """
+        发送一次翻译请求
+        
+        Args:
+            text: 待翻译文本
+            target_language: 目标语言
+            
+        Returns:
+            str: 翻译结果
+        """
+        prompt = f"{self._language_instruction(target_language)}\n\n{text}"
+        
+        # 这里可以替换为其他翻译API，如百度翻译、腾讯翻译等
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "你是一个专业的古文翻译专家。"},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=500,
+            temperature=0.3
+        )
+        
+        translation = response.choices[0].message.content.strip()
+        return translation
+    
+    def _request_packed_translation(self, texts: List[str], target_language: str) -> List[str]:
+        """
+        在一次请求中翻译多段文本，输入输出均为带编号的JSON，按编号对应回原文
+        
+        Args:
+            texts: 待翻译文本列表
+            target_language: 目标语言
+            
+        Returns:
+            List[str]: 与 texts 对应的翻译结果
+            
+        Raises:
+            PackParseError: 响应不是合法JSON，或编号与输入不一致
+        """
+        items = [{'id': index, 'text': text} for index, text in enumerate(texts)]
+        prompt = (
+            f"{self._language_instruction(target_language)}\n\n"
+            "输入是JSON数组，每项包含 id 和 text。请逐项独立翻译，不要合并、拆分或遗漏任何一项，"
+            '只返回JSON对象：{"translations": [{"id": 编号, "translation": 译文}]}，编号与输入一致。\n\n'
+            f"{json.dumps(items, ensure_ascii=False)}"
+        )
+        input_tokens = sum(estimate_tokens(text) for text in texts)
+        
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": "你是一个专业的古文翻译专家。"},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=min(PACK_MAX_RESPONSE_TOKENS, 3 * input_tokens + PACK_ITEM_OVERHEAD_TOKENS * len(texts) + 100),
+            temperature=0.3,
+            response_format={"type": "json_object"}
+        )
+        
+        return self._parse_packed_response(response.choices[0].message.content, len(texts))
+    
+    def _parse_packed_response(self, content: Optional[str], expected: int) -> List[str]:
+        """
+        解析打包翻译的响应
+        
+        Raises:
+            PackParseError: 响应无法解析或编号不完整
+        """
+        content = (content or '').strip()
+        # 兼容模型用代码块包裹JSON的情况
+        if content.startswith('```'):
+            content = content.strip('`')
+            content = content[content.find('{'):] if '{' in content else content
+        try:
+            data = json.loads(content)
+            items = data['translations'] if isinstance(data, dict) else data
+            translations = {int(item['id']): str(item['translation']).strip() for item in items}
+        except (ValueError, KeyError, TypeError) as e:
+            raise PackParseError(f"无效的JSON响应: {str(e)}")
         
-        return translations
\ No newline at end of file
+        if set(translations) != set(range(expected)):
+            raise PackParseError(f"编号不一致: 期望 {expected} 条，得到 {sorted(translations)}")
+        return [translations[index] for index in range(expected)]
@@ -1,11 +1,237 @@
 from celery import shared_task
+from celery.signals import worker_init, worker_process_init
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
-from .models import OCRTask, BookPage, TextRegion
-from .services.ocr_service import OCRService
+from .models import OCRTask, BookPage, TextRegion, BookOCRStats, PageSprite
+from .services.page_snapshot import refresh_page_snapshot, schedule_snapshot_refresh
+from .services.page_revision import mark_regions_changed, reset_page_regions
 import logging
+import time
 
+# 注意：OCR/翻译服务依赖 cv2、easyocr（torch）等重量级库，只在worker执行任务时按需导入，
+# Web进程导入本模块时仅获得任务签名
 logger = logging.getLogger(__name__)
 
+
+@worker_init.connect
+def preload_ocr_models(**kwargs):
+    """
+    在prefork父进程中预加载OCR模型，fork出的子进程以写时复制方式共享权重
+    """
+    if not getattr(settings, 'OCR_PRELOAD_IN_PARENT', False):
+        return
+    try:
+        from .services.ocr_service import warm_up_readers
+        warm_up_readers([settings.OCR_LANGUAGES])
+    except Exception as e:
+        logger.error(f"父进程预加载OCR模型失败: {str(e)}")
+
+
+@worker_process_init.connect
+def warm_up_ocr_models(**kwargs):
+    """
+    worker子进程初始化时预热OCR模型，使之后的任务直接复用常驻模型
+    
+    默认关闭，由 OCR_WARMUP_ON_WORKER_INIT 在OCR队列的worker上开启，其他队列的worker不加载模型
+    """
+    if not getattr(settings, 'OCR_WARMUP_ON_WORKER_INIT', False):
+        return
+    try:
+        from .services.ocr_service import warm_up_readers
+        warm_up_readers([settings.OCR_LANGUAGES])
+    except Exception as e:
+        logger.error(f"预热OCR模型失败: {str(e)}")
+
+
+def _get_ocr_service():
+    """按配置创建OCR服务（模型来自进程内常驻模型池）"""
+    from .services.ocr_service import OCRService
+    
+    return OCRService(
+        settings.OCR_LANGUAGES,
+        tile_size=settings.OCR_TILE_SIZE,
+        tile_overlap=settings.OCR_TILE_OVERLAP,
+        tile_workers=settings.OCR_TILE_WORKERS,
+        tiled_min_pixels=settings.OCR_TILED_MIN_PIXELS,
+        reading_order_mode=settings.OCR_READING_ORDER,
+        prefetch_workers=settings.OCR_PREFETCH_WORKERS,
+        prefetch_depth=settings.OCR_PREFETCH_DEPTH,
+        working_dpi=settings.OCR_WORKING_DPI,
+        target_glyph_height=settings.OCR_TARGET_GLYPH_HEIGHT
+    )
+
+
+def _get_ocr_cache():
+    """按当前识别配置创建OCR结果缓存"""
+    from .services.ocr_cache import OCRCacheService
+    
+    return OCRCacheService.from_settings()
+
+
+def _store_ocr_cache(ocr_cache, content_hash, text_regions):
+    """写入OCR结果缓存，缓存写入失败不影响识别结果"""
+    try:
+        ocr_cache.put(content_hash, text_regions)
+    except Exception as e:
+        logger.warning(f"写入OCR缓存失败: {content_hash}, 错误: {str(e)}")
+
+
+def _record_transition(page, previous_status, previous_confidence, region_delta=0):
+    """
+    在当前事务中更新书籍OCR统计
+    
+    Args:
+        page: 已更新状态的书页
+        previous_status: 页面之前的OCR状态
+        previous_confidence: 页面之前的OCR置信度
+        region_delta: 文本区域数量的变化
+    """
+    deltas = {'region_count': region_delta}
+    if previous_status != page.ocr_status:
+        deltas[f'{previous_status}_count'] = -1
+        deltas[f'{page.ocr_status}_count'] = 1
+    
+    # confidence_sum 只累计当前处于已完成状态的页面
+    confidence_delta = 0
+    if previous_status == 'completed':
+        confidence_delta -= previous_confidence or 0
+    if page.ocr_status == 'completed':
+        confidence_delta += page.ocr_confidence or 0
+    deltas['confidence_sum'] = confidence_delta
+    
+    BookOCRStats.apply_delta(page.book_id, **deltas)
+
+
+def _publish_progress(page):
+    """事务提交后发布页面状态变化和书籍整体进度"""
+    from .services.ocr_progress import publish_book_event
+    
+    page_event = {
+        'type': 'page',
+        'page_id': page.id,
+        'page_number': page.page_number,
+        'status': page.ocr_status,
+        'confidence': page.ocr_confidence
+    }
+    
+    def publish():
+        publish_book_event(page.book_id, page_event)
+        stats = BookOCRStats.objects.filter(book_id=page.book_id).first()
+        if stats is None:
+            return
+        publish_book_event(page.book_id, {
+            'type': 'book',
+            'book_id': page.book_id,
+            'counts': {
+                'pending': stats.pending_count,
+                'processing': stats.processing_count,
+                'completed': stats.completed_count,
+                'failed': stats.failed_count
+            },
+            'done': stats.pending_count == 0 and stats.processing_count == 0
+        })
+    
+    transaction.on_commit(publish)
+
+
+def _mark_processing(task, page):
+    """将任务和页面标记为处理中"""
+    previous_status, previous_confidence = page.ocr_status, page.ocr_confidence
+    task.status = 'processing'
+    task.started_at = timezone.now()
+    page.ocr_status = 'processing'
+    
+    with transaction.atomic():
+        task.save(update_fields=['status', 'started_at'])
+        page.save(update_fields=['ocr_status'])
+        _record_transition(page, previous_status, previous_confidence)
+        _publish_progress(page)
+        schedule_snapshot_refresh([page.id])
+
+
+def _save_ocr_result(task, page, text_regions, ocr_version):
+    """
+    保存识别结果，并将任务和页面标记为已完成
+    
+    Args:
+        task: OCR任务
+        page: 书页
+        text_regions: OCRService返回的文本区域列表
+        ocr_version: 得到识别结果的识别版本
+        
+    Returns:
+        tuple: (文本区域数, 平均置信度)
+    """
+    regions = [
+        TextRegion(
+            page=page,
+            region_id=region_data['region_id'],
+            x=region_data['x'],
+            y=region_data['y'],
+            width=region_data['width'],
+            height=region_data['height'],
+            original_text=region_data['text'],
+            confidence=region_data['confidence'],
+            order_index=region_data['order_index']
+        )
+        for region_data in text_regions
+    ]
+    
+    # 计算平均置信度
+    region_count = len(regions)
+    avg_confidence = sum(region.confidence for region in regions) / region_count if region_count > 0 else 0
+    
+    previous_status, previous_confidence = page.ocr_status, page.ocr_confidence
+    page.ocr_status = 'completed'
+    page.ocr_confidence = avg_confidence
+    page.ocr_version = ocr_version
+    task.status = 'completed'
+    task.completed_at = timezone.now()
+    
+    # 在同一事务中替换旧的识别结果并更新状态和书籍统计，重复识别不会产生重复区域
+    with transaction.atomic():
+        revision = reset_page_regions(page.id)
+        for region in regions:
+            region.revision = revision
+        _, deleted = TextRegion.objects.filter(page=page).delete()
+        TextRegion.objects.bulk_create(regions)
+        page.save(update_fields=['ocr_status', 'ocr_confidence', 'ocr_version', 'image_hash'])
+        task.save(update_fields=['status', 'completed_at'])
+        _record_transition(
+            page, previous_status, previous_confidence,
+            region_delta=region_count - deleted.get(TextRegion._meta.label, 0)
+        )
+        _publish_progress(page)
+        schedule_snapshot_refresh([page.id])
+        # 区域变化后重新生成比对视图使用的区域雪碧图
+        transaction.on_commit(lambda: generate_page_sprite.delay(page.id))
+    
+    logger.debug(f"保存文本区域: 页面 {page.id}, 共 {region_count} 个")
+    
+    return region_count, avg_confidence
+
+
+def _mark_failed(task, page, error):
+    """将任务和页面标记为失败"""
+    try:
+        # 更新任务和页面失败状态
+        previous_status, previous_confidence = page.ocr_status, page.ocr_confidence
+        task.status = 'failed'
+        task.error_message = str(error)
+        task.completed_at = timezone.now()
+        page.ocr_status = 'failed'
+        
+        with transaction.atomic():
+            task.save(update_fields=['status', 'error_message', 'completed_at'])
+            page.save(update_fields=['ocr_status'])
+            _record_transition(page, previous_status, previous_confidence)
+            _publish_progress(page)
+            schedule_snapshot_refresh([page.id])
+    except Exception as e:
+        logger.error(f"更新OCR失败状态出错: {task.id}, 错误: {str(e)}")
+
+
 @shared_task
 def process_ocr_task(task_id):
 
@@ -15,70 +241,62 @@ def process_ocr_task(task_id):
     Args:
         task_id: OCR任务ID
     """
+    from .services.ocr_service import is_reader_loaded, get_resident_memory_mb, get_peak_memory_mb, reset_peak_memory
+    
+    task = page = None
     try:
         # 获取任务
-        task = OCRTask.objects.get(id=task_id)
+        task = OCRTask.objects.select_related('page').get(id=task_id)
         page = task.page
         
-        # 更新任务状态
-        task.status = 'processing'
-        task.started_at = timezone.now()
-        task.save()
-        
-        # 更新页面状态
-        page.ocr_status = 'processing'
-        page.save()
+        _mark_processing(task, page)
         
         logger.info(f"开始处理OCR任务: {task_id}, 页面: {page.id}")
         
-        # 初始化OCR服务
-        ocr_service = OCRService()
+        # 相同内容的图片直接复用缓存的识别结果
+        ocr_cache = _get_ocr_cache()
+        # 上传时已计算的哈希直接复用，不再读取整个文件
+        page.image_hash = ocr_cache.hash_page(page)
+        text_regions = ocr_cache.get(page.image_hash)
+        cache_hit = text_regions is not None
         
-        # 处理图片
-        image_path = page.image.path
-        text_regions = ocr_service.process_image(image_path)
-        
-        # 保存识别结果
-        total_confidence = 0
-        region_count = 0
-        
-        for region_data in text_regions:
-            text_region = TextRegion.objects.create(
-                page=page,
-                region_id=region_data['region_id'],
-                x=region_data['x'],
-                y=region_data['y'],
-                width=region_data['width'],
-                height=region_data['height'],
-                original_text=region_data['text'],
-                confidence=region_data['confidence'],
-                order_index=region_data['order_index']
-            )
+        reader_was_loaded = is_reader_loaded(settings.OCR_LANGUAGES)
+        startup_seconds = 0
+        decode_stats = {}
+        peak_rss_mb = None
+        if not cache_hit:
+            # 获取OCR服务（复用进程内常驻模型）
+            startup_begin = time.perf_counter()
+            ocr_service = _get_ocr_service()
+            startup_seconds = time.perf_counter() - startup_begin
             
-            total_confidence += region_data['confidence']
-            region_count += 1
-            
-            logger.debug(f"保存文本区域: {text_region.region_id}, 文本: {region_data['text'][:50]}")
-        
-        # 计算平均置信度
-        avg_confidence = total_confidence / region_count if region_count > 0 else 0
+            # 处理图片，统计本页解码和识别期间的峰值内存
+            image_path = page.image.path
+            peak_supported = reset_peak_memory()
+            text_regions = ocr_service.process_image(image_path, frame=page.image_frame, stats=decode_stats)
+            peak_rss_mb = get_peak_memory_mb() if peak_supported else None
+            _store_ocr_cache(ocr_cache, page.image_hash, text_regions)
         
-        # 更新页面状态
-        page.ocr_status = 'completed'
-        page.ocr_confidence = avg_confidence
-        page.save()
-        
-        # 更新任务状态
-        task.status = 'completed'
-        task.completed_at = timezone.now()
-        task.save()
+        # 保存识别结果
+        region_count, avg_confidence = _save_ocr_result(task, page, text_regions, ocr_cache.version)
         
-        logger.info(f"OCR任务完成: {task_id}, 识别了 {region_count} 个文本区域, 平均置信度: {avg_confidence:.2f}")
+        rss_mb = get_resident_memory_mb()
+        logger.info(
+            f"OCR任务完成: {task_id}, 识别了 {region_count} 个文本区域, 平均置信度: {avg_confidence:.2f}, "
+            f"缓存命中: {cache_hit}, 模型就绪耗时: {startup_seconds:.3f}s (常驻: {reader_was_loaded}), 常驻内存: {rss_mb:.0f}MB, "
+            f"峰值内存: {peak_rss_mb if peak_rss_mb is not None else '-'}MB, 解码: {decode_stats}"
+        )
         
         return {
             'success': True,
             'regions_count': region_count,
-            'avg_confidence': avg_confidence
+            'avg_confidence': avg_confidence,
+            'cache_hit': cache_hit,
+            'startup_seconds': startup_seconds,
+            'reader_resident': reader_was_loaded,
+            'rss_mb': rss_mb,
+            'peak_rss_mb': peak_rss_mb,
+            **decode_stats
         }
         
     except OCRTask.DoesNotExist:
@@ -88,19 +306,229 @@ def process_ocr_task(task_id):
     except Exception as e:
         logger.error(f"OCR任务处理失败: {task_id}, 错误: {str(e)}")
         
+        if task is not None:
+            _mark_failed(task, page, e)
+        
+        return {'success': False, 'error': str(e)}
+
+
+def dispatch_ocr_batches(task_ids):
+    """
+    按配置的批大小将OCR任务分组，所有批次作为一个group一次性发送，发送成功后记录发送时间
+    
+    Args:
+        task_ids: OCR任务ID列表
+        
+    Returns:
+        int: 发送的批次数
+        
+    Raises:
+        Exception: 消息队列不可用等发送失败的情况，此时任务的发送时间不变
+    """
+    from celery import group
+    
+    batch_pages = max(1, getattr(settings, 'OCR_BATCH_PAGES', 1))
+    batches = [task_ids[start:start + batch_pages] for start in range(0, len(task_ids), batch_pages)]
+    if not batches:
+        return 0
+    group(process_ocr_batch.s(batch) for batch in batches).apply_async()
+    OCRTask.objects.filter(id__in=task_ids).update(dispatched_at=timezone.now())
+    return len(batches)
+
+
+@shared_task
+def process_ocr_batch(task_ids):
+    """
+    批量处理多个页面的OCR任务，多页合并送入识别模型，单页失败不影响其他页面
+    
+    Args:
+        task_ids: OCR任务ID列表
+    """
+    from .services.ocr_service import get_resident_memory_mb, get_peak_memory_mb, reset_peak_memory
+    
+    tasks = list(OCRTask.objects.select_related('page').filter(id__in=task_ids))
+    missing = set(task_ids) - {task.id for task in tasks}
+    for task_id in missing:
+        logger.error(f"OCR任务不存在: {task_id}")
+    
+    # 逐个原子地认领仍为待处理的任务，重复发送的消息不会使同一页面被识别和计数两次
+    claimed = [
+        task for task in tasks
+        if OCRTask.objects.filter(id=task.id, status='pending').update(status='processing')
+    ]
+    for task in tasks:
+        if task not in claimed:
+            logger.warning(f"OCR任务已被处理，跳过: {task.id}, 状态: {task.status}")
+    tasks = claimed
+    
+    if not tasks:
+        return {'success': False, 'error': '没有待处理的任务'}
+    
+    results = {}
+    outcomes = {}
+    ocr_cache = _get_ocr_cache()
+    startup_seconds = 0
+    recognize_seconds = 0
+    recognized_pages = 0
+    decode_stats = {}
+    peak_rss_mb = None
+    try:
+        for task in tasks:
+            _mark_processing(task, task.page)
+        
+        logger.info(f"开始批量处理OCR任务: {[task.id for task in tasks]}")
+        
+        # 相同内容的图片直接复用缓存的识别结果，只识别未命中的页面
+        pending = []
+        cache_hits = 0
+        for task in tasks:
+            try:
+                task.page.image_hash = ocr_cache.hash_page(task.page)
+                cached = ocr_cache.get(task.page.image_hash)
+            except Exception as e:
+                outcomes[task.id] = e
+                continue
+            if cached is not None:
+                outcomes[task.id] = cached
+                cache_hits += 1
+            else:
+                pending.append(task)
+        
+        if pending:
+            # 获取OCR服务（复用进程内常驻模型）
+            startup_begin = time.perf_counter()
+            ocr_service = _get_ocr_service()
+            startup_seconds = time.perf_counter() - startup_begin
+            
+            recognize_begin = time.perf_counter()
+            peak_supported = reset_peak_memory()
+            page_stats = []
+            recognized = ocr_service.process_images(
+                [task.page.image.path for task in pending],
+                batch_size=settings.OCR_RECOGNIZER_BATCH_SIZE,
+                group_pages=settings.OCR_PIPELINE_GROUP_PAGES,
+                frames=[task.page.image_frame for task in pending],
+                stats=page_stats
+            )
+            recognize_seconds = time.perf_counter() - recognize_begin
+            peak_rss_mb = get_peak_memory_mb() if peak_supported else None
+            recognized_pages = len(pending)
+            for task, outcome, stats in zip(pending, recognized, page_stats):
+                outcomes[task.id] = outcome
+                decode_stats[task.id] = stats
+                if not isinstance(outcome, Exception):
+                    _store_ocr_cache(ocr_cache, task.page.image_hash, outcome)
+    except Exception as e:
+        # 整批失败（如模型加载失败）时所有页面标记为失败
+        logger.error(f"批量OCR任务处理失败: {task_ids}, 错误: {str(e)}")
+        for task in tasks:
+            _mark_failed(task, task.page, e)
+        return {'success': False, 'error': str(e)}
+    
+    # 将识别结果分发回各个页面
+    for task in tasks:
+        outcome = outcomes[task.id]
         try:
-            # 更新任务失败状态
-            task.status = 'failed'
-            task.error_message = str(e)
-            task.completed_at = timezone.now()
-            task.save()
+            if isinstance(outcome, Exception):
+                raise outcome
+            region_count, avg_confidence = _save_ocr_result(task, task.page, outcome, ocr_cache.version)
+            results[task.id] = {
+                'success': True,
+                'regions_count': region_count,
+                'avg_confidence': avg_confidence,
+                **decode_stats.get(task.id, {})
+            }
+        except Exception as e:
+            logger.error(f"OCR任务处理失败: {task.id}, 错误: {str(e)}")
+            _mark_failed(task, task.page, e)
+            results[task.id] = {'success': False, 'error': str(e)}
+    
+    completed = sum(1 for result in results.values() if result['success'])
+    logger.info(
+        f"批量OCR任务完成: {len(tasks)} 页, 成功 {completed} 页, 缓存命中 {cache_hits} 页, "
+        f"识别耗时: {recognize_seconds:.2f}s, "
+        f"模型就绪耗时: {startup_seconds:.3f}s, 常驻内存: {get_resident_memory_mb():.0f}MB, "
+        f"识别期间峰值内存: {peak_rss_mb if peak_rss_mb is not None else '-'}MB"
+    )
+    
+    return {
+        'success': completed == len(tasks),
+        'completed': completed,
+        'failed': len(tasks) - completed,
+        'cache_hits': cache_hits,
+        'recognize_seconds': recognize_seconds,
+        'pages_per_minute': recognized_pages * 60 / recognize_seconds if recognize_seconds > 0 else None,
+        'peak_rss_mb': peak_rss_mb,
+        'results': results
+    }
+
+
+@shared_task
+def reocr_regions(page_id, region_ids):
+    """
+    只重新识别页面中的指定文本区域：按区域边框裁剪原图，跳过检测直接运行识别模型，
+    原地更新原文和置信度，区域的校对、翻译关联保持不变
+    
+    Args:
+        page_id: 页面ID
+        region_ids: 文本区域ID列表
+    """
+    from django.db.models import Avg
+    
+    try:
+        page = BookPage.objects.get(id=page_id)
+        regions = list(
+            TextRegion.objects.filter(page_id=page_id, id__in=region_ids).only('id', 'x', 'y', 'width', 'height')
+        )
+        if not regions:
+            return {'success': False, 'error': '文本区域不存在'}
+        
+        started = time.perf_counter()
+        ocr_service = _get_ocr_service()
+        outcomes = ocr_service.recognize_regions(
+            page.image.path,
+            [(region.x, region.y, region.width, region.height) for region in regions],
+            frame=page.image_frame,
+            batch_size=settings.OCR_RECOGNIZER_BATCH_SIZE
+        )
+        recognize_seconds = time.perf_counter() - started
+        
+        updated = []
+        for region, outcome in zip(regions, outcomes):
+            if outcome is not None:
+                region.original_text, region.confidence = outcome
+                updated.append(region)
+        
+        with transaction.atomic():
+            TextRegion.objects.bulk_update(updated, ['original_text', 'confidence'])
             
-            # 更新页面状态
-            page.ocr_status = 'failed'
-            page.save()
-        except:
-            pass
+            # 页面置信度为全部区域的平均值，随之更新书籍统计
+            page = BookPage.objects.select_for_update().get(id=page_id)
+            if page.ocr_status == 'completed':
+                previous_confidence = page.ocr_confidence
+                page.ocr_confidence = page.text_regions.aggregate(avg=Avg('confidence'))['avg'] or 0
+                page.save(update_fields=['ocr_confidence'])
+                _record_transition(page, page.ocr_status, previous_confidence)
+            
+            # 所有请求的区域都递增版本，编辑器据此判断重新识别已完成（包括边框在图片外未能识别的区域）
+            mark_regions_changed((page_id, region.id) for region in regions)
         
+        logger.info(
+            f"重新识别文本区域: 页面 {page_id}, {len(updated)}/{len(regions)} 个区域, 耗时 {recognize_seconds:.2f}s"
+        )
+        updated_ids = [region.id for region in updated]
+        return {
+            'success': True,
+            'page_id': page_id,
+            'updated': updated_ids,
+            'skipped': sorted({region.id for region in regions} - set(updated_ids)),
+            'recognize_seconds': recognize_seconds
+        }
+    except BookPage.DoesNotExist:
+        logger.warning(f"重新识别的页面不存在: {page_id}")
+        return {'success': False, 'error': '页面不存在'}
+    except Exception as e:
+        logger.error(f"重新识别文本区域失败: 页面 {page_id}, 错误: {str(e)}")
         return {'success': False, 'error': str(e)}
 
 
@@ -114,66 +542,171 @@ def batch_translate_book(book_id, target_language='zh-cn'):
         target_language: 目标语言
     """
     try:
-        from .models import Book
+        from .models import Book, Translation
+        from .services.translation_memory import TranslationMemory
         from .services.translation_service import TranslationService
         
-        book = Book.objects.get(id=book_id)
+        Book.objects.only('id').get(id=book_id)
         translation_service = TranslationService()
         
-        total_regions = 0
+        chunk_size = getattr(settings, 'TRANSLATION_CHUNK_SIZE', 200)
+        # 同一页面的相邻区域打包进同一请求，减少请求数和提示词开销
+        pack_token_budget = getattr(settings, 'TRANSLATION_PACK_TOKEN_BUDGET', 0)
+        total_regions = TextRegion.objects.filter(page__book_id=book_id).count()
         translated_regions = 0
+        failed_regions = 0
+        pending = []
         
-        # 遍历所有页面
-        for page in book.pages.all():
-            # 遍历每个文本区域
-            for region in page.text_regions.all():
-                total_regions += 1
-                
-                # 跳过已翻译的区域
-                if hasattr(region, 'translation'):
+        def flush():
+            # 并发翻译当前这一批区域，并保存成功的结果
+            nonlocal translated_regions, failed_regions
+            results = translation_service.translate_many(
+                [text for _, text in pending],
+                target_language,
+                pack_token_budget=pack_token_budget,
+                pack_groups=[region.page_id for region, _ in pending]
+            )
+            translations = []
+            for (region, _), result in zip(pending, results):
+                if result['error'] is not None:
+                    logger.error(f"翻译失败: 区域 {region.id}, 错误: {result['error']}")
+                    failed_regions += 1
                     continue
                 
-                try:
-                    # 获取要翻译的文本（优先校对后文本）
-                    text_to_translate = region.original_text
-                    if hasattr(region, 'correction'):
-                        text_to_translate = region.correction.corrected_text
-                    
-                    # 翻译文本
-                    translated_text = translation_service.translate_text(
-                        text_to_translate, 
-                        target_language
-                    )
-                    
-                    # 保存翻译结果
-                    from .models import Translation
-                    Translation.objects.create(
-                        text_region=region,
-                        translated_text=translated_text,
-                        translation_language=target_language,
-                        translator_id=1,  # 系统用户
-                        translation_method='auto'
-                    )
-                    
-                    translated_regions += 1
-                    logger.info(f"翻译完成: 区域 {region.id}")
-                    
-                except Exception as e:
-                    logger.error(f"翻译失败: 区域 {region.id}, 错误: {str(e)}")
-                    continue
+                translations.append(Translation(
+                    text_region_id=region.id,
+                    translated_text=result['translation'],
+                    translation_language=target_language,
+                    translator_id=1,  # 系统用户
+                    translation_method='auto'
+                ))
+            
+            # 批量保存翻译结果；其他进程已翻译的区域会被忽略
+            with transaction.atomic():
+                Translation.objects.bulk_create(translations, ignore_conflicts=True)
+                mark_regions_changed(
+                    (region.page_id, region.id)
+                    for (region, _), result in zip(pending, results) if result['error'] is None
+                )
+            translated_regions += len(translations)
+            logger.info(f"翻译进度: 书籍 {book_id}, 已翻译 {translated_regions} 个区域")
+            pending.clear()
+        
+        # 单条流式查询：在SQL中过滤已翻译的区域，并一次取出校对文本
+        regions = (
+            TextRegion.objects
+            .filter(page__book_id=book_id, translation__isnull=True)
+            .select_related('correction')
+            .only('id', 'page_id', 'original_text', 'correction__corrected_text')
+            .order_by('page__page_number', 'order_index')
+        )
+        for region in regions.iterator(chunk_size=chunk_size):
+            # 获取要翻译的文本（优先校对后文本）
+            text_to_translate = region.original_text
+            correction = getattr(region, 'correction', None)
+            if correction is not None:
+                text_to_translate = correction.corrected_text
+            
+            pending.append((region, text_to_translate))
+            if len(pending) >= chunk_size:
+                flush()
+        
+        if pending:
+            flush()
         
-        logger.info(f"批量翻译完成: 书籍 {book_id}, 总区域数: {total_regions}, 翻译数: {translated_regions}")
+        memory_stats = TranslationMemory.stats()
+        logger.info(
+            f"批量翻译完成: 书籍 {book_id}, 总区域数: {total_regions}, 翻译数: {translated_regions}, 失败数: {failed_regions}, "
+            f"翻译记忆命中率: {memory_stats['hit_rate']:.1%}"
+        )
         
         return {
             'success': True,
             'total_regions': total_regions,
-            'translated_regions': translated_regions
+            'translated_regions': translated_regions,
+            'failed_regions': failed_regions,
+            'translation_memory': memory_stats
         }
         
     except Exception as e:
         logger.error(f"批量翻译失败: 书籍 {book_id}, 错误: {str(e)}")
         return {'success': False, 'error': str(e)}
 
+@shared_task
+def refresh_page_snapshots(page_ids):
+    """
+    重建过期的页面快照
+    
+    Args:
+        page_ids: 页面ID列表
+    """
+    for page_id in page_ids:
+        try:
+            refresh_page_snapshot(page_id)
+        except Exception as e:
+            logger.error(f"刷新页面快照失败: 页面 {page_id}, 错误: {str(e)}")
+
+
+@shared_task
+def generate_page_tiles(page_id, force=False):
+    """
+    生成页面图片的瓦片金字塔，完成后刷新页面快照使编辑器获得瓦片元数据
+    
+    Args:
+        page_id: 页面ID
+        force: 是否忽略已有瓦片重新生成
+    """
+    from .services.page_tiles import generate_page_tiles as build_tiles
+    
+    try:
+        page = BookPage.objects.get(id=page_id)
+        tiles = build_tiles(page, force=force)
+        schedule_snapshot_refresh([page.id])
+        return {
+            'page_id': page.id,
+            'version': tiles.version,
+            'max_level': tiles.max_level,
+            'tile_count': tiles.tile_count
+        }
+    except BookPage.DoesNotExist:
+        logger.warning(f"生成瓦片的页面不存在: {page_id}")
+        return None
+    except Exception as e:
+        logger.error(f"生成页面瓦片失败: 页面 {page_id}, 错误: {str(e)}")
+        raise
+
+
+@shared_task
+def generate_page_sprite(page_id, force=False):
+    """
+    生成页面的区域雪碧图，区域坐标和图片未变化时直接跳过
+    
+    Args:
+        page_id: 页面ID
+        force: 是否忽略已有雪碧图重新生成
+    """
+    from .services.page_sprite import generate_page_sprite as build_sprite
+    
+    try:
+        page = BookPage.objects.get(id=page_id)
+        previous_version = PageSprite.objects.filter(page=page).values_list('version', flat=True).first()
+        sprite = build_sprite(page, force=force)
+        version = sprite.version if sprite is not None else None
+        if version != previous_version:
+            schedule_snapshot_refresh([page.id])
+        return {
+            'page_id': page.id,
+            'version': version,
+            'regenerated': version != previous_version or force
+        }
+    except BookPage.DoesNotExist:
+        logger.warning(f"生成雪碧图的页面不存在: {page_id}")
+        return None
+    except Exception as e:
+        logger.error(f"生成区域雪碧图失败: 页面 {page_id}, 错误: {str(e)}")
+        raise
+
+
 @shared_task
 def cleanup_old_ocr_tasks():
     """
@@ -1,3 +1,465 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from contextlib import nullcontext
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .models import Book, BookOCRStats, BookPage, OCRTask, TextCorrection, TextRegion, Translation
+from .services.page_snapshot import refresh_page_snapshot
+from .services.translation_service import TranslationService
+from .tasks import _mark_failed, _mark_processing, _save_ocr_result
+
+
+class PageDataQueryCountTests(TestCase):
+    """get_page_data 的查询数不随文本区域数量增长"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader', password='secret')
+        self.book = Book.objects.create(title='测试书籍', created_by=self.user)
+        self.client.force_login(self.user)
+
+    def _create_page(self, page_number, region_count):
+        """创建带文本区域、校对和翻译的已识别页面，并生成页面快照"""
+        page = BookPage.objects.create(
+            book=self.book,
+            page_number=page_number,
+            image=f'book_pages/test_{page_number}.png',
+            ocr_status='completed'
+        )
+        for index in range(region_count):
+            region = TextRegion.objects.create(
+                page=page,
+                region_id=f'region_{index}',
+                x=10, y=index * 20, width=100, height=18,
+                original_text=f'原文{index}',
+                confidence=0.9,
+                order_index=index
+            )
+            TextCorrection.objects.create(text_region=region, corrected_text=f'校对{index}', corrector=self.user)
+            Translation.objects.create(text_region=region, translated_text=f'译文{index}', translator=self.user)
+        refresh_page_snapshot(page.id)
+        return page
+
+    def _count_queries(self, page):
+        url = reverse('books:get_page_data', args=[page.id])
+        with self.assertNumQueries(3) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['text_regions']), page.text_regions.count())
+        return len(context.captured_queries)
+
+    def test_query_count_independent_of_region_count(self):
+        small = self._create_page(1, 5)
+        large = self._create_page(2, 50)
+        self.assertEqual(self._count_queries(small), self._count_queries(large))
+
+
+
+class PageDeltaSyncTests(TestCase):
+    """get_page_data?since= 的增量同步：版本号、删除记录和整页重新识别"""
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='editor', password='secret')
+        book = Book.objects.create(title='测试书籍', created_by=self.user)
+        self.page = BookPage.objects.create(book=book, page_number=1, image='book_pages/test.png', ocr_status='completed')
+        self.regions = [
+            TextRegion.objects.create(
+                page=self.page, region_id=f'region_{index}', x=0, y=index * 20, width=10, height=10,
+                original_text=f'原文{index}', confidence=0.9, order_index=index
+            )
+            for index in range(3)
+        ]
+        self.client.force_login(self.user)
+
+    def _revision(self):
+        self.page.refresh_from_db()
+        return self.page.revision
+
+    def _delta(self, since):
+        response = self.client.get(reverse('books:get_page_data', args=[self.page.id]), {'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_correction_returns_only_changed_region(self):
+        since = self._revision()
+        response = self.client.post(
+            reverse('books:save_correction', args=[self.regions[1].id]),
+            json.dumps({'corrected_text': '校对'}), content_type='application/json'
+        )
+        self.assertTrue(response.json()['success'])
+
+        delta = self._delta(since)
+        self.assertFalse(delta['full'])
+        self.assertEqual(delta['page']['revision'], since + 1)
+        self.assertEqual([region['id'] for region in delta['text_regions']], [self.regions[1].id])
+        self.assertEqual(delta['deleted_region_ids'], [])
+
+        # 已同步到最新版本时没有变化
+        latest = self._delta(since + 1)
+        self.assertEqual((latest['text_regions'], latest['deleted_region_ids']), ([], []))
+
+    def test_region_deletion_leaves_tombstone(self):
+        since = self._revision()
+        deleted_id = self.regions[0].id
+        response = self.client.post(
+            reverse('admin:books_textregion_delete', args=[deleted_id]), {'post': 'yes'}
+        )
+        self.assertEqual(response.status_code, 302)
+
+        delta = self._delta(since)
+        self.assertFalse(delta['full'])
+        self.assertEqual(delta['text_regions'], [])
+        self.assertEqual(delta['deleted_region_ids'], [deleted_id])
+
+    def test_ocr_rerun_forces_full_sync(self):
+        since = self._revision()
+        task = OCRTask.objects.create(page=self.page, status='processing')
+        _save_ocr_result(task, self.page, [
+            {'region_id': 'new', 'x': 1, 'y': 2, 'width': 3, 'height': 4, 'text': '新', 'confidence': 0.8, 'order_index': 0}
+        ], 'test-version')
+
+        self.page.refresh_from_db()
+        self.assertGreater(self.page.reset_revision, since)
+        delta = self._delta(since)
+        self.assertTrue(delta['full'])
+        self.assertEqual([region['original_text'] for region in delta['text_regions']], ['新'])
+
+    def test_since_ahead_of_server_forces_full_sync(self):
+        delta = self._delta(self._revision() + 5)
+        self.assertTrue(delta['full'])
+        self.assertEqual(len(delta['text_regions']), len(self.regions))
+
+    def test_invalid_since_is_rejected(self):
+        response = self.client.get(reverse('books:get_page_data', args=[self.page.id]), {'since': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+
+class BookOCRStatsTests(TestCase):
+    """OCR状态流转和后台删除后，增量维护的书籍统计与重新计算的结果一致"""
+
+    fields = ['pending_count', 'processing_count', 'completed_count', 'failed_count', 'confidence_sum', 'region_count']
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='admin', password='secret')
+        self.book = Book.objects.create(title='测试书籍', created_by=self.user)
+        self.pages = [
+            BookPage.objects.create(book=self.book, page_number=number, image=f'book_pages/{number}.png')
+            for number in range(1, 4)
+        ]
+        self.tasks = [OCRTask.objects.create(page=page) for page in self.pages]
+        BookOCRStats.apply_delta(self.book.id, pending_count=len(self.pages))
+        self.client.force_login(self.user)
+
+    def assertStatsConsistent(self):
+        current = BookOCRStats.objects.filter(book=self.book).values(*self.fields).get()
+        BookOCRStats.rebuild(self.book.id)
+        rebuilt = BookOCRStats.objects.filter(book=self.book).values(*self.fields).get()
+        self.assertEqual(current, rebuilt)
+        return current
+
+    def _recognize(self, index, confidences):
+        task, page = self.tasks[index], self.pages[index]
+        _mark_processing(task, page)
+        self.assertStatsConsistent()
+        regions = [
+            {'region_id': f'r{i}', 'x': 0, 'y': i, 'width': 1, 'height': 1, 'text': '字', 'confidence': confidence, 'order_index': i}
+            for i, confidence in enumerate(confidences)
+        ]
+        _save_ocr_result(task, page, regions, 'test-version')
+
+    def test_transitions_match_rebuild(self):
+        self._recognize(0, [0.5, 0.7])
+        self._recognize(1, [0.9])
+        _mark_processing(self.tasks[2], self.pages[2])
+        _mark_failed(self.tasks[2], self.pages[2], RuntimeError('识别失败'))
+        stats = self.assertStatsConsistent()
+        self.assertEqual(
+            (stats['pending_count'], stats['processing_count'], stats['completed_count'], stats['failed_count']),
+            (0, 0, 2, 1)
+        )
+        self.assertEqual(stats['region_count'], 3)
+
+        # 已完成页面重新识别：先退出已完成状态，区域替换后再计入
+        self._recognize(0, [0.6, 0.6, 0.6])
+        stats = self.assertStatsConsistent()
+        self.assertEqual(stats['region_count'], 4)
+        self.assertAlmostEqual(stats['confidence_sum'], 1.5)
+
+    def test_admin_deletions_update_stats(self):
+        self._recognize(0, [0.5, 0.7])
+        self._recognize(1, [0.9])
+
+        region = self.pages[0].text_regions.first()
+        response = self.client.post(reverse('admin:books_textregion_delete', args=[region.id]), {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.assertStatsConsistent()['region_count'], 2)
+
+        response = self.client.post(reverse('admin:books_bookpage_delete', args=[self.pages[1].id]), {'post': 'yes'})
+        self.assertEqual(response.status_code, 302)
+        stats = self.assertStatsConsistent()
+        self.assertEqual((stats['completed_count'], stats['pending_count'], stats['region_count']), (1, 1, 1))
+
+        response = self.client.post(reverse('admin:books_bookpage_changelist'), {
+            'action': 'delete_selected', 'post': 'yes', '_selected_action': [self.pages[0].id, self.pages[2].id]
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.assertStatsConsistent(), dict.fromkeys(self.fields, 0))
+
+
+class OCRProgressStreamTests(TestCase):
+    """OCR进度流只在ASGI下且事件可达Web进程时推送，否则返回204让页面轮询"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='owner', password='secret')
+        self.book = Book.objects.create(title='测试书籍', created_by=self.user)
+        BookPage.objects.create(book=self.book, page_number=1, image='book_pages/test.png')
+        self.url = reverse('books:ocr_progress_stream', args=[self.book.id])
+
+    def test_wsgi_request_gets_no_content(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 204)
+
+    @override_settings(OCR_PROGRESS_REDIS_URL=None, CELERY_TASK_ALWAYS_EAGER=False)
+    async def test_without_shared_broker_gets_no_content(self):
+        await self.async_client.aforce_login(self.user)
+        with self.assertLogs('books.services.ocr_progress', 'WARNING'), \
+                mock.patch('books.services.ocr_progress._push_warning_logged', False):
+            response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 204)
+
+    @override_settings(OCR_PROGRESS_REDIS_URL=None, CELERY_TASK_ALWAYS_EAGER=True)
+    async def test_asgi_request_streams_snapshot(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        stream = aiter(response.streaming_content)
+        first = await anext(stream)
+        await stream.aclose()
+        self.assertTrue(first.startswith(b'event: snapshot'))
+
+class SaveCorrectionsTests(TestCase):
+    """批量保存校对时必须提供 base_updated_at，版本不一致的条目按冲突拒绝"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='corrector', password='secret')
+        book = Book.objects.create(title='测试书籍', created_by=self.user)
+        page = BookPage.objects.create(book=book, page_number=1, image='book_pages/test.png', ocr_status='completed')
+        self.region = TextRegion.objects.create(
+            page=page, region_id='region_0', x=0, y=0, width=10, height=10,
+            original_text='原文', confidence=0.9, order_index=0
+        )
+        self.url = reverse('books:save_corrections', args=[page.id])
+        self.client.force_login(self.user)
+
+    def _post(self, **item):
+        item = {'region_id': self.region.id, 'corrected_text': '校对', **item}
+        return self.client.post(self.url, json.dumps({'corrections': [item]}), content_type='application/json')
+
+    def test_missing_base_updated_at_is_rejected(self):
+        response = self._post()
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(TextCorrection.objects.exists())
+
+    def test_stale_base_updated_at_conflicts(self):
+        created = self._post(base_updated_at=None).json()
+        self.assertEqual(created['results'][0]['status'], 'created')
+
+        # 基于“尚无校对”的旧版本再次提交
+        conflict = self._post(base_updated_at=None, corrected_text='另一位校对').json()
+        self.assertEqual(conflict['results'][0]['status'], 'conflict')
+        self.assertEqual(conflict['results'][0]['corrected_text'], '校对')
+
+        updated = self._post(base_updated_at=created['results'][0]['updated_at'], corrected_text='再次校对').json()
+        self.assertEqual(updated['results'][0]['status'], 'updated')
+
+
+class StubTranslationHandler(BaseHTTPRequestHandler):
+    """
+    模拟翻译API：每个请求延迟返回；偶数编号的文本第一次请求时返回429和Retry-After，
+    包含 FAIL 的文本返回400
+    """
+    delay = 0.05
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        text = body['messages'][-1]['content'].rsplit('\n\n', 1)[-1]
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            server.attempts[text] = server.attempts.get(text, 0) + 1
+            attempt = server.attempts[text]
+        try:
+            time.sleep(self.delay)
+            if 'FAIL' in text:
+                self._send_json(400, {'error': {'message': 'bad request', 'type': 'invalid_request_error'}})
+            elif int(text.split('-')[1]) % 2 == 0 and attempt == 1:
+                self._send_json(429, {'error': {'message': 'rate limited', 'type': 'rate_limit'}},
+                                {'Retry-After': '0.01'})
+            else:
+                self._send_json(200, {
+                    'id': 'stub', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': f'译{text}'},
+                        'finish_reason': 'stop'
+                    }]
+                })
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def _send_json(self, status, data, headers=None):
+        content = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(testcase, handler_class):
+    """在127.0.0.1的随机端口启动模拟API，测试结束时关闭"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler_class)
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.attempts = {}
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    testcase.addCleanup(thread.join)
+    testcase.addCleanup(server.server_close)
+    testcase.addCleanup(server.shutdown)
+    return server
+
+
+class TranslationServiceStubServerTests(SimpleTestCase):
+    """使用本地模拟API测试并发翻译的顺序、限流重试、错误隔离和并发上限"""
+
+    def setUp(self):
+        self.server = start_stub_server(self, StubTranslationHandler)
+        self.service = TranslationService(
+            api_key='test-key',
+            base_url=f'http://127.0.0.1:{self.server.server_address[1]}/v1',
+            max_in_flight=3,
+            max_retries=3,
+            backoff_base=0.01,
+            use_memory=False
+        )
+
+    def test_translate_many(self):
+        texts = [f'text-{index}' for index in range(12)]
+        texts[5] = 'text-5-FAIL'
+        with self.assertLogs('books.services.translation_service', 'WARNING'):
+            results = self.service.translate_many(texts)
+
+        self.assertEqual(len(results), len(texts))
+        for index, (text, result) in enumerate(zip(texts, results)):
+            if index == 5:
+                self.assertIsNone(result['translation'])
+                self.assertIsNotNone(result['error'])
+            else:
+                self.assertEqual(result, {'translation': f'译{text}', 'error': None})
+
+        # 被限流的文本重试了一次，其余文本（包括不可重试的400）只请求一次
+        for index, text in enumerate(texts):
+            expected = 2 if index % 2 == 0 else 1
+            self.assertEqual(self.server.attempts[text], expected, text)
+
+        self.assertLessEqual(self.server.max_in_flight, 3)
+        self.assertGreater(self.server.max_in_flight, 1)
+
+
+
+class StubPackTranslationHandler(StubTranslationHandler):
+    """
+    模拟打包翻译API：按 server.pack_mode 处理带 response_format 的打包请求，
+    reject 返回400，malformed 返回非JSON，missing 缺少最后一项；逐条请求总是成功
+    """
+    delay = 0
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        content = body['messages'][-1]['content'].rsplit('\n\n', 1)[-1]
+        if 'response_format' not in body:
+            server.requests.append(('single', content))
+            self._send_completion(body, f'译{content}')
+            return
+
+        items = json.loads(content)
+        server.requests.append(('pack', [item['text'] for item in items]))
+        translations = [{'id': item['id'], 'translation': f"译{item['text']}"} for item in items]
+        if server.pack_mode == 'reject':
+            self._send_json(400, {'error': {'message': 'response_format is not supported', 'type': 'invalid_request_error'}})
+        elif server.pack_mode == 'malformed':
+            self._send_completion(body, '{"translations": [')
+        elif server.pack_mode == 'missing':
+            self._send_completion(body, json.dumps({'translations': translations[:-1]}))
+        else:
+            self._send_completion(body, json.dumps({'translations': translations}))
+
+    def _send_completion(self, body, content):
+        self._send_json(200, {
+            'id': 'stub', 'object': 'chat.completion', 'created': 0, 'model': body['model'],
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}]
+        })
+
+
+class TranslationServicePackingTests(SimpleTestCase):
+    """打包翻译：响应无法解析时拆分重试，接口拒绝打包请求时逐条翻译"""
+
+    texts = [f'text-{index}' for index in range(4)]
+
+    def setUp(self):
+        self.server = start_stub_server(self, StubPackTranslationHandler)
+        self.service = TranslationService(
+            api_key='test-key',
+            base_url=f'http://127.0.0.1:{self.server.server_address[1]}/v1',
+            max_in_flight=1,
+            max_retries=0,
+            use_memory=False
+        )
+
+    def _translate(self, pack_mode):
+        self.server.pack_mode = pack_mode
+        with self.assertLogs('books.services.translation_service', 'WARNING') if pack_mode != 'ok' else nullcontext():
+            results = self.service.translate_many(self.texts, pack_token_budget=10000)
+        self.assertEqual(results, [{'translation': f'译{text}', 'error': None} for text in self.texts])
+        return self.server.requests
+
+    def test_pack(self):
+        self.assertEqual(self._translate('ok'), [('pack', self.texts)])
+
+    def test_malformed_json_splits_down_to_single_requests(self):
+        requests = self._translate('malformed')
+        self.assertEqual(requests, [
+            ('pack', self.texts),
+            ('pack', self.texts[:2]),
+            ('single', self.texts[0]),
+            ('single', self.texts[1]),
+            ('pack', self.texts[2:]),
+            ('single', self.texts[2]),
+            ('single', self.texts[3]),
+        ])
+
+    def test_missing_ids_split_the_pack(self):
+        requests = self._translate('missing')
+        self.assertEqual(requests[:2], [('pack', self.texts), ('pack', self.texts[:2])])
+        self.assertEqual(sorted(text for kind, text in requests if kind == 'single'), self.texts)
+
+    def test_rejected_pack_falls_back_to_single_requests(self):
+        requests = self._translate('reject')
+        self.assertEqual(requests, [('pack', self.texts)] + [('single', text) for text in self.texts])
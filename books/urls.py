@@ -10,8 +10,13 @@ urlpatterns = [
     path('create/', views.create_book, name='create_book'),
     path('book/<int:book_id>/', views.book_detail, name='book_detail'),
     path('book/<int:book_id>/upload/', views.upload_pages, name='upload_pages'),
+    path('book/<int:book_id>/ocr-progress/', views.book_ocr_progress, name='book_ocr_progress'),
+    path('book/<int:book_id>/ocr-progress/stream/', views.ocr_progress_stream, name='ocr_progress_stream'),
     path('page/<int:page_id>/editor/', views.page_editor, name='page_editor'),
     path('page/<int:page_id>/data/', views.get_page_data, name='get_page_data'),
+    path('page/<int:page_id>/tiles/<slug:version>/<int:level>/<int:col>_<int:row>.<slug:fmt>', views.get_page_tile, name='get_page_tile'),
+    path('page/<int:page_id>/corrections/', views.save_corrections, name='save_corrections'),
+    path('page/<int:page_id>/regions/reocr/', views.reocr_page_regions, name='reocr_page_regions'),
     path('page/<int:page_id>/ocr-status/', views.check_ocr_status, name='check_ocr_status'),
     path('region/<int:region_id>/correct/', views.save_correction, name='save_correction'),
     path('region/<int:region_id>/translate/', views.translate_region, name='translate_region'),
@@ -1,21 +1,159 @@
 # views.py
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, JsonResponse, Http404, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, condition
 from django.contrib.auth.decorators import login_required
+from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.conf import settings
+from celery import group
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+import gzip
 import json
 import os
-from .models import Book, BookPage, TextRegion, TextCorrection, Translation, OCRTask
-from .services.ocr_service import OCRService
-from .services.translation_service import TranslationService
-from .tasks import process_ocr_task  # 异步任务
+from .models import Book, BookPage, TextRegion, TextCorrection, Translation, OCRTask, BookOCRStats
+from .services.ocr_cache import OCRCacheService
+from .services.page_snapshot import get_page_snapshot
+from .services.page_upload import PageImageUploadHandler
+from .services.page_revision import build_page_delta, mark_regions_changed
+from .tasks import dispatch_ocr_batches, generate_page_tiles, generate_page_sprite, reocr_regions  # 异步任务（仅导入任务签名，OCR/翻译依赖只在worker中加载）
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 批量保存校对单次请求的最大条目数
+MAX_BULK_CORRECTIONS = 1000
+# 单次重新识别的最大区域数，保证交互延迟
+MAX_REOCR_REGIONS = 50
+
+
+def _dispatch_ocr_batches(task_ids):
+    """
+    发送OCR任务
+    
+    在事务提交后调用，此时书页已经入库：发送失败只记录日志，任务保持待处理且没有发送时间，
+    可通过 manage.py requeue_ocr_tasks 重新发送
+    """
+    try:
+        dispatch_ocr_batches(task_ids)
+    except Exception as e:
+        logger.error(f"发送OCR任务失败，任务保持待处理: {task_ids}, 错误: {str(e)}")
+
+def _dispatch_page_tiles(page_ids):
+    """为新页面生成瓦片金字塔，所有页面作为一个group一次性发送；发送失败时可用 build_page_tiles --missing 补生成"""
+    if not page_ids:
+        return
+    try:
+        group(generate_page_tiles.s(page_id) for page_id in page_ids).apply_async()
+    except Exception as e:
+        logger.error(f"发送瓦片任务失败: {page_ids}, 错误: {str(e)}")
+
+def _use_page_upload_handler(request):
+    """在读取 request.FILES 之前安装页面图片上传处理器"""
+    request.upload_handlers.insert(0, PageImageUploadHandler(request))
+
+def _accepted_page_uploads(request):
+    """返回通过校验的页面图片，被拒绝的文件记录在 request.rejected_page_uploads 中"""
+    return [upload for upload in request.FILES.getlist('pages') if upload.error is None]
+
+def _store_page_files(uploads):
+    """
+    先将上传的页面图片和预览图写入存储，数据库事务中只保留批量写入
+    
+    多页TIFF只保存一次文件，每一帧作为一个书页
+    
+    Args:
+        uploads: PageImageUploadHandler 生成的上传文件
+        
+    Returns:
+        list: 每个页面的 BookPage 字段，按 uploads 和帧的顺序排列
+    """
+    upload_field = BookPage._meta.get_field('image')
+    preview_field = BookPage._meta.get_field('preview')
+    stored = []
+    try:
+        for upload in uploads:
+            fields = {
+                'image': default_storage.save(upload_field.generate_filename(None, upload.name), upload),
+                'preview': '',
+                'image_hash': upload.content_hash,
+                'image_format': upload.image_format,
+                'image_width': upload.image_width,
+                'image_height': upload.image_height,
+                'image_size': upload.size
+            }
+            stored.append(fields)
+            if upload.preview_content is not None:
+                preview_name = f"{os.path.splitext(os.path.basename(upload.name))[0]}.jpg"
+                fields['preview'] = default_storage.save(
+                    preview_field.generate_filename(None, preview_name), ContentFile(upload.preview_content)
+                )
+            # 其余帧共用同一个文件，各帧的预览图由生成瓦片的任务生成
+            for frame, (width, height) in enumerate(upload.frame_sizes[1:], start=1):
+                stored.append(dict(
+                    fields,
+                    preview='',
+                    image_frame=frame,
+                    image_hash=OCRCacheService.frame_hash(upload.content_hash, frame),
+                    image_width=width,
+                    image_height=height
+                ))
+    except Exception:
+        _delete_page_files(stored)
+        raise
+    return stored
+
+def _delete_page_files(stored):
+    """删除已写入存储的页面图片和预览图（入库失败时清理）"""
+    names = {name for fields in stored for name in (fields['image'], fields['preview']) if name}
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except Exception as e:
+            logger.error(f"清理页面图片失败: {name}, 错误: {str(e)}")
+
+def _ingest_pages(book, stored, start_page_number):
+    """
+    批量创建书页和OCR任务（需在事务中调用），事务提交后统一发送OCR任务
+    
+    Args:
+        book: 书籍
+        stored: _store_page_files 返回的页面字段
+        start_page_number: 起始页码
+        
+    Returns:
+        list: 新建书页的信息
+    """
+    pages = BookPage.objects.bulk_create([
+        BookPage(book=book, page_number=start_page_number + offset, ocr_status='pending', **fields)
+        for offset, fields in enumerate(stored)
+    ])
+    ocr_tasks = OCRTask.objects.bulk_create([OCRTask(page=page) for page in pages])
+    BookOCRStats.apply_delta(book.id, pending_count=len(ocr_tasks))
+    
+    # 只有事务提交后才发送任务，worker不会读到尚未提交的书页
+    ocr_task_ids = [ocr_task.id for ocr_task in ocr_tasks]
+    page_ids = [page.id for page in pages]
+    transaction.on_commit(lambda: _dispatch_ocr_batches(ocr_task_ids))
+    transaction.on_commit(lambda: _dispatch_page_tiles(page_ids))
+    
+    return [
+        {
+            'id': page.id,
+            'page_number': page.page_number,
+            'image_url': page.image.url,
+            'preview_url': page.preview.url if page.preview else None,
+            'width': page.image_width,
+            'height': page.image_height,
+            'ocr_status': page.ocr_status
+        }
+        for page in pages
+    ]
+
 @login_required
 def book_list(request):
     """书籍列表页面"""
@@ -35,10 +173,10 @@ def book_detail(request, book_id):
 @login_required
 def page_editor(request, page_id):
     """页面编辑器（校对、比对界面）"""
-    page = get_object_or_404(BookPage, id=page_id)
-    text_regions = page.text_regions.all().order_by('order_index')
+    page = get_object_or_404(BookPage.objects.select_related('book'), id=page_id)
+    text_regions = page.text_regions.select_related('correction', 'translation').order_by('order_index')
     
-    # 获取校对和翻译数据
+    # 获取校对和翻译数据（已随区域一次查询取出）
     for region in text_regions:
         try:
             region.corrected_text = region.correction.corrected_text
@@ -61,38 +199,25 @@ def page_editor(request, page_id):
 def upload_pages(request, book_id):
     """上传书籍页面图片"""
     book = get_object_or_404(Book, id=book_id, created_by=request.user)
+    _use_page_upload_handler(request)
     
     try:
-        files = request.FILES.getlist('pages')
+        uploads = _accepted_page_uploads(request)
         page_number = int(request.POST.get('start_page_number', 1))
         
-        created_pages = []
-        for file in files:
-            # 保存图片文件
-            page = BookPage.objects.create(
-                book=book,
-                page_number=page_number,
-                image=file
-            )
-            
-            # 创建OCR任务
-            ocr_task = OCRTask.objects.create(page=page)
-            
-            # 异步处理OCR
-            process_ocr_task.delay(ocr_task.id)
-            
-            created_pages.append({
-                'id': page.id,
-                'page_number': page.page_number,
-                'image_url': page.image.url,
-                'ocr_status': page.ocr_status
-            })
-            
-            page_number += 1
+        # 先写文件，再在一个事务中批量创建书页和OCR任务，失败时不留下部分页面
+        stored = _store_page_files(uploads)
+        try:
+            with transaction.atomic():
+                created_pages = _ingest_pages(book, stored, page_number)
+        except Exception:
+            _delete_page_files(stored)
+            raise
         
         return JsonResponse({
             'success': True,
-            'pages': created_pages
+            'pages': created_pages,
+            'rejected': request.rejected_page_uploads
         })
         
     except Exception as e:
@@ -114,19 +239,22 @@ def save_correction(request, region_id):
         corrected_text = data.get('corrected_text', '')
         notes = data.get('notes', '')
         
-        correction, created = TextCorrection.objects.update_or_create(
-            text_region=region,
-            defaults={
-                'corrected_text': corrected_text,
-                'correction_notes': notes,
-                'corrector': request.user
-            }
-        )
+        with transaction.atomic():
+            correction, created = TextCorrection.objects.update_or_create(
+                text_region=region,
+                defaults={
+                    'corrected_text': corrected_text,
+                    'correction_notes': notes,
+                    'corrector': request.user
+                }
+            )
+            mark_regions_changed([(region.page_id, region.id)])
         
         return JsonResponse({
             'success': True,
             'correction_id': correction.id,
-            'created': created
+            'created': created,
+            'updated_at': correction.updated_at.isoformat()
         })
         
     except Exception as e:
@@ -136,6 +264,219 @@ def save_correction(request, region_id):
             'error': str(e)
         }, status=400)
 
+@csrf_exempt
+@require_http_methods(["POST"])
+@login_required
+def save_corrections(request, page_id):
+    """
+    批量保存页面的文本校对结果
+    
+    请求体: {"corrections": [{"region_id", "corrected_text", "notes", "base_updated_at"}]}
+    base_updated_at 为客户端读取时校对记录的 updated_at（尚无校对时为null），每条都必须提供，
+    与当前记录不一致说明已被他人修改，该条目按冲突拒绝
+    """
+    page = get_object_or_404(BookPage.objects.only('id'), id=page_id)
+    
+    try:
+        data = json.loads(request.body)
+        items = data.get('corrections')
+        if not isinstance(items, list) or not items:
+            raise ValueError('corrections 必须为非空列表')
+        if len(items) > MAX_BULK_CORRECTIONS:
+            raise ValueError(f'单次最多提交 {MAX_BULK_CORRECTIONS} 条校对')
+        region_ids = [int(item['region_id']) for item in items]
+        if len(set(region_ids)) != len(region_ids):
+            raise ValueError('region_id 不能重复')
+        base_versions = []
+        for item in items:
+            if 'base_updated_at' not in item:
+                raise ValueError('每条校对都必须提供 base_updated_at（尚无校对时为null）')
+            base_version = parse_datetime(item['base_updated_at']) if item['base_updated_at'] else None
+            if item['base_updated_at'] and base_version is None:
+                raise ValueError(f"无效的 base_updated_at: {item['base_updated_at']}")
+            base_versions.append(base_version)
+    except (ValueError, KeyError, TypeError) as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    try:
+        results = []
+        to_create = []
+        to_update = []
+        now = timezone.now()
+        
+        with transaction.atomic():
+            # 一次查询校验全部区域并锁定，避免并发编辑者交错写入
+            regions = {
+                region.id: region
+                for region in TextRegion.objects.select_for_update(of=('self',))
+                .select_related('correction')
+                .filter(page_id=page.id, id__in=region_ids)
+            }
+            
+            for item, region_id, base_version in zip(items, region_ids, base_versions):
+                region = regions.get(region_id)
+                if region is None:
+                    results.append({'region_id': region_id, 'status': 'not_found'})
+                    continue
+                
+                correction = getattr(region, 'correction', None)
+                current_version = correction.updated_at if correction is not None else None
+                if base_version != current_version:
+                    results.append({
+                        'region_id': region_id,
+                        'status': 'conflict',
+                        'updated_at': current_version.isoformat() if current_version else None,
+                        'corrected_text': correction.corrected_text if correction is not None else None
+                    })
+                    continue
+                
+                if correction is None:
+                    correction = TextCorrection(
+                        text_region=region,
+                        corrected_text=item.get('corrected_text', ''),
+                        correction_notes=item.get('notes', ''),
+                        corrector=request.user,
+                        created_at=now,
+                        updated_at=now
+                    )
+                    to_create.append(correction)
+                    status = 'created'
+                else:
+                    correction.corrected_text = item.get('corrected_text', '')
+                    correction.correction_notes = item.get('notes', '')
+                    correction.corrector = request.user
+                    correction.updated_at = now
+                    to_update.append(correction)
+                    status = 'updated'
+                results.append({'region_id': region_id, 'status': status, 'correction': correction})
+            
+            TextCorrection.objects.bulk_create(to_create)
+            TextCorrection.objects.bulk_update(
+                to_update, ['corrected_text', 'correction_notes', 'corrector', 'updated_at']
+            )
+            if to_create or to_update:
+                mark_regions_changed(
+                    (page.id, correction.text_region_id) for correction in to_create + to_update
+                )
+        
+        for result in results:
+            correction = result.pop('correction', None)
+            if correction is not None:
+                result['correction_id'] = correction.id
+                result['updated_at'] = correction.updated_at.isoformat()
+        
+        return JsonResponse({
+            'success': True,
+            'applied': len(to_create) + len(to_update),
+            'conflicts': sum(1 for result in results if result['status'] == 'conflict'),
+            'results': results
+        })
+        
+    except Exception as e:
+        logger.error(f"批量保存校对失败: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@login_required
+def reocr_page_regions(request, page_id):
+    """
+    重新识别页面中的个别文本区域（只运行识别模型，不重新检测整页），可同时调整区域边框
+    
+    请求体: {"regions": [{"region_id", "x", "y", "width", "height"}]}，省略坐标时按现有边框识别。
+    识别在交互OCR队列中异步完成，完成后区域版本号大于返回的 revision，
+    可通过 get_page_data?since=<revision> 增量获取新的原文和置信度
+    """
+    page = get_object_or_404(
+        BookPage.objects.only('id', 'ocr_status', 'image_width', 'image_height'), id=page_id
+    )
+    box_fields = ('x', 'y', 'width', 'height')
+    
+    try:
+        data = json.loads(request.body)
+        items = data.get('regions')
+        if not isinstance(items, list) or not items:
+            raise ValueError('regions 必须为非空列表')
+        if len(items) > MAX_REOCR_REGIONS:
+            raise ValueError(f'单次最多重新识别 {MAX_REOCR_REGIONS} 个区域')
+        region_ids = [int(item['region_id']) for item in items]
+        if len(set(region_ids)) != len(region_ids):
+            raise ValueError('region_id 不能重复')
+        boxes = {}
+        for item, region_id in zip(items, region_ids):
+            if not any(field in item for field in box_fields):
+                continue
+            if not all(field in item for field in box_fields):
+                raise ValueError('调整边框需要同时提供 x, y, width, height')
+            box = {field: int(item[field]) for field in box_fields}
+            if (
+                box['x'] < 0 or box['y'] < 0 or box['width'] <= 0 or box['height'] <= 0
+                or (page.image_width and box['x'] + box['width'] > page.image_width)
+                or (page.image_height and box['y'] + box['height'] > page.image_height)
+            ):
+                raise ValueError('区域边框超出图片范围')
+            boxes[region_id] = box
+    except (ValueError, KeyError, TypeError) as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    
+    if page.ocr_status == 'processing':
+        return JsonResponse({
+            'success': False,
+            'error': '页面正在整页识别，请稍后再试'
+        }, status=409)
+    
+    try:
+        with transaction.atomic():
+            regions = {
+                region.id: region
+                for region in TextRegion.objects.select_for_update().filter(page_id=page.id, id__in=region_ids)
+            }
+            missing = [region_id for region_id in region_ids if region_id not in regions]
+            if missing:
+                return JsonResponse({
+                    'success': False,
+                    'error': '文本区域不存在',
+                    'missing': missing
+                }, status=404)
+            
+            moved = []
+            for region_id, box in boxes.items():
+                region = regions[region_id]
+                for field, value in box.items():
+                    setattr(region, field, value)
+                moved.append(region)
+            if moved:
+                TextRegion.objects.bulk_update(moved, box_fields)
+                mark_regions_changed((page.id, region.id) for region in moved)
+                # 边框变化后重新生成区域雪碧图
+                transaction.on_commit(lambda: generate_page_sprite.delay(page.id))
+            
+            revision = BookPage.objects.filter(id=page.id).values_list('revision', flat=True).get()
+            transaction.on_commit(lambda: reocr_regions.delay(page.id, region_ids))
+        
+        return JsonResponse({
+            'success': True,
+            'revision': revision,
+            'region_ids': region_ids,
+            'moved': [region.id for region in moved]
+        })
+        
+    except Exception as e:
+        logger.error(f"重新识别文本区域失败: {str(e)}")
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+
 @csrf_exempt
 @require_http_methods(["POST"])
 @login_required
@@ -154,19 +495,22 @@ def translate_region(request, region_id):
             text_to_translate = region.original_text
         
         # 调用翻译服务
+        from .services.translation_service import TranslationService
         translation_service = TranslationService()
         translated_text = translation_service.translate_text(text_to_translate, target_language)
         
         # 保存翻译结果
-        translation, created = Translation.objects.update_or_create(
-            text_region=region,
-            defaults={
-                'translated_text': translated_text,
-                'translation_language': target_language,
-                'translator': request.user,
-                'translation_method': 'auto'
-            }
-        )
+        with transaction.atomic():
+            translation, created = Translation.objects.update_or_create(
+                text_region=region,
+                defaults={
+                    'translated_text': translated_text,
+                    'translation_language': target_language,
+                    'translator': request.user,
+                    'translation_method': 'auto'
+                }
+            )
+            mark_regions_changed([(region.page_id, region.id)])
         
         return JsonResponse({
             'success': True,
@@ -181,55 +525,170 @@ def translate_region(request, region_id):
             'error': str(e)
         }, status=400)
 
+def _get_cached_snapshot(request, page_id):
+    """读取页面快照，同一请求内只查询一次"""
+    cache_attr = f'_page_snapshot_{page_id}'
+    if not hasattr(request, cache_attr):
+        setattr(request, cache_attr, get_page_snapshot(page_id))
+    return getattr(request, cache_attr)
+
+def _snapshot_gzip(request, snapshot):
+    """是否直接返回gzip压缩的快照"""
+    return snapshot.compressed and 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+
+def _snapshot_etag(request, page_id):
+    if 'since' in request.GET:
+        return None
+    snapshot = _get_cached_snapshot(request, page_id)
+    if snapshot is None:
+        return None
+    # gzip与未压缩的响应体不同，使用不同的强ETag
+    return f"{snapshot.etag}-gzip" if _snapshot_gzip(request, snapshot) else snapshot.etag
+
+def _snapshot_last_modified(request, page_id):
+    if 'since' in request.GET:
+        return None
+    snapshot = _get_cached_snapshot(request, page_id)
+    return snapshot.updated_at if snapshot is not None else None
+
 @require_http_methods(["GET"])
 @login_required
+@condition(etag_func=_snapshot_etag, last_modified_func=_snapshot_last_modified)
 def get_page_data(request, page_id):
-    """获取页面的文本区域数据"""
-    page = get_object_or_404(BookPage, id=page_id)
+    """
+    获取页面的文本区域数据：直接返回预先生成的页面快照，未变化时返回304
     
-    regions_data = []
-    for region in page.text_regions.all().order_by('order_index'):
-        region_data = {
-            'id': region.id,
-            'region_id': region.region_id,
-            'x': region.x,
-            'y': region.y,
-            'width': region.width,
-            'height': region.height,
-            'original_text': region.original_text,
-            'confidence': region.confidence,
-            'order_index': region.order_index
-        }
-        
-        # 添加校对信息
-        try:
-            region_data['corrected_text'] = region.correction.corrected_text
-            region_data['correction_notes'] = region.correction.correction_notes
-        except TextCorrection.DoesNotExist:
-            region_data['corrected_text'] = None
-            region_data['correction_notes'] = None
-        
-        # 添加翻译信息
+    快照在数据变化后由后台任务重建，可能略旧于数据库；其中的 page.revision 与内容一致，
+    客户端随后以 ?since=<revision> 增量同步即可补齐
+    
+    带 ?since=<revision> 参数时只返回该版本之后变化的区域和已删除的区域ID（增量同步），
+    客户端版本过旧时返回 full 为 True 的全量数据
+    """
+    if 'since' in request.GET:
         try:
-            region_data['translated_text'] = region.translation.translated_text
-            region_data['translation_language'] = region.translation.translation_language
-        except Translation.DoesNotExist:
-            region_data['translated_text'] = None
-            region_data['translation_language'] = None
-        
-        regions_data.append(region_data)
+            since = int(request.GET['since'])
+        except ValueError:
+            return JsonResponse({
+                'success': False,
+                'error': 'since 必须为整数'
+            }, status=400)
+        page = get_object_or_404(BookPage, id=page_id)
+        return JsonResponse(build_page_delta(page, since))
+    
+    snapshot = _get_cached_snapshot(request, page_id)
+    if snapshot is None:
+        raise Http404("页面不存在")
+    
+    payload = bytes(snapshot.payload)
+    response = HttpResponse(content_type='application/json')
+    if _snapshot_gzip(request, snapshot):
+        response['Content-Encoding'] = 'gzip'
+    elif snapshot.compressed:
+        payload = gzip.decompress(payload)
+    response['Vary'] = 'Accept-Encoding'
+    response.content = payload
+    return response
+
+@require_http_methods(["GET"])
+@login_required
+def get_page_tile(request, page_id, version, level, col, row, fmt):
+    """
+    返回页面瓦片。瓦片路径包含版本号，内容不会变化，响应可被浏览器长期缓存
+    
+    生产环境也可以由前端服务器直接提供 MEDIA_ROOT 下的 book_pages/tiles/ 目录
+    """
+    from .services.page_tiles import TILE_CACHE_CONTROL, TILE_CONTENT_TYPES, tile_name
+    
+    content_type = TILE_CONTENT_TYPES.get(fmt)
+    if content_type is None:
+        raise Http404("瓦片不存在")
+    try:
+        tile = default_storage.open(tile_name(page_id, version, level, col, row, fmt), 'rb')
+    except (FileNotFoundError, OSError):
+        raise Http404("瓦片不存在")
+    
+    response = FileResponse(tile, content_type=content_type)
+    response['Cache-Control'] = TILE_CACHE_CONTROL
+    return response
+
+@require_http_methods(["GET"])
+@login_required
+def book_ocr_progress(request, book_id):
+    """书籍整体OCR进度（基于冗余计数，不遍历页面）"""
+    book = get_object_or_404(Book.objects.only('id'), id=book_id, created_by=request.user)
+    stats = BookOCRStats.objects.filter(book=book).first() or BookOCRStats.rebuild(book.id)
     
     return JsonResponse({
         'success': True,
-        'page': {
-            'id': page.id,
-            'page_number': page.page_number,
-            'image_url': page.image.url,
-            'ocr_status': page.ocr_status
-        },
-        'text_regions': regions_data
+        'book_id': book.id,
+        'total_pages': stats.total_pages,
+        'pending': stats.pending_count,
+        'processing': stats.processing_count,
+        'completed': stats.completed_count,
+        'failed': stats.failed_count,
+        'avg_confidence': stats.avg_confidence,
+        'region_count': stats.region_count,
+        'updated_at': stats.updated_at.isoformat()
     })
 
+def _sse_event(event, data):
+    """格式化一条Server-Sent Events消息"""
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@require_http_methods(["GET"])
+@login_required
+async def ocr_progress_stream(request, book_id):
+    """
+    以Server-Sent Events推送整本书的OCR进度，替代逐页轮询 check_ocr_status
+    
+    需要在ASGI服务器（app/asgi.py）下运行，连接建立后先发送当前所有页面状态的快照。
+    WSGI下（如 runserver）无法逐条发送无限的事件流，会一直占用工作线程；没有跨进程的
+    Redis发布/订阅时也收不到worker发布的事件。这两种情况返回204，EventSource 不再重连，
+    页面改为轮询 book_ocr_progress
+    """
+    from .services.ocr_progress import BookEventSubscription, progress_push_available
+    
+    if not isinstance(request, ASGIRequest) or not progress_push_available():
+        return HttpResponse(status=204)
+    
+    user = await request.auser()
+    if not await Book.objects.filter(id=book_id, created_by=user).aexists():
+        raise Http404("书籍不存在")
+    
+    async def event_stream():
+        # 先完成订阅再读取快照，避免遗漏两者之间发生的状态变化
+        subscription = BookEventSubscription(book_id)
+        await subscription.open()
+        try:
+            snapshot = [
+                {
+                    'page_id': page['id'],
+                    'page_number': page['page_number'],
+                    'status': page['ocr_status'],
+                    'confidence': page['ocr_confidence']
+                }
+                async for page in BookPage.objects.filter(book_id=book_id)
+                .order_by('page_number')
+                .values('id', 'page_number', 'ocr_status', 'ocr_confidence')
+            ]
+            yield _sse_event('snapshot', json.dumps({'pages': snapshot}, ensure_ascii=False))
+            
+            while True:
+                message = await subscription.next()
+                if message is None:
+                    # 心跳，防止代理断开空闲连接
+                    yield ": keepalive\n\n"
+                else:
+                    yield _sse_event(json.loads(message).get('type', 'message'), message)
+        finally:
+            await subscription.close()
+    
+    response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 @require_http_methods(["GET"])
 @login_required
 def check_ocr_status(request, page_id):
@@ -248,6 +707,8 @@ def check_ocr_status(request, page_id):
 @login_required
 def create_book(request):
     """创建新的古籍"""
+    _use_page_upload_handler(request)
+    
     try:
         # 获取表单数据
         title = request.POST.get('title', '').strip()
@@ -262,54 +723,30 @@ def create_book(request):
                 'error': '书名不能为空'
             }, status=400)
         
-        # 创建书籍
-        book = Book.objects.create(
-            title=title,
-            author=author,
-            dynasty=dynasty,
-            description=description,
-            created_by=request.user
-        )
-        
-        # 处理上传的页面图片
-        files = request.FILES.getlist('pages')
-        if not files:
+        # 处理上传的页面图片（按文件内容校验类型，非图片被拒绝）
+        uploads = _accepted_page_uploads(request)
+        if not uploads:
             return JsonResponse({
                 'success': False,
-                'error': '请至少上传一张页面图片'
+                'error': '请至少上传一张页面图片',
+                'rejected': request.rejected_page_uploads
             }, status=400)
         
-        created_pages = []
-        page_number = start_page_number
-        
-        for file in files:
-            # 验证文件类型
-            if not file.content_type.startswith('image/'):
-                continue
-                
-            # 创建书页
-            page = BookPage.objects.create(
-                book=book,
-                page_number=page_number,
-                image=file,
-                ocr_status='pending'
-            )
-            
-            # 创建OCR任务
-            ocr_task = OCRTask.objects.create(page=page)
-            
-            # 异步处理OCR
-            from .tasks import process_ocr_task
-            process_ocr_task.delay(ocr_task.id)
-            
-            created_pages.append({
-                'id': page.id,
-                'page_number': page.page_number,
-                'image_url': page.image.url,
-                'ocr_status': page.ocr_status
-            })
-            
-            page_number += 1
+        # 先写文件，再在一个事务中创建书籍、书页和OCR任务，失败时不留下半成品书籍
+        stored = _store_page_files(uploads)
+        try:
+            with transaction.atomic():
+                book = Book.objects.create(
+                    title=title,
+                    author=author,
+                    dynasty=dynasty,
+                    description=description,
+                    created_by=request.user
+                )
+                created_pages = _ingest_pages(book, stored, start_page_number)
+        except Exception:
+            _delete_page_files(stored)
+            raise
         
         logger.info(f"创建古籍成功: {book.title}, 用户: {request.user.username}, 页数: {len(created_pages)}")
         
@@ -323,7 +760,8 @@ def create_book(request):
                 'description': book.description,
                 'pages_count': len(created_pages)
             },
-            'pages': created_pages
+            'pages': created_pages,
+            'rejected': request.rejected_page_uploads
         })
         
     except ValueError as e: